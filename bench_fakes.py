@@ -0,0 +1,264 @@
+"""
+Local stand-ins for Supabase, Groq and Google Translate used by benchmark.py.
+
+One FastAPI app speaks just enough of each upstream protocol for the
+chatbot to run end to end without network access:
+
+• Supabase PostgREST: table reads (select / order / offset / limit, exact
+  counts), the match_* vector RPCs and the search_faqs full-text RPC, seeded
+  from faq_data.csv / result.csv and embedded once at startup with the real
+  embedding model
+• Groq: OpenAI-style /openai/v1/chat/completions, streaming or not
+• Google Translate v2: returns a marked Arabic "translation" of each q value
+
+Every endpoint sleeps for a configurable latency (plus jitter) so the
+benchmark measures our overhead on top of realistic upstream delays.
+
+Usage:
+    python bench_fakes.py --port 8900 --supabase-ms 40 --groq-ttft-ms 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI()
+
+LATENCY_MS: Dict[str, float] = {"supabase": 40.0, "groq_ttft": 300.0, "groq_token": 15.0, "translate": 80.0}
+JITTER = 0.2
+GROQ_REPLY = (
+    "Tijarah360 helps you run your store. You can manage sales, inventory and reports "
+    "from one dashboard. Contact support for anything else."
+)
+
+# table name -> rows; vector tables also keep a normalised embedding matrix
+TABLES: Dict[str, List[Dict[str, Any]]] = {}
+MATRICES: Dict[str, np.ndarray] = {}
+RPC_TABLES: Dict[str, str] = {}
+FAQ_SEARCH_RPC = "search_faqs"
+FAQ_TABLE_NAME = "faqs"
+_rng = random.Random(0)
+
+
+async def delay(kind: str, scale: float = 1.0) -> None:
+    base = LATENCY_MS[kind] * scale
+    if base > 0:
+        await asyncio.sleep(max(0.0, base * (1 + _rng.uniform(-JITTER, JITTER))) / 1000.0)
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+# -------------------------------
+# Seed data
+# -------------------------------
+def seed(en_csv: str, ar_csv: str) -> None:
+    """Load both FAQ files into the vector tables and the bilingual faqs table."""
+    from embedding_backends import create_base_embeddings
+    from faq_store import FAQ_AR_JSON_PATH, pair_arabic_records
+    from ingestion import row_id_for, rows_from_csv
+    from langchain_chain import (
+        ARABIC_SUPABASE_MATCH_RPC,
+        ARABIC_SUPABASE_TABLE_NAME,
+        EMBEDDING_MODEL_NAME,
+        FAQ_SEARCH_RPC as search_rpc,
+        FAQ_TABLE_NAME as faq_table,
+        SUPABASE_MATCH_RPC,
+        SUPABASE_TABLE_NAME,
+        normalize_arabic,
+    )
+
+    global FAQ_SEARCH_RPC, FAQ_TABLE_NAME
+    FAQ_SEARCH_RPC, FAQ_TABLE_NAME = search_rpc, faq_table
+    RPC_TABLES.update({SUPABASE_MATCH_RPC: SUPABASE_TABLE_NAME, ARABIC_SUPABASE_MATCH_RPC: ARABIC_SUPABASE_TABLE_NAME})
+
+    print(f"Embedding FAQ corpus with {EMBEDDING_MODEL_NAME}...")
+    model = create_base_embeddings(EMBEDDING_MODEL_NAME)
+    english, arabic = rows_from_csv(en_csv), rows_from_csv(ar_csv)
+    for table, rows, lang in ((SUPABASE_TABLE_NAME, english, "en"), (ARABIC_SUPABASE_TABLE_NAME, arabic, "ar")):
+        contents = [normalize_arabic(r.content()) if lang == "ar" else r.content() for r in rows]
+        vectors = model.embed_documents(contents)
+        TABLES[table] = [
+            {
+                "id": row_id_for(table, row.faq_id),
+                "content": content,
+                "metadata": {"source": row.question, "faq_id": row.faq_id},
+                "embedding": json.dumps([float(x) for x in vector]),
+            }
+            for row, content, vector in zip(rows, contents, vectors)
+        ]
+        matrix = np.asarray(vectors, dtype=np.float32)
+        MATRICES[table] = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    # Arabic records pair with English FAQs through en_id, not their own ID
+    english = [row for row in english if row.faq_id.isdigit()]
+    with open(FAQ_AR_JSON_PATH, encoding="utf-8") as fh:
+        ar_by_id = pair_arabic_records({int(row.faq_id): row.question for row in english}, json.load(fh))
+    TABLES[FAQ_TABLE_NAME] = [
+        {
+            "id": int(row.faq_id),
+            "question_en": row.question,
+            "answer_en": row.answer,
+            "question_ar": ar_by_id.get(int(row.faq_id), {}).get("question_ar", ""),
+            "answer_ar": ar_by_id.get(int(row.faq_id), {}).get("answer_ar", ""),
+            "tags": [t.strip() for t in row.tags.split(",") if t.strip()],
+        }
+        for row in english
+    ]
+    print(", ".join(f"{name}: {len(rows)} rows" for name, rows in TABLES.items()))
+
+
+# -------------------------------
+# Supabase (PostgREST)
+# -------------------------------
+@app.get("/health")
+def health():
+    return {"ok": True}
+
+
+@app.get("/rest/v1/{table}")
+async def select_rows(table: str, request: Request):
+    await delay("supabase")
+    rows = TABLES.get(table, [])
+    params = request.query_params
+    columns = [c.strip() for c in (params.get("select") or "*").split(",")]
+    if params.get("order"):
+        rows = sorted(rows, key=lambda r: str(r.get(params["order"].split(".")[0])))
+    offset = int(params.get("offset") or 0)
+    limit = int(params["limit"]) if params.get("limit") is not None else len(rows)
+    page = rows[offset:offset + limit]
+    if columns != ["*"]:
+        page = [{c: r.get(c) for c in columns} for r in page]
+
+    headers = {}
+    if "count=" in (request.headers.get("prefer") or ""):
+        headers["Content-Range"] = f"{offset}-{offset + max(len(page) - 1, 0)}/{len(rows)}" if page else f"*/{len(rows)}"
+    return JSONResponse(page, headers=headers)
+
+
+@app.post("/rest/v1/rpc/{name}")
+async def rpc(name: str, request: Request):
+    await delay("supabase")
+    body = await request.json()
+    limit = int(request.query_params.get("limit") or body.get("match_count") or 5)
+
+    if name in RPC_TABLES and "query_embedding" in body:
+        table = RPC_TABLES[name]
+        query = np.asarray(body["query_embedding"], dtype=np.float32)
+        scores = MATRICES[table] @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        top = np.argsort(-scores)[:limit]
+        rows = TABLES[table]
+        return [
+            {"id": rows[i]["id"], "content": rows[i]["content"], "metadata": rows[i]["metadata"], "similarity": float(scores[i])}
+            for i in top
+        ]
+
+    if name == FAQ_SEARCH_RPC:
+        # Crude stand-in for ts_rank: share of query terms that prefix-match a word
+        terms = _tokens(body.get("query_text", ""))
+        hits = []
+        for row in TABLES.get(FAQ_TABLE_NAME, []):
+            words = set(_tokens(" ".join([row["question_en"], row["answer_en"], row["question_ar"], row["answer_ar"], *row["tags"]])))
+            matched = sum(1 for t in terms if any(w.startswith(t) for w in words))
+            if terms and matched:
+                hits.append(dict(row, rank=matched / len(terms)))
+        hits.sort(key=lambda r: r["rank"], reverse=True)
+        return hits[:int(body.get("match_count") or limit)]
+
+    return JSONResponse({"message": f"function {name} not found"}, status_code=404)
+
+
+# -------------------------------
+# Groq (OpenAI-compatible chat completions)
+# -------------------------------
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    words = re.findall(r"\S+\s*", GROQ_REPLY)
+    usage = {"prompt_tokens": 40, "completion_tokens": len(words), "total_tokens": 40 + len(words)}
+
+    if not body.get("stream"):
+        await delay("groq_ttft")
+        await delay("groq_token", scale=len(words))
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": GROQ_REPLY}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    async def stream():
+        await delay("groq_ttft")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}],
+            }
+            if i == len(words) - 1:
+                chunk["choices"][0]["finish_reason"] = "stop"
+                chunk["x_groq"] = {"usage": usage}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await delay("groq_token")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+# -------------------------------
+# Google Translate v2
+# -------------------------------
+@app.post("/language/translate/v2")
+async def translate(request: Request):
+    await delay("translate")
+    form = parse_qs((await request.body()).decode("utf-8"))
+    return {"data": {"translations": [{"translatedText": f"ترجمة: {q}"} for q in form.get("q", [])]}}
+
+
+def main() -> None:
+    global JITTER, _rng
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Supabase / Groq / Translate upstreams for benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--en-csv", default="faq_data.csv")
+    parser.add_argument("--ar-csv", default="result.csv")
+    parser.add_argument("--supabase-ms", type=float, default=LATENCY_MS["supabase"])
+    parser.add_argument("--groq-ttft-ms", type=float, default=LATENCY_MS["groq_ttft"], help="Groq time to first token")
+    parser.add_argument("--groq-token-ms", type=float, default=LATENCY_MS["groq_token"], help="Groq delay per streamed token")
+    parser.add_argument("--translate-ms", type=float, default=LATENCY_MS["translate"])
+    parser.add_argument("--jitter", type=float, default=JITTER, help="Uniform +/- fraction applied to every delay")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    LATENCY_MS.update({
+        "supabase": args.supabase_ms,
+        "groq_ttft": args.groq_ttft_ms,
+        "groq_token": args.groq_token_ms,
+        "translate": args.translate_ms,
+    })
+    JITTER, _rng = args.jitter, random.Random(args.seed)
+    seed(args.en_csv, args.ar_csv)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
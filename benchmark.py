@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Latency / throughput benchmark for the chatbot API.
+
+Starts the fake upstreams (bench_fakes.py) and the FastAPI app pointed at
+them, replays a mixed EN/AR query corpus (page.tsx suggestions, FAQ
+questions and paraphrases of them) against /rag_chat, /chat and
+/debug-search at several concurrency levels, and reports p50/p95/p99
+latency and throughput. Same seed + same flags = same request sequence.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --concurrency 1,8,32 --requests 300 --endpoints rag_chat
+    python benchmark.py --workers 4 --no-response-cache --json results.json
+    python benchmark.py --target http://127.0.0.1:8000   # an already running app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+ENDPOINTS = {"rag_chat": "/rag_chat", "chat": "/chat", "debug-search": "/debug-search"}
+
+EN_PARAPHRASES = ("{q}", "{bare}", "{lower}", "Can you tell me {lower}", "Please explain: {bare}")
+AR_PARAPHRASES = ("{q}", "{bare}", "من فضلك {bare}", "أريد أن أعرف {bare}")
+
+
+@dataclass
+class Result:
+    endpoint: str
+    concurrency: int
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+# -------------------------------
+# Query corpus
+# -------------------------------
+def page_suggestions(path: str = "page.tsx") -> Dict[str, List[str]]:
+    """The suggestion + autocomplete strings shown in the chat UI, per language."""
+    with open(path, encoding="utf-8") as fh:
+        source = fh.read()
+    by_lang: Dict[str, List[str]] = {}
+    for lang, block in re.findall(r"\n  (en|ar): \{(.*?)\n  \}", source, re.S):
+        strings = []
+        for array in re.findall(r"(?:suggestions|autocomplete): \[(.*?)\]", block, re.S):
+            strings.extend(re.findall(r'"([^"]+)"', array))
+        by_lang[lang] = list(dict.fromkeys(strings))
+    return by_lang
+
+
+def faq_questions(csv_path: str) -> List[str]:
+    with open(csv_path, encoding="utf-8-sig", newline="") as fh:
+        return [r["Question"].strip() for r in csv.DictReader(fh) if (r.get("Question") or "").strip()]
+
+
+def paraphrases(question: str, lang: str) -> List[str]:
+    bare = question.rstrip("?؟ ").strip()
+    templates = AR_PARAPHRASES if lang == "ar" else EN_PARAPHRASES
+    return list(dict.fromkeys(t.format(q=question, bare=bare, lower=bare.lower()) for t in templates))
+
+
+def build_corpus(en_csv: str, ar_csv: str, arabic_share: float, seed: int) -> List[str]:
+    """Shuffled mix of EN and AR queries; arabic_share sets the AR fraction."""
+    suggestions = page_suggestions()
+    pools = {
+        "en": suggestions.get("en", []) + [p for q in faq_questions(en_csv) for p in paraphrases(q, "en")],
+        "ar": suggestions.get("ar", []) + [p for q in faq_questions(ar_csv) for p in paraphrases(q, "ar")],
+    }
+    rng = random.Random(seed)
+    size = len(pools["en"]) + len(pools["ar"])
+    corpus = [
+        rng.choice(pools["ar"] if rng.random() < arabic_share else pools["en"])
+        for _ in range(size)
+    ]
+    return corpus
+
+
+# -------------------------------
+# Processes
+# -------------------------------
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{process.args} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+
+
+def start_fakes(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, "bench_fakes.py", "--port", str(port),
+        "--supabase-ms", str(args.supabase_ms),
+        "--groq-ttft-ms", str(args.groq_ttft_ms),
+        "--groq-token-ms", str(args.groq_token_ms),
+        "--translate-ms", str(args.translate_ms),
+        "--seed", str(args.seed),
+    ])
+    base_url = f"http://127.0.0.1:{port}"
+    wait_for(f"{base_url}/health", args.startup_timeout, process)
+    return process, base_url
+
+
+def start_app(args: argparse.Namespace, fakes_url: str, scratch_dir: str) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = dict(
+        os.environ,
+        SUPABASE_URL=fakes_url,
+        SUPABASE_KEY="bench-key",
+        GROQ_API_KEY="bench-key",
+        GROQ_API_BASE=fakes_url,
+        GOOGLE_TRANSLATE_API_KEY="bench-key",
+        GOOGLE_TRANSLATE_ENDPOINT=f"{fakes_url}/language/translate/v2",
+        # Keep the benchmark's translations out of the real cache file
+        TRANSLATION_CACHE_PATH=os.path.join(scratch_dir, "translations.jsonl"),
+        # ... and the fake tables out of the KB snapshot production serves from
+        KB_SNAPSHOT_DIR=os.path.join(scratch_dir, "kb_snapshot"),
+        LOG_LEVEL=args.app_log_level,
+    )
+    if env.get("VECTOR_INDEX_SHARED_DIR"):
+        # Still benchmark the shared index, but never map or rebuild the real one
+        env["VECTOR_INDEX_SHARED_DIR"] = os.path.join(scratch_dir, "shared_index")
+    if args.no_response_cache:
+        env["RESPONSE_CACHE_SIZE"] = "0"
+        env["SEMANTIC_CACHE_SIZE"] = "0"
+    env.pop("RESPONSE_CACHE_URL", None)
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ], env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    wait_for(f"{base_url}/ready", args.startup_timeout, process)
+    return process, base_url
+
+
+# -------------------------------
+# Load generation
+# -------------------------------
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_level(client: httpx.AsyncClient, path: str, queries: List[str], concurrency: int, total: int) -> Tuple[List[float], int, float]:
+    """Fire `total` requests with `concurrency` in flight; returns (latencies ms, errors, seconds)."""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < total:
+            query = queries[next_index % len(queries)]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                resp = await client.post(path, json={"query": query})
+                if resp.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_benchmark(base_url: str, args: argparse.Namespace, corpus: List[str]) -> List[Result]:
+    results: List[Result] = []
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        for name in args.endpoints:
+            path = ENDPOINTS[name]
+            if args.warmup:
+                await run_level(client, path, corpus, min(4, args.warmup), args.warmup)
+            for concurrency in args.concurrency:
+                latencies, errors, seconds = await run_level(client, path, corpus, concurrency, args.requests)
+                ordered = sorted(latencies)
+                result = Result(
+                    endpoint=path,
+                    concurrency=concurrency,
+                    requests=len(latencies),
+                    errors=errors,
+                    seconds=round(seconds, 3),
+                    throughput=round(len(latencies) / seconds, 2) if seconds else 0.0,
+                    mean_ms=round(sum(ordered) / len(ordered), 1) if ordered else 0.0,
+                    p50_ms=round(percentile(ordered, 50), 1),
+                    p95_ms=round(percentile(ordered, 95), 1),
+                    p99_ms=round(percentile(ordered, 99), 1),
+                )
+                results.append(result)
+                print(
+                    f"{result.endpoint:<14} c={concurrency:<4} n={result.requests:<5} err={errors:<3} "
+                    f"rps={result.throughput:<8} p50={result.p50_ms:<8} p95={result.p95_ms:<8} p99={result.p99_ms} ms"
+                )
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Benchmark an already running app instead of starting one (no fakes)")
+    parser.add_argument("--endpoints", default="rag_chat,chat,debug-search", help=f"Comma list of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma list of in-flight request counts")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per endpoint before measuring")
+    parser.add_argument("--arabic-share", type=float, default=0.5, help="Fraction of Arabic queries in the mix")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--no-response-cache", action="store_true", help="Run the app with the response and semantic caches off")
+    parser.add_argument("--supabase-ms", type=float, default=40.0)
+    parser.add_argument("--groq-ttft-ms", type=float, default=300.0)
+    parser.add_argument("--groq-token-ms", type=float, default=15.0)
+    parser.add_argument("--translate-ms", type=float, default=80.0)
+    parser.add_argument("--en-csv", default="faq_data.csv")
+    parser.add_argument("--ar-csv", default="result.csv")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--app-log-level", default="WARNING")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in args.endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    corpus = build_corpus(args.en_csv, args.ar_csv, args.arabic_share, args.seed)
+    print(f"Corpus: {len(corpus)} queries ({args.arabic_share:.0%} Arabic), seed {args.seed}")
+
+    processes: List[subprocess.Popen] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="t360-bench-") as scratch_dir:
+            if args.target:
+                base_url = args.target.rstrip("/")
+            else:
+                fakes, fakes_url = start_fakes(args)
+                processes.append(fakes)
+                app, base_url = start_app(args, fakes_url, scratch_dir)
+                processes.append(app)
+            print(f"Benchmarking {base_url}\n")
+            results = asyncio.run(run_benchmark(base_url, args, corpus))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "json"}, "results": [asdict(r) for r in results]}, fh, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 1 if any(r.errors for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
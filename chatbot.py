@@ -1,22 +1,130 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+
 from langchain.chains import ConversationalRetrievalChain
-from langchain.memory import ConversationBufferMemory
-from langchain_chain import llm, vectorstore
-
-# Initialize memory
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-
-# Create chain
-qa_chain = ConversationalRetrievalChain.from_llm(
-    llm=llm,
-    retriever=vectorstore.as_retriever(),
-    memory=memory,
-    return_source_documents=True
+from langchain.schema import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_chain import _run_blocking, asimilarity_search, get_llm
+from observability import metrics
+from resources import registry
+
+NO_DATA_MESSAGE = "I don’t have this type of data or information. For more details, you may contact this person at +966542924317."
+
+# Conversation memory is kept per session: the last CHAT_MEMORY_TURNS
+# question/answer pairs, for at most CHAT_MAX_SESSIONS sessions; sessions idle
+# for CHAT_SESSION_TTL seconds are dropped
+CHAT_MEMORY_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "5"))
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+CHAT_RETRIEVAL_K = int(os.getenv("CHAT_RETRIEVAL_K", "4"))
+
+# -------------------------------
+# Session memory
+# -------------------------------
+class SessionMemory:
+    """Windowed chat history per session, evicted LRU-first and after idling."""
+
+    def __init__(self, max_turns: int, max_sessions: int, ttl_seconds: float):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Tuple[float, Deque[Tuple[str, str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float) -> None:
+        # Oldest-used first, so stop at the first session that is still fresh
+        while self._sessions:
+            session_id, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used < self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def history(self, session_id: str) -> List[Tuple[str, str]]:
+        """(question, answer) pairs of the session, oldest first."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return list(entry[1])
+
+    def append(self, session_id: str, question: str, answer: str) -> None:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            turns = entry[1] if entry is not None else deque(maxlen=self.max_turns)
+            turns.append((question, answer))
+            self._sessions[session_id] = (now, turns)
+            self._sessions.move_to_end(session_id)
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+sessions = SessionMemory(CHAT_MEMORY_TURNS, CHAT_MAX_SESSIONS, CHAT_SESSION_TTL)
+
+metrics.collector(
+    "chat_sessions", "Chat sessions currently held in memory",
+    lambda: {(): len(sessions)}, metric_type="gauge",
 )
 
+# -------------------------------
+# Retrieval + chain
+# -------------------------------
+class FaqRetriever(BaseRetriever):
+    """English FAQ table via the local index (or match RPC); one search per call."""
+
+    k: int = CHAT_RETRIEVAL_K
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _score in await asimilarity_search(query, "en", k=self.k)]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return _run_blocking(self._aget_relevant_documents(query, run_manager=run_manager))
+
+def _create_qa_chain():
+    # No memory on the chain itself: each call gets its session's history, and
+    # an empty retrieval answers NO_DATA_MESSAGE without calling the LLM
+    return ConversationalRetrievalChain.from_llm(
+        llm=get_llm(),
+        retriever=FaqRetriever(),
+        return_source_documents=True,
+        response_if_no_docs_found=NO_DATA_MESSAGE,
+    )
+
+registry.register("qa_chain", _create_qa_chain)
+
+def get_qa_chain() -> ConversationalRetrievalChain:
+    return registry.get("qa_chain")
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
 # Chatbot response function
-def get_chatbot_response(user_query: str):
-    relevant_docs = vectorstore.similarity_search(user_query, k=2)
-    if not relevant_docs:
-        return "I don’t have this type of data or information. For more details, you may contact this person at +966542924317."
-    result = qa_chain.invoke({"question": user_query})
-    return result["answer"]
+async def aget_chatbot_response(user_query: str, session_id: Optional[str] = None) -> str:
+    """Answer one turn; the turn is remembered under session_id when given."""
+    qa_chain = await registry.aget("qa_chain")
+    history = sessions.history(session_id) if session_id else []
+    result = await qa_chain.ainvoke({"question": user_query, "chat_history": history})
+    answer = result["answer"]
+    if session_id:
+        sessions.append(session_id, user_query, answer)
+    return answer
+
+def get_chatbot_response(user_query: str, session_id: Optional[str] = None) -> str:
+    """Blocking variant of aget_chatbot_response for scripts and tests."""
+    return _run_blocking(aget_chatbot_response(user_query, session_id))
@@ -18,46 +18,90 @@ ARABIC_SUPABASE_TABLE_NAME = os.getenv("ARABIC_SUPABASE_TABLE_NAME", "arabic_doc
 # Initialize Supabase client
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def clear_supabase_table(table_name=None, language=None):
+# Rows fetched per page and ids per DELETE ... IN (...) request
+PAGE_SIZE = 1000
+DELETE_CHUNK_SIZE = 200
+
+# SQL function created by supabase_schema.sql
+TRUNCATE_RPC = os.getenv("SUPABASE_TRUNCATE_RPC", "truncate_vector_table").strip("'\"")
+
+def count_rows(table):
+    """Exact row count of a table (one HEAD-style request)."""
+    result = supabase.table(table).select("id", count="exact").limit(0).execute()
+    return result.count if hasattr(result, 'count') and result.count is not None else len(result.data or [])
+
+def _tables_for(table_name=None, language=None):
+    if table_name:
+        return [(table_name, table_name)]
+    if language == "ar":
+        return [("Arabic", ARABIC_SUPABASE_TABLE_NAME)]
+    if language == "both":
+        return [("English", SUPABASE_TABLE_NAME), ("Arabic", ARABIC_SUPABASE_TABLE_NAME)]
+    # Default to English for backward compatibility
+    return [("English", SUPABASE_TABLE_NAME)]
+
+def _delete_in_chunks(table):
+    """Page through ids and delete them with chunked IN filters; returns rows deleted."""
+    deleted_count = 0
+    while True:
+        # Always read the first page: everything before it has been deleted
+        result = supabase.table(table).select("id").limit(PAGE_SIZE).execute()
+        ids = [row["id"] for row in result.data or []]
+        if not ids:
+            return deleted_count
+        deleted_this_pass = 0
+        for i in range(0, len(ids), DELETE_CHUNK_SIZE):
+            chunk = ids[i:i + DELETE_CHUNK_SIZE]
+            # DELETE returns the rows it removed
+            response = supabase.table(table).delete().in_("id", chunk).execute()
+            deleted_this_pass += len(response.data or [])
+        if deleted_this_pass == 0:
+            # Re-reading the same page would loop forever
+            raise RuntimeError(
+                f"DELETE on {table} removed none of {len(ids)} rows; row level security is "
+                "probably blocking it (use the service role key as SUPABASE_KEY)"
+            )
+        deleted_count += deleted_this_pass
+        print(f"🗑️ Deleted {deleted_count} documents so far from {table}")
+
+def _truncate(table):
+    """Truncate via the RPC; False when the RPC does not allow this table name."""
+    try:
+        supabase.rpc(TRUNCATE_RPC, {"target_table": table}).execute()
+        return True
+    except Exception as e:
+        if "is not a vector table" not in str(e):
+            raise
+    # The RPC only allows the default table names (see supabase_schema.sql)
+    print(f"⚠️ {TRUNCATE_RPC} does not allow {table}; falling back to chunked deletes")
+    return False
+
+def clear_supabase_table(table_name=None, language=None, dry_run=False, truncate=False):
     """Clear all documents from the Supabase vector table
 
     Args:
         table_name: Specific table name to clear (overrides language parameter)
         language: 'en' for English, 'ar' for Arabic, 'both' for both tables
+        dry_run: Only report how many rows would be deleted
+        truncate: Use the truncate RPC (one request per table) instead of chunked deletes
     """
-    # Determine which tables to clear
-    if table_name:
-        tables_to_clear = [(table_name, table_name)]
-    elif language == "ar":
-        tables_to_clear = [("Arabic", ARABIC_SUPABASE_TABLE_NAME)]
-    elif language == "both":
-        tables_to_clear = [("English", SUPABASE_TABLE_NAME), ("Arabic", ARABIC_SUPABASE_TABLE_NAME)]
-    else:  # Default to English for backward compatibility
-        tables_to_clear = [("English", SUPABASE_TABLE_NAME)]
-
     overall_success = True
 
-    for table_label, table in tables_to_clear:
+    for table_label, table in _tables_for(table_name, language):
         print(f"\n🧹 Clearing {table_label} table ({table})...")
         try:
-            # First, get all document IDs
-            result = supabase.table(table).select("id").execute()
-
-            if not result.data:
+            count = count_rows(table)
+            if count == 0:
                 print(f"ℹ️ {table_label} table is already empty")
                 continue
+            if dry_run:
+                print(f"🔎 Dry run: would delete {count} documents from {table_label} table")
+                continue
 
-            # Delete each document by its ID
-            deleted_count = 0
-            for doc in result.data:
-                try:
-                    doc_id = doc['id']
-                    supabase.table(table).delete().eq("id", doc_id).execute()
-                    deleted_count += 1
-                    print(f"🗑️ Deleted document {doc_id} from {table_label} table")
-                except Exception as e:
-                    print(f"⚠️ Failed to delete document {doc_id} from {table_label} table: {e}")
-
+            if truncate and _truncate(table):
+                print(f"✅ Truncated {table_label} table ({count} documents)")
+                continue
+            deleted_count = _delete_in_chunks(table)
             print(f"✅ Successfully deleted {deleted_count} documents from {table_label} table")
 
         except Exception as e:
@@ -72,18 +116,10 @@ def check_table_status(language=None):
     Args:
         language: 'en' for English, 'ar' for Arabic, 'both' for both tables
     """
-    if language == "ar":
-        tables_to_check = [("Arabic", ARABIC_SUPABASE_TABLE_NAME)]
-    elif language == "both":
-        tables_to_check = [("English", SUPABASE_TABLE_NAME), ("Arabic", ARABIC_SUPABASE_TABLE_NAME)]
-    else:  # Default to English
-        tables_to_check = [("English", SUPABASE_TABLE_NAME)]
-
     total_count = 0
-    for table_label, table in tables_to_check:
+    for table_label, table in _tables_for(language=language):
         try:
-            result = supabase.table(table).select("id", count="exact").limit(0).execute()
-            count = result.count if hasattr(result, 'count') else len(result.data or [])
+            count = count_rows(table)
             print(f"📊 {table_label} table ({table}) document count: {count}")
             total_count += count
         except Exception as e:
@@ -96,8 +132,13 @@ def check_table_status(language=None):
 
 if __name__ == "__main__":
     # Parse command line arguments
-    if len(sys.argv) > 1:
-        arg = sys.argv[1].lower()
+    args = [a.lower() for a in sys.argv[1:]]
+    dry_run = "--dry-run" in args
+    truncate = "--truncate" in args
+    args = [a for a in args if a not in ("--dry-run", "--truncate")]
+
+    if args:
+        arg = args[0]
         if arg in ["--arabic", "-ar", "arabic", "ar"]:
             language = "ar"
         elif arg in ["--both", "-b", "both", "all"]:
@@ -105,10 +146,12 @@ if __name__ == "__main__":
         elif arg in ["--english", "-en", "english", "en"]:
             language = "en"
         else:
-            print("Usage: python clear_supabase.py [--english|--arabic|--both]")
+            print("Usage: python clear_supabase.py [--english|--arabic|--both] [--dry-run] [--truncate]")
             print("  --english, -en: Clear English documents table")
             print("  --arabic, -ar: Clear Arabic documents table")
             print("  --both, -b: Clear both tables")
+            print("  --dry-run: Only report how many documents would be deleted")
+            print("  --truncate: Truncate via RPC (see supabase_schema.sql) instead of chunked deletes")
             print("  (default: English table)")
             sys.exit(1)
     else:
@@ -121,7 +164,10 @@ if __name__ == "__main__":
 
     if current_count > 0:
         # Clear the table(s)
-        if clear_supabase_table(language=language):
+        if clear_supabase_table(language=language, dry_run=dry_run, truncate=truncate):
+            if dry_run:
+                print("\n🔎 Dry run complete, nothing was deleted")
+                sys.exit(0)
             print("\n✅ Database cleared successfully!")
             # Verify it's empty
             new_count = check_table_status(language)
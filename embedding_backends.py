@@ -0,0 +1,89 @@
+"""
+Selectable embedding backends for CPU-only serving.
+
+• ``torch``      – the float PyTorch model (default)
+• ``onnx``       – the same weights exported to ONNX Runtime
+• ``onnx-int8``  – ONNX Runtime with int8 dynamic quantization; the
+                   quantized model is exported once into a local cache
+                   directory and reused by every later start
+
+The ONNX backends need ``sentence-transformers[onnx]`` >= 3.2 (optimum +
+onnxruntime; older releases have no ``backend=`` argument). Use verify_embedding_backend.py to check that top-1 FAQ
+retrieval still matches the float model before switching.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from importlib.metadata import PackageNotFoundError, version
+from typing import Tuple
+
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Instruction-set presets understood by export_dynamic_quantized_onnx_model
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+# First sentence-transformers release with backend="onnx" and export_dynamic_quantized_onnx_model
+ONNX_MIN_SENTENCE_TRANSFORMERS = (3, 2)
+
+ONNX_CACHE_DIR = Path(
+    os.getenv("EMBEDDING_ONNX_CACHE_DIR", str(Path(__file__).resolve().parent / ".cache" / "onnx"))
+)
+
+
+def require_onnx_support() -> None:
+    """Raise a clear error when the installed sentence-transformers cannot run ONNX."""
+    try:
+        installed = version("sentence-transformers")
+    except PackageNotFoundError:
+        installed = None
+    parts = tuple(int(p) for p in re.findall(r"\d+", installed or "")[:2])
+    if installed is None or parts < ONNX_MIN_SENTENCE_TRANSFORMERS:
+        raise RuntimeError(
+            f"The ONNX embedding backends need sentence-transformers[onnx]>="
+            f"{'.'.join(map(str, ONNX_MIN_SENTENCE_TRANSFORMERS))} (installed: {installed or 'none'}); "
+            f"upgrade it or set EMBEDDING_BACKEND=torch"
+        )
+
+
+def quantized_model_path(model_name: str, quantization_config: str) -> Tuple[Path, str]:
+    """Local directory of the exported model and the quantized file inside it."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+    return ONNX_CACHE_DIR / slug, f"onnx/model_qint8_{quantization_config}.onnx"
+
+
+def ensure_quantized_onnx_model(model_name: str, quantization_config: str = "avx2") -> Tuple[Path, str]:
+    """Export + int8-quantize the model once; returns (model dir, onnx file name)."""
+    if quantization_config not in QUANTIZATION_CONFIGS:
+        raise ValueError(f"Unknown quantization config {quantization_config!r}; use one of {QUANTIZATION_CONFIGS}")
+    model_dir, file_name = quantized_model_path(model_name, quantization_config)
+    if (model_dir / file_name).exists():
+        return model_dir, file_name
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    print(f"Exporting int8 ONNX model for {model_name} ({quantization_config}) to {model_dir}...")
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save_pretrained(str(model_dir))
+    export_dynamic_quantized_onnx_model(model, quantization_config, str(model_dir))
+    return model_dir, file_name
+
+
+def create_base_embeddings(model_name: str, backend: str = "torch", quantization_config: str = "avx2") -> HuggingFaceEmbeddings:
+    """Build the LangChain embedding model for the selected backend."""
+    if backend == "torch":
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend in ("onnx", "onnx-int8"):
+        require_onnx_support()
+    if backend == "onnx":
+        return HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"backend": "onnx"})
+    if backend == "onnx-int8":
+        model_dir, file_name = ensure_quantized_onnx_model(model_name, quantization_config)
+        return HuggingFaceEmbeddings(
+            model_name=str(model_dir),
+            model_kwargs={"backend": "onnx", "model_kwargs": {"file_name": file_name}},
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; use one of {EMBEDDING_BACKENDS}")
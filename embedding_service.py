@@ -0,0 +1,160 @@
+"""
+Embedding service shared by retrieval and ingestion.
+
+Wraps a LangChain embedding model with:
+
+• an LRU cache from text to vector
+• a micro-batcher that merges concurrent async queries arriving within a
+  short window into a single ``embed_documents`` call
+• a bounded worker pool so encoding never runs on the event loop
+
+It implements the LangChain ``Embeddings`` interface, so it can be handed
+directly to ``SupabaseVectorStore``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from observability import log
+
+
+class EmbeddingService(Embeddings):
+    """Cached, micro-batched front end for an embedding model."""
+
+    def __init__(
+        self,
+        model: Embeddings,
+        cache_size: int = 4096,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        max_workers: int = 2,
+    ):
+        self.model = model
+        self.cache_size = cache_size
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.batches = 0
+        self._cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding")
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks; these are held until done
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    # -------------------------------
+    # Cache
+    # -------------------------------
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(text)
+            self.cache_hits += 1
+            return list(vector)
+
+    def _cache_put(self, text: str, vector: List[float]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[text] = tuple(vector)
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -------------------------------
+    # Synchronous interface
+    # -------------------------------
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode unique texts in one model call and cache the results."""
+        unique = list(dict.fromkeys(texts))
+        vectors = self.model.embed_documents(unique)
+        self.batches += 1
+        by_text: Dict[str, List[float]] = {}
+        for text, vector in zip(unique, vectors):
+            vector = [float(x) for x in vector]
+            self._cache_put(text, vector)
+            by_text[text] = vector
+        return [by_text[text] for text in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        results: List[Optional[List[float]]] = [self._cache_get(t) for t in texts]
+        missing = [t for t, vector in zip(texts, results) if vector is None]
+        if missing:
+            encoded = iter(self._encode(missing))
+            results = [vector if vector is not None else next(encoded) for vector in results]
+        return results  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    # -------------------------------
+    # Async interface (micro-batched)
+    # -------------------------------
+    async def aembed_query(self, text: str) -> List[float]:
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush, loop)
+        return await future
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.embed_documents, texts)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(lambda done: self._batch_done(done, batch))
+
+    def _batch_done(self, task: asyncio.Task, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Release the task; if it died unexpectedly, report it and fail its waiters."""
+        self._batch_tasks.discard(task)
+        if task.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+        error = task.exception()
+        if error is None:
+            return
+        log.error(f"Embedding batch of {len(batch)} texts failed: {error!r}")
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _ in batch]
+        try:
+            vectors = await loop.run_in_executor(self._executor, self._encode, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
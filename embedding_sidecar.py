@@ -0,0 +1,170 @@
+"""
+Local embedding sidecar shared by all uvicorn workers on a node.
+
+One process loads the embedding model (any EMBEDDING_BACKEND) and serves
+encode requests over a Unix socket, so N workers share one copy of the
+weights. Requests from different workers land in the same micro-batcher
+and LRU cache (EmbeddingService).
+
+Protocol: one JSON object per line in each direction.
+    -> {"op": "embed", "texts": [...]}     <- {"vectors": [[...], ...]}
+    -> {"op": "info"}                      <- {"model": ..., "backend": ..., "dimension": ...}
+    errors                                 <- {"error": "..."}
+
+Usage:
+    python embedding_sidecar.py --socket /run/tijarah360/embeddings.sock
+    EMBEDDING_SIDECAR_SOCKET=/run/tijarah360/embeddings.sock uvicorn main:app --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+from typing import Any, Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+# Large enough for a full ingestion batch of FAQ texts / vectors on one line
+STREAM_LIMIT = 64 * 1024 * 1024
+SIDECAR_TIMEOUT = float(os.getenv("EMBEDDING_SIDECAR_TIMEOUT", "30"))
+
+
+# -------------------------------
+# Client (used inside the API workers)
+# -------------------------------
+class SidecarEmbeddings(Embeddings):
+    """LangChain Embeddings that forwards encode calls to the sidecar."""
+
+    def __init__(self, socket_path: str, timeout: float = SIDECAR_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+                stream.flush()
+                line = stream.readline()
+        if not line:
+            raise ConnectionError(f"Embedding sidecar at {self.socket_path} closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(f"Embedding sidecar error: {response['error']}")
+        return response
+
+    def info(self) -> Dict[str, Any]:
+        return self._call({"op": "info"})
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._call({"op": "embed", "texts": list(texts)})["vectors"]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# -------------------------------
+# Server
+# -------------------------------
+class SidecarServer:
+    def __init__(self, embeddings, info: Dict[str, Any]):
+        self.embeddings = embeddings
+        self.info = info
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(json.dumps(await self.respond(line)).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes) -> Dict[str, Any]:
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            op = request.get("op")
+            if op == "info":
+                return self.info
+            if op == "embed":
+                texts = request.get("texts") or []
+                if len(texts) == 1:
+                    # Single queries from concurrent workers share one batch
+                    return {"vectors": [await self.embeddings.aembed_query(texts[0])]}
+                return {"vectors": await self.embeddings.aembed_documents(texts)}
+            return {"error": f"unknown op {op!r}"}
+        except Exception as e:
+            return {"error": str(e)}
+
+
+async def serve(socket_path: str) -> None:
+    # Local import: the server needs the model config, workers only need the client
+    from langchain_chain import (
+        EMBEDDING_BACKEND,
+        EMBEDDING_MODEL_NAME,
+        EMBEDDING_ONNX_QUANTIZATION,
+        EMBEDDING_BATCH_WINDOW_MS,
+        EMBEDDING_CACHE_SIZE,
+        EMBEDDING_MAX_BATCH_SIZE,
+        EMBEDDING_MAX_WORKERS,
+    )
+    from embedding_backends import create_base_embeddings
+    from embedding_service import EmbeddingService
+
+    print(f"Loading {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND})...")
+    embeddings = EmbeddingService(
+        create_base_embeddings(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_ONNX_QUANTIZATION),
+        cache_size=EMBEDDING_CACHE_SIZE,
+        batch_window_ms=EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+        max_workers=EMBEDDING_MAX_WORKERS,
+    )
+    info = {
+        "model": EMBEDDING_MODEL_NAME,
+        "backend": EMBEDDING_BACKEND,
+        "dimension": len(embeddings.embed_query("warm-up")),
+    }
+    server = SidecarServer(embeddings, info)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    unix_server = await asyncio.start_unix_server(server.handle, path=socket_path, limit=STREAM_LIMIT)
+    os.chmod(socket_path, 0o660)
+    print(f"✅ Embedding sidecar listening on {socket_path} (dimension {info['dimension']})")
+    try:
+        async with unix_server:
+            await unix_server.serve_forever()
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the embedding model to local workers over a Unix socket.")
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("EMBEDDING_SIDECAR_SOCKET", "/tmp/tijarah360-embeddings.sock"),
+        help="Unix socket path (default: $EMBEDDING_SIDECAR_SOCKET)",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Bilingual FAQ answers keyed by FAQ ID.
+
+Vector hits carry the FAQ ID of the matched row, so the stored English or
+Arabic answer can be returned directly instead of translating the matched
+text at request time. Answers come from the ``faqs`` table (see
+supabase_schema.sql), with ``faq_data.csv`` + ``faq_data_ar.json`` as the
+local fallback.
+
+The two files do not share IDs: each Arabic record names the English FAQ it
+translates in ``en_id`` (null for Arabic-only entries), and a record is only
+paired when that mapping checks out (see pair_arabic_records). An English FAQ
+without a confirmed Arabic answer has none here, so callers translate it.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from langchain.schema import Document
+
+BASE_DIR = Path(__file__).resolve().parent
+FAQ_CSV_PATH = BASE_DIR / "faq_data.csv"
+FAQ_AR_JSON_PATH = BASE_DIR / "faq_data_ar.json"
+
+PAGE_SIZE = 1000
+
+# CSVLoader rows look like "ID: 12\nQuestion: ...\nAnswer: ..." (result.csv keeps its BOM)
+# Only a whole-line number counts: sheet rows without an ID use "sheet:<hash>"
+_ID_LINE_RE = re.compile(r"^\ufeff?ID:[ \t]*(\d+)[ \t\r]*$", re.MULTILINE)
+_QUESTION_LINE_RE = re.compile(r"^Question:[ \t]*(.+)$", re.MULTILINE)
+# Brand names, acronyms and numbers are kept as is by the translations
+_LATIN_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def faq_id_from_document(doc: Document) -> Optional[int]:
+    """Return the FAQ ID a vector-store document was built from, if known."""
+    for key in ("faq_id", "id", "ID"):
+        value = (doc.metadata or {}).get(key)
+        if value not in (None, ""):
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                pass
+    match = _ID_LINE_RE.search(doc.page_content or "")
+    return int(match.group(1)) if match else None
+
+
+def question_from_document(doc: Document) -> Optional[str]:
+    """Return the FAQ question a vector-store document was built from, if present."""
+    match = _QUESTION_LINE_RE.search(doc.page_content or "")
+    return match.group(1).strip() if match else None
+
+
+def pairing_conflict(question_en: str, question_ar: str) -> Optional[str]:
+    """Why an Arabic question cannot be the translation of an English one, or None."""
+    english = {token.lower() for token in _LATIN_TOKEN_RE.findall(question_en or "")}
+    missing = [t for t in _LATIN_TOKEN_RE.findall(question_ar or "") if t.lower() not in english]
+    return f"{', '.join(missing)} not in the English question" if missing else None
+
+
+def pair_arabic_records(
+    questions_en: Mapping[int, str], records: Iterable[Mapping[str, Any]]
+) -> Dict[int, Dict[str, str]]:
+    """
+    English FAQ ID -> Arabic record, for records whose ``en_id`` mapping checks out.
+
+    A record is skipped (and reported) when it has no ``en_id`` key, names an
+    unknown English FAQ, repeats one already paired, or mentions names or
+    numbers the English question does not. ``en_id: null`` marks an
+    Arabic-only entry and is skipped silently.
+    """
+    paired: Dict[int, Dict[str, str]] = {}
+    problems: List[str] = []
+    for record in records:
+        if "en_id" not in record:
+            problems.append(f"{record.get('id')}: no en_id")
+            continue
+        if record["en_id"] is None:
+            continue
+        en_id = int(record["en_id"])
+        if en_id not in questions_en:
+            problems.append(f"{record.get('id')}: unknown en_id {en_id}")
+        elif en_id in paired:
+            problems.append(f"{record.get('id')}: en_id {en_id} already paired")
+        else:
+            conflict = pairing_conflict(questions_en[en_id], record.get("question_ar") or "")
+            if conflict:
+                problems.append(f"{record.get('id')} -> {en_id}: {conflict}")
+            else:
+                paired[en_id] = {
+                    "question_ar": record.get("question_ar") or "",
+                    "answer_ar": record.get("answer_ar") or "",
+                }
+    if problems:
+        print(f"⚠️ {len(problems)} Arabic FAQ records left unpaired: {'; '.join(problems)}")
+    return paired
+
+
+class FaqStore:
+    """In-memory map of FAQ ID -> question/answer in both languages."""
+
+    def __init__(self):
+        self._by_id: Dict[int, Dict[str, str]] = {}
+        self._by_question: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+        self.source: Optional[str] = None
+        # Confirmed Arabic question/answer per English FAQ ID, from the local files
+        self._file_arabic: Dict[int, Dict[str, str]] = {}
+        # Arabic record ID (the key of the Arabic vector table) -> English FAQ ID
+        self._english_ids: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, faq_id: Optional[int]) -> Optional[Dict[str, str]]:
+        if faq_id is None:
+            return None
+        return self._by_id.get(faq_id)
+
+    def questions(self) -> Iterable[Tuple[str, int, str]]:
+        """(lang, faq_id, question) for every stored question in both languages."""
+        for faq_id, row in self._by_id.items():
+            for lang in ("en", "ar"):
+                if row.get(f"question_{lang}"):
+                    yield lang, faq_id, row[f"question_{lang}"]
+
+    def english_id(self, faq_id: Optional[int], lang: str) -> Optional[int]:
+        """
+        Store key for an ID read from a language table.
+
+        The Arabic table is keyed by Arabic record ID (result.csv,
+        faq_data_ar.json), which only maps to an English FAQ through a
+        confirmed ``en_id`` pairing; Arabic-only records map to None.
+        """
+        if faq_id is None or lang != "ar":
+            return faq_id
+        return self._english_ids.get(faq_id)
+
+    def answer_for(self, faq_id: Optional[int], lang: str) -> Optional[str]:
+        """Stored answer in the requested language, or None if it is missing."""
+        row = self.get(faq_id)
+        if not row:
+            return None
+        return row.get("answer_ar" if lang == "ar" else "answer_en") or None
+
+    def find_by_question(self, query_key: str, normalizer: Callable[[str], str]) -> Optional[int]:
+        """FAQ ID whose EN or AR question normalizes to query_key (exact keyword hit)."""
+        index = self._by_question
+        if index is None:
+            index = {}
+            for faq_id, row in self._by_id.items():
+                for field_name in ("question_en", "question_ar"):
+                    if row.get(field_name):
+                        index.setdefault(normalizer(row[field_name]), faq_id)
+            self._by_question = index
+        return index.get(query_key)
+
+    def _replace(self, rows: Iterable[Dict[str, str]], source: str) -> int:
+        by_id = {int(row["id"]): row for row in rows}
+        with self._lock:
+            self._by_id = by_id
+            self._by_question = None
+            self.source = source
+        return len(by_id)
+
+    def load_files(self, csv_path: Path = FAQ_CSV_PATH, ar_json_path: Path = FAQ_AR_JSON_PATH) -> int:
+        """Merge the English CSV with the Arabic records paired to it by ``en_id``."""
+        rows: Dict[int, Dict[str, str]] = {}
+        with open(csv_path, encoding="utf-8-sig", newline="") as fh:
+            for record in csv.DictReader(fh):
+                faq_id = int(record["ID"])
+                rows[faq_id] = {
+                    "id": faq_id,
+                    "question_en": record.get("Question") or "",
+                    "answer_en": record.get("Answer") or "",
+                    "question_ar": "",
+                    "answer_ar": "",
+                }
+        with open(ar_json_path, encoding="utf-8") as fh:
+            records = json.load(fh)
+        arabic = pair_arabic_records({i: r["question_en"] for i, r in rows.items()}, records)
+        for faq_id, fields in arabic.items():
+            rows[faq_id].update(fields)
+        self._file_arabic = arabic
+        self._english_ids = {
+            int(record["id"]): int(record["en_id"])
+            for record in records
+            if record.get("en_id") is not None
+            and arabic.get(int(record["en_id"]), {}).get("question_ar") == (record.get("question_ar") or "")
+        }
+        return self._replace(rows.values(), source="files")
+
+    def load_table(self, client, table_name: str = "faqs") -> int:
+        """Load every row of the bilingual ``faqs`` table."""
+        rows = []
+        start = 0
+        while True:
+            resp = (
+                client.table(table_name)
+                .select("id, question_en, answer_en, question_ar, answer_ar")
+                .order("id")
+                .range(start, start + PAGE_SIZE - 1)
+                .execute()
+            )
+            page = resp.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        if not rows:
+            return 0
+        # Rows seeded before the files were paired by en_id can hold another
+        # FAQ's Arabic text; the confirmed pairing wins
+        stale = []
+        for row in rows:
+            confirmed = self._file_arabic.get(int(row["id"]))
+            if confirmed and row.get("question_ar") != confirmed["question_ar"]:
+                row.update(confirmed)
+                stale.append(str(row["id"]))
+        if stale:
+            print(f"⚠️ {table_name}: Arabic text of {len(stale)} FAQs replaced by the paired files "
+                  f"(re-run `python ingestion.py --faqs`): {', '.join(stale)}")
+        return self._replace(rows, source=table_name)
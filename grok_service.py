@@ -2,22 +2,31 @@ import os
 from groq import Groq
 from dotenv import load_dotenv
 
+import http_pool
+from resources import registry
+
 # Load variables from .env file
 load_dotenv()
 
 # Read GROQ API key strictly from environment
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
-    raise RuntimeError(
-        "GROQ_API_KEY is not set. Please define it in your environment or .env file."
-    )
 
-# Initialize Groq client
-client = Groq(api_key=GROQ_API_KEY)
+# Initialize Groq client on first use
+def _create_client() -> Groq:
+    if not GROQ_API_KEY:
+        raise RuntimeError(
+            "GROQ_API_KEY is not set. Please define it in your environment or .env file."
+        )
+    return Groq(api_key=GROQ_API_KEY, http_client=http_pool.get_sync_client("groq"))
+
+registry.register("groq_client", _create_client, warm=False)
+
+def get_client() -> Groq:
+    return registry.get("groq_client")
 
 def get_groq_response(prompt: str) -> str:
     try:
-        completion = client.chat.completions.create(
+        completion = get_client().chat.completions.create(
             model="llama3-70b-8192",
             messages=[
                 {
@@ -0,0 +1,296 @@
+"""
+Shared outbound HTTP layer for every upstream the backend talks to.
+
+Each upstream (supabase, groq, translate, sheets) gets one pooled,
+keep-alive client per process with its own policy:
+
+• connection pool size and keep-alive expiry, so TLS handshakes happen once
+  per connection instead of once per request
+• HTTP/2 when the ``h2`` package is installed (all our upstreams speak it)
+• a cap on in-flight requests
+• connect / read timeouts
+• retry with exponential backoff + jitter: connection failures are always
+  retried (the request never reached the server), retryable statuses only
+  for methods the policy marks as safe to repeat; Retry-After is honoured
+
+Policies can be tuned per upstream from the environment, e.g.
+HTTP_TRANSLATE_TIMEOUT=10, HTTP_SUPABASE_MAX_CONNECTIONS=100,
+HTTP_GROQ_RETRIES=0.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Errors raised before the request reached the server; always safe to retry
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+MAX_RETRY_AFTER = 10.0
+
+
+@dataclass(frozen=True)
+class UpstreamPolicy:
+    name: str
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    timeout: float = 30.0
+    retries: int = 2
+    backoff: float = 0.2
+    retry_statuses: FrozenSet[int] = frozenset({429, 502, 503, 504})
+    retry_methods: FrozenSet[str] = IDEMPOTENT_METHODS
+    http2: bool = True
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+        base = self.backoff * (2 ** (attempt - 1))
+        return base + random.uniform(0, base)
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeouts(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+def _env_policy(policy: UpstreamPolicy) -> UpstreamPolicy:
+    """Apply HTTP_<NAME>_<FIELD> overrides from the environment."""
+    prefix = f"HTTP_{policy.name.upper()}_"
+    overrides = {}
+    for field_name, cast in (
+        ("max_connections", int),
+        ("max_keepalive", int),
+        ("keepalive_expiry", float),
+        ("connect_timeout", float),
+        ("timeout", float),
+        ("retries", int),
+        ("backoff", float),
+    ):
+        value = os.getenv(prefix + field_name.upper())
+        if value:
+            overrides[field_name] = cast(value)
+    http2 = os.getenv(prefix + "HTTP2")
+    if http2:
+        overrides["http2"] = http2.lower() in {"1", "true", "yes"}
+    return replace(policy, **overrides)
+
+
+POLICIES: Dict[str, UpstreamPolicy] = {
+    policy.name: _env_policy(policy)
+    for policy in (
+        # PostgREST writes are upserts / deletes by id, so POST is safe to repeat
+        UpstreamPolicy("supabase", max_connections=50, max_keepalive=20, timeout=30.0,
+                       retry_methods=IDEMPOTENT_METHODS | {"POST", "PATCH"}),
+        # The Groq SDK already retries 429/5xx itself; we only retry connection failures
+        UpstreamPolicy("groq", max_connections=20, timeout=60.0, retry_statuses=frozenset()),
+        # 403 means a dead key or exhausted quota: the translation circuit breaker
+        # handles it; a 429 rate limit is retried after its Retry-After
+        UpstreamPolicy("translate", max_connections=10, timeout=float(os.getenv("TRANSLATE_TIMEOUT", "15")),
+                       retries=1, retry_statuses=frozenset({429, 500, 502, 503, 504}),
+                       retry_methods=IDEMPOTENT_METHODS | {"POST"}),
+        UpstreamPolicy("sheets", max_connections=4, timeout=30.0),
+    )
+}
+
+
+def get_policy(name: str) -> UpstreamPolicy:
+    return POLICIES.get(name) or _env_policy(UpstreamPolicy(name))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _should_retry_status(policy: UpstreamPolicy, request: httpx.Request, response: httpx.Response) -> bool:
+    return response.status_code in policy.retry_statuses and request.method in policy.retry_methods
+
+
+# -------------------------------
+# Transports
+# -------------------------------
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Concurrency cap + retry policy around a pooled transport."""
+
+    def __init__(self, policy: UpstreamPolicy):
+        self.policy = policy
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _pool(self) -> Tuple[httpx.AsyncHTTPTransport, asyncio.Semaphore]:
+        # Pooled connections and the semaphore belong to the loop that made
+        # them; another loop (asyncio.run per blocking call) gets its own
+        loop = asyncio.get_running_loop()
+        if self._transport is None or loop is not self._loop:
+            self._loop = loop
+            self._transport = httpx.AsyncHTTPTransport(
+                http2=self.policy.http2 and HTTP2_AVAILABLE,
+                limits=self.policy.limits(),
+            )
+            self._semaphore = asyncio.Semaphore(self.policy.max_connections)
+        return self._transport, self._semaphore
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport, semaphore = self._pool()
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_after = None
+            try:
+                async with semaphore:
+                    response = await transport.handle_async_request(request)
+            except CONNECT_ERRORS:
+                if attempt > self.policy.retries:
+                    raise
+            except httpx.TransportError:
+                if attempt > self.policy.retries or request.method not in self.policy.retry_methods:
+                    raise
+            else:
+                if attempt > self.policy.retries or not _should_retry_status(self.policy, request, response):
+                    return response
+                retry_after = _retry_after(response)
+                await response.aclose()
+            await asyncio.sleep(self.policy.delay(attempt, retry_after))
+
+    async def aclose(self) -> None:
+        """Close the current loop's connections; the next request opens a new pool."""
+        transport, self._transport, self._loop = self._transport, None, None
+        if transport is not None:
+            await transport.aclose()
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Blocking counterpart of AsyncRetryTransport."""
+
+    def __init__(self, policy: UpstreamPolicy):
+        self.policy = policy
+        self._transport = httpx.HTTPTransport(
+            http2=policy.http2 and HTTP2_AVAILABLE,
+            limits=policy.limits(),
+        )
+        self._semaphore = threading.BoundedSemaphore(policy.max_connections)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            retry_after = None
+            try:
+                with self._semaphore:
+                    response = self._transport.handle_request(request)
+            except CONNECT_ERRORS:
+                if attempt > self.policy.retries:
+                    raise
+            except httpx.TransportError:
+                if attempt > self.policy.retries or request.method not in self.policy.retry_methods:
+                    raise
+            else:
+                if attempt > self.policy.retries or not _should_retry_status(self.policy, request, response):
+                    return response
+                retry_after = _retry_after(response)
+                response.close()
+            time.sleep(self.policy.delay(attempt, retry_after))
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+# -------------------------------
+# Shared clients
+# -------------------------------
+_sync_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_async_transports: Dict[str, AsyncRetryTransport] = {}
+_lock = threading.Lock()
+
+
+def get_sync_client(name: str) -> httpx.Client:
+    """Process-wide pooled client for a blocking integration."""
+    with _lock:
+        client = _sync_clients.get(name)
+        if client is None or client.is_closed:
+            policy = get_policy(name)
+            client = httpx.Client(transport=RetryTransport(policy), timeout=policy.timeouts())
+            _sync_clients[name] = client
+        return client
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    """Pooled async client; connections are per event loop (see AsyncRetryTransport)."""
+    with _lock:
+        client = _async_clients.get(name)
+        if client is None or client.is_closed:
+            policy = get_policy(name)
+            transport = AsyncRetryTransport(policy)
+            client = httpx.AsyncClient(transport=transport, timeout=policy.timeouts())
+            _async_clients[name] = client
+            _async_transports[name] = transport
+        return client
+
+
+async def aclose_async_clients(exclude: Iterable[str] = ()) -> None:
+    """Close pooled async clients (all but ``exclude``) so the next loop starts fresh."""
+    skip = set(exclude)
+    with _lock:
+        closing: Tuple[Tuple[str, httpx.AsyncClient], ...] = tuple(
+            (name, client) for name, client in _async_clients.items() if name not in skip
+        )
+        for name, _ in closing:
+            del _async_clients[name]
+            _async_transports.pop(name, None)
+    for _, client in closing:
+        await client.aclose()
+
+
+async def arelease_async_connections(names: Iterable[str]) -> None:
+    """
+    Close the connections of clients that are kept across event loops (the
+    Groq client is held by the LLM) without closing the clients themselves.
+    """
+    with _lock:
+        transports = [_async_transports[name] for name in names if name in _async_transports]
+    for transport in transports:
+        await transport.aclose()
+
+
+def requests_session(name: str, session=None):
+    """
+    Tune a ``requests`` session (for libraries that need one, e.g. gspread)
+    with the upstream's pool size and retry policy.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    policy = get_policy(name)
+    session = session or requests.Session()
+    retry = Retry(
+        total=policy.retries,
+        backoff_factor=policy.backoff,
+        status_forcelist=sorted(policy.retry_statuses),
+        allowed_methods=sorted(policy.retry_methods),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=policy.max_connections, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,58 @@
+"""
+Helpers for hybrid (lexical + vector) FAQ retrieval.
+
+Lexical hits come from the ``search_faqs`` RPC, which runs on the GIN
+full-text index over ``faqs`` (see supabase_schema.sql). Vector hits come
+from the embedding index. The two ranked lists are merged with reciprocal
+rank fusion; a short query with a dominant lexical hit is answered without
+running the embedding model at all.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+# Standard RRF damping constant (Cormack et al.)
+RRF_K = 60
+
+
+@dataclass
+class LexicalHit:
+    faq_id: int
+    rank: float
+    row: Dict[str, Any] = field(default_factory=dict)
+
+    def answer(self, lang: str) -> str:
+        return self.row.get("answer_ar" if lang == "ar" else "answer_en") or ""
+
+
+def lexical_hits_from_rows(rows: Sequence[Dict[str, Any]]) -> List[LexicalHit]:
+    return [
+        LexicalHit(faq_id=int(row["id"]), rank=float(row.get("rank") or 0.0), row=dict(row))
+        for row in rows
+    ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K) -> List[Tuple[Hashable, float]]:
+    """Merge ranked lists of keys; returns (key, fused score), best first."""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for position, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + position + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def is_confident_lexical(query_tokens: Sequence[str], hits: Sequence[LexicalHit], max_tokens: int = 3, dominance: float = 2.0) -> bool:
+    """
+    True when a keyword-style query has a clear lexical winner.
+
+    Only short queries qualify (long questions are paraphrases, where vectors
+    do better); the top hit must be the only hit or outrank the runner-up by
+    the dominance factor.
+    """
+    if not hits or not query_tokens or len(query_tokens) > max_tokens:
+        return False
+    if len(hits) == 1:
+        return True
+    return hits[0].rank >= dominance * max(hits[1].rank, 1e-9)
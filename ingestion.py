@@ -0,0 +1,397 @@
+"""
+Incremental, idempotent ingestion of FAQ rows into the vector tables.
+
+Each source row is keyed by its FAQ ID and fingerprinted with a hash of its
+content and the embedding model + backend (row_hash), so switching
+EMBEDDING_MODEL or EMBEDDING_BACKEND re-embeds every row. A sync:
+
+1. reads the FAQ ID -> (row id, hash) map already stored in the table
+2. embeds only rows that are new or whose content changed, in batches
+3. bulk-upserts them under a deterministic row id (uuid5 of table + FAQ ID)
+4. deletes rows whose FAQ ID no longer exists in the source
+
+Every row records the source that wrote it (``source_name`` in its
+metadata, e.g. "csv:faq_data.csv"), and step 4 only deletes rows of the
+source being synced, so a CSV sync never removes sheet rows (or the other
+way round). Rows without a FAQ ID, such as those added through
+/create-embedding, are never deleted.
+
+Running it twice is a no-op the second time.
+
+Usage:
+    python ingestion.py --en faq_data.csv --ar result.csv
+    python ingestion.py --sheet --lang en       # changed sheet rows only
+    python ingestion.py --sheet --lang en --full
+    python ingestion.py --faqs            # bilingual `faqs` table
+    python ingestion.py --en faq_data.csv --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from langchain.schema import Document
+
+from faq_store import FAQ_AR_JSON_PATH, FAQ_CSV_PATH, faq_id_from_document, pair_arabic_records
+from langchain_chain import (
+    FAQ_TABLE_NAME,
+    faq_store,
+    get_embeddings,
+    get_supabase,
+    embedding_model_id,
+    get_table_name_for_language,
+    normalize_arabic,
+    on_table_write,
+    sync_faq_suggestions,
+    translate_many_to_arabic,
+)
+
+EMBED_BATCH_SIZE = 64
+UPSERT_CHUNK_SIZE = 500
+DELETE_CHUNK_SIZE = 200
+PAGE_SIZE = 1000
+
+
+@dataclass
+class FaqRow:
+    faq_id: str
+    question: str
+    answer: str
+    tags: str = ""
+
+    def content(self) -> str:
+        # Same layout CSVLoader produced, so existing retrieval code keeps working
+        return f"ID: {self.faq_id}\nQuestion: {self.question}\nAnswer: {self.answer}\nTags: {self.tags}"
+
+
+@dataclass
+class SyncResult:
+    table: str
+    unchanged: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    dry_run: bool = False
+    changed_ids: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        prefix = "[dry run] " if self.dry_run else ""
+        return (
+            f"{prefix}{self.table}: {self.upserted} upserted, "
+            f"{self.deleted} deleted, {self.unchanged} unchanged"
+        )
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def row_hash(content: str) -> str:
+    """Fingerprint of a row as embedded: its content and the model that embeds it."""
+    return content_hash(f"{embedding_model_id()}\n{content}")
+
+
+def row_id_for(table_name: str, faq_id: str) -> str:
+    """Deterministic primary key so re-runs upsert instead of duplicating."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{table_name}/{faq_id}"))
+
+
+# -------------------------------
+# Sources
+# -------------------------------
+
+def rows_from_csv(csv_path: str) -> List[FaqRow]:
+    """Rows from faq_data.csv / result.csv (ID, Question, Answer, Tags)."""
+    with open(csv_path, encoding="utf-8-sig", newline="") as fh:
+        return [
+            FaqRow(
+                faq_id=str(record["ID"]).strip(),
+                question=(record.get("Question") or "").strip(),
+                answer=(record.get("Answer") or "").strip(),
+                tags=(record.get("Tags") or "").strip(),
+            )
+            for record in csv.DictReader(fh)
+            if (record.get("ID") or "").strip()
+        ]
+
+
+def rows_from_ar_json(json_path: str, questions_en: Mapping[int, str]) -> List[FaqRow]:
+    """Rows from faq_data_ar.json under the English FAQ ID each record is paired with (en_id)."""
+    with open(json_path, encoding="utf-8") as fh:
+        paired = pair_arabic_records(questions_en, json.load(fh))
+    return [
+        FaqRow(faq_id=str(en_id), question=fields["question_ar"], answer=fields["answer_ar"])
+        for en_id, fields in paired.items()
+    ]
+
+
+def rows_from_sheet_records(records: Iterable[Dict[str, Any]]) -> List[FaqRow]:
+    """
+    Rows from Google Sheet records; sheets without an ID column key on the
+    question ("sheet:<hash>", never numeric, so it cannot pass for a FAQ ID).
+    """
+    rows = []
+    for record in records:
+        question = (record.get("Question") or "").strip()
+        if not question:
+            continue
+        faq_id = str(record.get("ID") or "").strip() or f"sheet:{content_hash(question)[:16]}"
+        rows.append(FaqRow(
+            faq_id=faq_id,
+            question=question,
+            answer=(record.get("Answer") or "").strip(),
+            tags=(record.get("Tags") or "").strip(),
+        ))
+    return rows
+
+
+def rows_from_sheet() -> List[FaqRow]:
+    from sheets_service import get_sheet_data
+    return rows_from_sheet_records(get_sheet_data())
+
+
+# -------------------------------
+# Sync
+# -------------------------------
+
+def fetch_existing(table_name: str) -> Dict[str, Dict[str, Any]]:
+    """FAQ ID -> {"ids": [...row ids], "hash": content hash, "source_name": writer} for rows already stored."""
+    existing: Dict[str, Dict[str, Any]] = {}
+    start = 0
+    while True:
+        resp = (
+            get_supabase().table(table_name)
+            .select("id, content, metadata")
+            .order("id")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        page = resp.data or []
+        for row in page:
+            metadata = row.get("metadata") or {}
+            faq_id = metadata.get("faq_id")
+            if faq_id is None:
+                # Rows written by the old loader only carry the ID inside the content
+                faq_id = faq_id_from_document(Document(page_content=row.get("content") or "", metadata={}))
+            key = str(faq_id) if faq_id is not None else f"orphan:{row['id']}"
+            entry = existing.setdefault(key, {"ids": [], "hash": None, "source_name": None})
+            entry["ids"].append(str(row["id"]))
+            if str(row["id"]) == row_id_for(table_name, key):
+                entry["hash"] = metadata.get("content_hash")
+                entry["source_name"] = metadata.get("source_name")
+        if len(page) < PAGE_SIZE:
+            return existing
+        start += PAGE_SIZE
+
+
+def _delete_ids(table_name: str, ids: List[str]) -> None:
+    for i in range(0, len(ids), DELETE_CHUNK_SIZE):
+        get_supabase().table(table_name).delete().in_("id", ids[i:i + DELETE_CHUNK_SIZE]).execute()
+
+
+def sync_rows(
+    rows: List[FaqRow],
+    language: str = "en",
+    source_name: Optional[str] = None,
+    delete_missing: bool = True,
+    dry_run: bool = False,
+) -> SyncResult:
+    """
+    Bring one language table in line with the given source rows.
+
+    With delete_missing, rows this ``source_name`` wrote earlier whose FAQ ID
+    is gone are deleted; without a source name nothing is deleted.
+    """
+    table_name = get_table_name_for_language(language)
+    result = SyncResult(table=table_name, dry_run=dry_run)
+    existing = fetch_existing(table_name)
+
+    # Last row wins if a source repeats an ID
+    by_id: Dict[str, FaqRow] = {row.faq_id: row for row in rows}
+
+    pending: List[Dict[str, Any]] = []
+    stale_ids: List[str] = []
+    for faq_id, row in by_id.items():
+        item = _pending_row(table_name, row, language, source_name)
+        stored = existing.get(faq_id)
+        if (
+            stored
+            and stored["hash"] == item["metadata"]["content_hash"]
+            and stored["source_name"] == source_name
+            and stored["ids"] == [item["id"]]
+        ):
+            result.unchanged += 1
+            continue
+        if stored:
+            # Duplicates or legacy random-id rows for this FAQ get replaced
+            stale_ids.extend(i for i in stored["ids"] if i != item["id"])
+        pending.append(item)
+
+    if delete_missing and source_name:
+        # Rows of other sources, legacy rows without a source and orphan rows
+        # (no FAQ ID) never match
+        for faq_id, stored in existing.items():
+            if faq_id not in by_id and stored["source_name"] == source_name:
+                stale_ids.extend(stored["ids"])
+
+    result.upserted = len(pending)
+    result.deleted = len(stale_ids)
+    result.changed_ids = [p["metadata"]["faq_id"] for p in pending]
+    if dry_run or not (pending or stale_ids):
+        return result
+    _write_rows(table_name, pending, stale_ids, language)
+    return result
+
+
+def sync_changed_rows(
+    changed: List[FaqRow],
+    removed_ids: Iterable[str],
+    language: str = "en",
+    source_name: Optional[str] = None,
+    dry_run: bool = False,
+) -> SyncResult:
+    """
+    Apply an already known row-level diff (see sheet_sync.py): upsert the
+    changed rows and delete the removed FAQ IDs without reading the table.
+    """
+    table_name = get_table_name_for_language(language)
+    result = SyncResult(table=table_name, dry_run=dry_run)
+    pending = [_pending_row(table_name, row, language, source_name) for row in changed]
+    stale_ids = [row_id_for(table_name, faq_id) for faq_id in removed_ids]
+    result.upserted = len(pending)
+    result.deleted = len(stale_ids)
+    result.changed_ids = [p["metadata"]["faq_id"] for p in pending]
+    if dry_run or not (pending or stale_ids):
+        return result
+    _write_rows(table_name, pending, stale_ids, language)
+    return result
+
+
+def _pending_row(table_name: str, row: FaqRow, language: str, source_name: Optional[str] = None) -> Dict[str, Any]:
+    """Upsert payload for one source row (embedding added by _write_rows)."""
+    content = row.content()
+    if language == "ar":
+        content = normalize_arabic(content)
+    return {
+        "id": row_id_for(table_name, row.faq_id),
+        "content": content,
+        "metadata": {
+            "source": row.question,
+            "source_name": source_name,
+            "faq_id": row.faq_id,
+            "content_hash": row_hash(content),
+        },
+    }
+
+
+def _write_rows(table_name: str, pending: List[Dict[str, Any]], stale_ids: List[str], language: str) -> None:
+    """Embed + upsert pending rows in batches, delete stale ids, refresh derived state."""
+    for start in range(0, len(pending), EMBED_BATCH_SIZE):
+        batch = pending[start:start + EMBED_BATCH_SIZE]
+        vectors = get_embeddings().embed_documents([p["content"] for p in batch])
+        for item, vector in zip(batch, vectors):
+            item["embedding"] = vector
+    for start in range(0, len(pending), UPSERT_CHUNK_SIZE):
+        get_supabase().table(table_name).upsert(pending[start:start + UPSERT_CHUNK_SIZE]).execute()
+    _delete_ids(table_name, stale_ids)
+
+    on_table_write(language)
+
+
+def csv_source_name(csv_path: str) -> str:
+    return f"csv:{Path(csv_path).name}"
+
+
+def sync_csv(csv_path: str, language: str = "en", dry_run: bool = False) -> SyncResult:
+    return sync_rows(rows_from_csv(csv_path), language=language, source_name=csv_source_name(csv_path), dry_run=dry_run)
+
+
+def sync_sheet(language: str = "en", dry_run: bool = False, full: bool = False) -> SyncResult:
+    """
+    Sync the Google Sheet; only rows changed since the last sync are touched.
+
+    See sheet_sync.py. full=True ignores the local snapshot and diffs the
+    whole sheet against the table.
+    """
+    from sheet_sync import sync_sheet as sync_sheet_incremental
+
+    return sync_sheet_incremental(language, dry_run=dry_run, full=full)
+
+
+def sync_bilingual_faqs(
+    csv_path: str = str(FAQ_CSV_PATH),
+    ar_json_path: str = str(FAQ_AR_JSON_PATH),
+    dry_run: bool = False,
+) -> int:
+    """
+    Upsert the bilingual `faqs` table from the EN CSV + AR JSON.
+
+    Missing Arabic fields are translated once here, in batched calls, so the
+    request path never has to translate a FAQ answer.
+    """
+    english = {row.faq_id: row for row in rows_from_csv(csv_path)}
+    questions_en = {int(faq_id): row.question for faq_id, row in english.items()}
+    arabic = {row.faq_id: row for row in rows_from_ar_json(ar_json_path, questions_en)}
+
+    records = []
+    for faq_id, en in english.items():
+        ar = arabic.get(faq_id)
+        records.append({
+            "id": int(faq_id),
+            "question_en": en.question,
+            "answer_en": en.answer,
+            "question_ar": ar.question if ar and ar.question else "",
+            "answer_ar": ar.answer if ar and ar.answer else "",
+            "tags": [t.strip() for t in en.tags.split(",") if t.strip()],
+        })
+
+    missing = [(r, f) for r in records for f in ("question_ar", "answer_ar") if not r[f]]
+    if missing:
+        sources = [r[f.replace("_ar", "_en")] for r, f in missing]
+        translated = sources if dry_run else translate_many_to_arabic(sources)
+        for (record, field_name), text in zip(missing, translated):
+            # Still missing (no key / breaker open): fall back to English to avoid nulls
+            record[field_name] = text
+
+    print(f"{'[dry run] ' if dry_run else ''}{FAQ_TABLE_NAME}: {len(records)} rows, {len(missing)} Arabic fields filled")
+    if dry_run:
+        return len(records)
+    for start in range(0, len(records), UPSERT_CHUNK_SIZE):
+        get_supabase().table(FAQ_TABLE_NAME).upsert(records[start:start + UPSERT_CHUNK_SIZE], on_conflict="id").execute()
+    faq_store.load_table(get_supabase(), FAQ_TABLE_NAME)
+    sync_faq_suggestions()
+    return len(records)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally sync FAQ sources into Supabase.")
+    parser.add_argument("--en", metavar="CSV", help="English CSV (e.g. faq_data.csv)")
+    parser.add_argument("--ar", metavar="CSV", help="Arabic CSV (e.g. result.csv)")
+    parser.add_argument("--sheet", action="store_true", help="Sync the Google Sheet")
+    parser.add_argument("--lang", default="en", choices=["en", "ar"], help="Table for --sheet (default: en)")
+    parser.add_argument("--full", action="store_true", help="With --sheet: ignore the local sheet snapshot")
+    parser.add_argument("--faqs", action="store_true", help="Upsert the bilingual faqs table")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    if not (args.en or args.ar or args.sheet or args.faqs):
+        parser.print_help()
+        return
+    if args.en:
+        print(f"✅ {sync_csv(args.en, 'en', dry_run=args.dry_run)}")
+    if args.ar:
+        print(f"✅ {sync_csv(args.ar, 'ar', dry_run=args.dry_run)}")
+    if args.sheet:
+        print(f"✅ {sync_sheet(args.lang, dry_run=args.dry_run, full=args.full)}")
+    if args.faqs:
+        sync_bilingual_faqs(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
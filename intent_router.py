@@ -0,0 +1,96 @@
+"""
+Intent router for greetings, small talk and other canned questions.
+
+Runs before the cache and retrieval and never touches the network. Every
+intent in the data file (intents.json by default) contributes its
+phrases and regexes to a single compiled, fully anchored regular
+expression, so routing a query costs one normalisation plus one regex
+match.
+
+Data file format (a list of intents):
+
+    {
+      "name": "thanks",
+      "phrases": {"en": ["thank you"], "ar": ["شكرا"]},   # literal, normalised like queries
+      "regex":   {"en": ["thanks? (?:a lot|so much)"]},   # written against normalised text
+      "reply":   {"en": "You're welcome!", "ar": "على الرحب والسعة!"},
+      "action":  "count_documents"                         # optional; reply is then a template
+    }
+
+The first intent that matches wins, in file order.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+INTENTS_PATH = Path(os.getenv("INTENTS_PATH", str(Path(__file__).resolve().parent / "intents.json")))
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    replies: Dict[str, str] = field(default_factory=dict)
+    action: Optional[str] = None
+
+    def reply(self, lang: str) -> str:
+        return self.replies.get(lang) or self.replies.get("en", "")
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: Intent
+    # Language of the phrase that matched
+    lang: str
+
+
+class IntentRouter:
+    """Compiled matcher over all intent phrases."""
+
+    def __init__(self, intents: Sequence[dict], normalizer: Callable[[str], str]):
+        self.normalizer = normalizer
+        self.intents: List[Intent] = []
+        self._groups: Dict[str, Tuple[Intent, str]] = {}
+        alternatives: List[str] = []
+        for spec in intents:
+            intent = Intent(name=spec["name"], replies=dict(spec.get("reply") or {}), action=spec.get("action"))
+            self.intents.append(intent)
+            langs = set(spec.get("phrases") or {}) | set(spec.get("regex") or {})
+            for lang in sorted(langs):
+                patterns = [re.escape(p) for p in self._normalized(spec.get("phrases", {}).get(lang, []))]
+                patterns.extend(spec.get("regex", {}).get(lang, []))
+                if not patterns:
+                    continue
+                group = f"i{len(self._groups)}"
+                self._groups[group] = (intent, lang)
+                alternatives.append(f"(?P<{group}>{'|'.join(patterns)})")
+        # One alternation matched with fullmatch, so "hi" never matches "hiring"
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def _normalized(self, phrases: Sequence[str]) -> List[str]:
+        return [n for n in (self.normalizer(p) for p in phrases) if n]
+
+    @classmethod
+    def from_file(cls, path: Path, normalizer: Callable[[str], str]) -> "IntentRouter":
+        with open(path, encoding="utf-8") as fh:
+            return cls(json.load(fh), normalizer)
+
+    def __len__(self) -> int:
+        return len(self.intents)
+
+    def match(self, query: str) -> Optional[IntentMatch]:
+        """The intent for the whole query, or None."""
+        if self._pattern is None:
+            return None
+        m = self._pattern.fullmatch(self.normalizer(query))
+        if m is None:
+            return None
+        # lastgroup is unreliable when a data regex has its own groups
+        group = next(name for name, value in m.groupdict().items() if value is not None)
+        intent, lang = self._groups[group]
+        return IntentMatch(intent=intent, lang=lang)
@@ -1,21 +1,58 @@
+import asyncio
 import os
 import re
-from typing import List, Dict, Any, Optional
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
-from supabase import create_client
+import httpx
+from supabase import create_client, acreate_client, AsyncClient
+from supabase.lib.client_options import AsyncClientOptions, SyncClientOptions
 from langchain_community.vectorstores import SupabaseVectorStore
-#from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
 from langchain_groq import ChatGroq  # Using Groq for the LLM instead of OpenAI
 from langchain.schema import HumanMessage, Document
 from dotenv import load_dotenv
-from langchain_community.document_loaders import CSVLoader
+
+import http_pool
+from resources import registry
+from observability import (
+    LLM_REQUESTS,
+    RAG_ANSWERS,
+    RAG_FALLBACKS,
+    STAGE_SECONDS,
+    log,
+    metrics,
+    record_llm_usage,
+    span,
+    stage_summary,
+)
+from vector_index import LocalVectorIndex
+from response_cache import ResponseCache, RedisCacheBackend, SemanticCache
+from embedding_service import EmbeddingService
+from embedding_backends import create_base_embeddings
+from embedding_sidecar import SidecarEmbeddings
+from faq_store import FaqStore, faq_id_from_document, question_from_document
+from intent_router import INTENTS_PATH, IntentRouter
+from suggest_index import SuggestIndex
+from reranker import CrossEncoderReranker, is_ambiguous
+from hybrid_search import (
+    LexicalHit,
+    is_confident_lexical,
+    lexical_hits_from_rows,
+    reciprocal_rank_fusion,
+)
+from translation_service import (
+    CircuitBreaker,
+    TranslationCache,
+    TranslationService,
+    default_cache_path,
+)
 
 # Arabic processing and language detection
 from pyarabic import araby
 from langdetect import detect, DetectorFactory
-import requests
 
 # Ensure deterministic language detection
 DetectorFactory.seed = 0
@@ -42,6 +79,10 @@ EMBEDDING_MODEL_NAME = os.getenv(
     "EMBEDDING_MODEL",
     "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
 )
+# Embedding runtime: "torch" (float), "onnx", or "onnx-int8" (dynamic int8
+# quantization for CPU-only nodes; preset from EMBEDDING_ONNX_QUANTIZATION)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_QUANTIZATION = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")
 
 # Google Translate API (force Arabic output)
 GOOGLE_TRANSLATE_API_KEY = (
@@ -50,47 +91,219 @@ GOOGLE_TRANSLATE_API_KEY = (
 )
 FORCE_ARABIC_OUTPUT = os.getenv("FORCE_ARABIC_OUTPUT", "true").lower() in {"1", "true", "yes"}
 
-# -------------------------------
-# Initialize Supabase client
-# -------------------------------
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Bilingual FAQ table holding answer_en / answer_ar per FAQ ID
+FAQ_TABLE_NAME = os.getenv("FAQ_TABLE_NAME", "faqs").strip("'\"")
+
+# Hybrid retrieval: full-text hits from FAQ_SEARCH_RPC are fused with vector
+# hits; short queries (<= LEXICAL_MAX_TOKENS words) whose top keyword hit
+# outranks the next by LEXICAL_DOMINANCE skip the embedding model entirely
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() in {"1", "true", "yes"}
+FAQ_SEARCH_RPC = os.getenv("FAQ_SEARCH_RPC", "search_faqs").strip("'\"")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "5"))
+LEXICAL_MAX_TOKENS = int(os.getenv("LEXICAL_MAX_TOKENS", "3"))
+LEXICAL_DOMINANCE = float(os.getenv("LEXICAL_DOMINANCE", "2.0"))
+
+# Vector retrieval fetches RETRIEVAL_K scored candidates and drops those below
+# RAG_SIMILARITY_THRESHOLD (cosine); nothing left means the LLM fallback answers
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "5"))
+RAG_SIMILARITY_THRESHOLD = float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.45"))
+# Optional cross-encoder (see reranker.py), run only when the top two vector
+# scores are within RERANK_MARGIN of each other
+RERANKER_MODEL = os.getenv("RERANKER_MODEL")
+RERANK_MARGIN = float(os.getenv("RERANK_MARGIN", "0.05"))
+# After a 403/quota error (or repeated failures) skip translation for this long
+TRANSLATE_FAILURE_COOLDOWN = float(os.getenv("TRANSLATE_FAILURE_COOLDOWN", "300"))
+
+# Embedding runs on CPU; keep it off the event loop in a small, bounded pool.
+# Concurrent queries arriving within the batch window share one encode call.
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "2"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+
+# Retrieval mode: "local" answers from an in-process index (falls back to the
+# match RPC until it is loaded), "remote" always calls the match RPC
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "local").lower()
+VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "300"))
+# Directory (ideally tmpfs, e.g. /dev/shm/tijarah360) for a memory-mapped index
+# snapshot shared by all uvicorn workers; unset keeps a private copy per worker
+VECTOR_INDEX_SHARED_DIR = os.getenv("VECTOR_INDEX_SHARED_DIR")
+# Versioned on-disk copy of both vector tables (.npy + JSON manifest), rewritten
+# after every refresh or ingestion that changes them. It is mapped at startup
+# before Supabase answers, and vector search uses it once the match RPC takes
+# longer than KB_REMOTE_TIMEOUT seconds or keeps failing (for
+# KB_REMOTE_FAILURE_COOLDOWN seconds at a time). The lexical search and
+# document count RPCs share that deadline and breaker. Empty disables it.
+KB_SNAPSHOT_DIR = os.getenv("KB_SNAPSHOT_DIR", str(Path(__file__).resolve().parent / ".cache" / "kb_snapshot"))
+KB_REMOTE_TIMEOUT = float(os.getenv("KB_REMOTE_TIMEOUT", "2"))
+KB_REMOTE_FAILURE_COOLDOWN = float(os.getenv("KB_REMOTE_FAILURE_COOLDOWN", "30"))
+
+# Unix socket of embedding_sidecar.py; when set, workers send encode calls to
+# the one sidecar process instead of each loading its own copy of the model
+EMBEDDING_SIDECAR_SOCKET = os.getenv("EMBEDDING_SIDECAR_SOCKET")
+
+# Response cache in front of get_rag_response (size 0 disables it); set
+# RESPONSE_CACHE_URL (redis://...) to share hits across workers
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+# Paraphrase cache: a query whose embedding is at least SEMANTIC_CACHE_THRESHOLD
+# cosine-similar to an answered query in the same language, and whose top FAQ
+# hit is the same, reuses its answer. It is consulted only for queries that
+# exact / keyword matching could not answer, i.e. right before vector retrieval
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.96"))
 
 # -------------------------------
-# Initialize Groq LLM
+# Lazily created resources (see resources.py). Nothing heavy is built at
+# import time; main.py warms these up in parallel during startup.
 # -------------------------------
-llm = ChatGroq(
-    api_key=GROQ_API_KEY,
-    model="llama-3.1-70b-versatile"  # Updated to new model after llama3-70b-8192 deprecation
+def _create_supabase():
+    return create_client(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        options=SyncClientOptions(httpx_client=http_pool.get_sync_client("supabase")),
+    )
+
+def _create_llm():
+    # Pooled keep-alive clients; the Groq SDK keeps its own retries for 429/5xx
+    return ChatGroq(
+        api_key=GROQ_API_KEY,
+        model="llama-3.1-70b-versatile",  # Updated to new model after llama3-70b-8192 deprecation
+        http_client=http_pool.get_sync_client("groq"),
+        http_async_client=http_pool.get_async_client("groq"),
+    )
+
+def _create_embeddings():
+    if EMBEDDING_SIDECAR_SOCKET:
+        model = SidecarEmbeddings(EMBEDDING_SIDECAR_SOCKET)
+        print(f"Using embedding sidecar at {EMBEDDING_SIDECAR_SOCKET}: {model.info()}")
+    else:
+        model = create_base_embeddings(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_ONNX_QUANTIZATION)
+    # Cached + micro-batched front end used by both vector stores and ingestion
+    return EmbeddingService(
+        model,
+        cache_size=EMBEDDING_CACHE_SIZE,
+        batch_window_ms=EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
+        max_workers=EMBEDDING_MAX_WORKERS,
+    )
+
+def _create_vectorstore(lang: str):
+    return SupabaseVectorStore(
+        embedding=get_embeddings(),
+        client=get_supabase(),
+        table_name=get_table_name_for_language(lang),
+        query_name=get_match_rpc_for_language(lang),
+    )
+
+registry.register("supabase", _create_supabase)
+registry.register("llm", _create_llm)
+registry.register("embeddings", _create_embeddings)
+registry.register("vectorstore_en", lambda: _create_vectorstore("en"))
+registry.register("vectorstore_ar", lambda: _create_vectorstore("ar"))
+if RERANKER_MODEL:
+    registry.register("reranker", lambda: CrossEncoderReranker(RERANKER_MODEL))
+
+def get_supabase():
+    """Shared sync Supabase client."""
+    return registry.get("supabase")
+
+def get_llm() -> ChatGroq:
+    """Shared Groq chat model."""
+    return registry.get("llm")
+
+def get_embeddings() -> EmbeddingService:
+    """Shared embedding service (multilingual model, cached and batched)."""
+    return registry.get("embeddings")
+
+def get_vectorstore() -> SupabaseVectorStore:
+    """Default (English) vectorstore, kept for backward compatibility."""
+    return get_vectorstore_for_language("en")
+
+# In-process indexes mirroring both tables (see VECTOR_INDEX_MODE)
+local_indexes: Dict[str, LocalVectorIndex] = {
+    "en": LocalVectorIndex(SUPABASE_TABLE_NAME),
+    "ar": LocalVectorIndex(ARABIC_SUPABASE_TABLE_NAME),
+}
+# Open while Supabase is failing or too slow; searches go to the KB snapshot
+kb_remote_breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=KB_REMOTE_FAILURE_COOLDOWN)
+
+# Stored answers in both languages; local files now, the faqs table at startup
+faq_store = FaqStore()
+try:
+    faq_store.load_files()
+except Exception as e:
+    print(f"Loading local FAQ files failed: {e}")
+
+translator = TranslationService(
+    GOOGLE_TRANSLATE_API_KEY,
+    cache=TranslationCache(default_cache_path()),
+    breaker=CircuitBreaker(cooldown_seconds=TRANSLATE_FAILURE_COOLDOWN),
 )
 
-# -------------------------------
-# Embeddings and Vector Store (multilingual for Arabic)
-# -------------------------------
-embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-
-# Create vector stores for both languages
-vectorstore_english = SupabaseVectorStore(
-    embedding=embeddings,
-    client=supabase,
-    table_name=SUPABASE_TABLE_NAME,
-    query_name=SUPABASE_MATCH_RPC,
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    ttl_seconds=RESPONSE_CACHE_TTL,
+    backend=RedisCacheBackend(RESPONSE_CACHE_URL) if RESPONSE_CACHE_URL else None,
 )
 
-vectorstore_arabic = SupabaseVectorStore(
-    embedding=embeddings,
-    client=supabase,
-    table_name=ARABIC_SUPABASE_TABLE_NAME,
-    query_name=ARABIC_SUPABASE_MATCH_RPC,
+semantic_cache = SemanticCache(
+    max_entries=SEMANTIC_CACHE_SIZE,
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=RESPONSE_CACHE_TTL,
 )
 
-# Default vectorstore for backward compatibility
-vectorstore = vectorstore_english
+# -------------------------------
+# Async clients (bound to the running event loop, created on first use).
+# Connections come from the per-upstream pools in http_pool.py.
+# -------------------------------
+_async_supabase: Optional[AsyncClient] = None
+
+async def get_async_supabase() -> AsyncClient:
+    """Return the shared async Supabase client, creating it on first use."""
+    global _async_supabase
+    if _async_supabase is None:
+        _async_supabase = await acreate_client(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            options=AsyncClientOptions(httpx_client=http_pool.get_async_client("supabase")),
+        )
+    return _async_supabase
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the pooled async HTTP client used for Google Translate calls."""
+    return http_pool.get_async_client("translate")
+
+async def aclose_async_clients(keep: Tuple[str, ...] = ()) -> None:
+    """Close the loop-bound clients so the next event loop starts fresh."""
+    global _async_supabase
+    _async_supabase = None
+    await http_pool.aclose_async_clients(exclude=keep)
+
+def _run_blocking(coro):
+    """Run a coroutine to completion from synchronous code (scripts, tests)."""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            # The LLM holds on to its Groq client for the life of the process,
+            # so only its connections (bound to this loop) are closed
+            await aclose_async_clients(keep=("groq",))
+            await http_pool.arelease_async_connections(("groq",))
+    return asyncio.run(runner())
+
+async def aembed_query(text: str) -> List[float]:
+    """Embed a query through the cached, micro-batched embedding service."""
+    embedding_service = await registry.aget("embeddings")
+    with span("embed"):
+        return await embedding_service.aembed_query(text)
 
 def get_vectorstore_for_language(lang: str) -> SupabaseVectorStore:
     """Get the appropriate vectorstore based on language."""
     if lang == "ar":
-        return vectorstore_arabic
-    return vectorstore_english
+        return registry.get("vectorstore_ar")
+    return registry.get("vectorstore_en")
 
 def get_table_name_for_language(lang: str) -> str:
     """Get the appropriate table name based on language."""
@@ -98,29 +311,228 @@ def get_table_name_for_language(lang: str) -> str:
         return ARABIC_SUPABASE_TABLE_NAME
     return SUPABASE_TABLE_NAME
 
+def get_match_rpc_for_language(lang: str) -> str:
+    """Get the appropriate match RPC name based on language."""
+    if lang == "ar":
+        return ARABIC_SUPABASE_MATCH_RPC
+    return SUPABASE_MATCH_RPC
+
+def refresh_local_index(lang: str, force: bool = False) -> int:
+    """Reload one language's local index from Supabase; returns the row count."""
+    if VECTOR_INDEX_MODE != "local" and not KB_SNAPSHOT_DIR:
+        return 0
+    lang = "ar" if lang == "ar" else "en"
+    index = local_indexes[lang]
+    if not index.ready:
+        # Serve from the last snapshot right away; Supabase may be slow or down
+        load_kb_snapshot(lang)
+        if VECTOR_INDEX_MODE != "local" and index.ready and not force:
+            # Remote mode only keeps the index as the degraded-serving copy
+            return len(index)
+    try:
+        if VECTOR_INDEX_SHARED_DIR:
+            # Map the shared snapshot; only a stale (or just-written) one is rebuilt
+            previous = index.shared_version
+            count = index.load_shared(
+                get_supabase(), VECTOR_INDEX_SHARED_DIR, VECTOR_INDEX_REFRESH_SECONDS, force=force
+            )
+            if index.shared_version != previous:
+                print(f"Local vector index for {index.table_name} mapped from {VECTOR_INDEX_SHARED_DIR} with {count} rows")
+        else:
+            count = index.load(get_supabase())
+            print(f"Local vector index for {index.table_name} loaded with {count} rows")
+    except Exception as e:
+        print(f"Local vector index refresh failed for {index.table_name}: {e}")
+        return len(index)
+    save_kb_snapshot(lang)
+    sync_table_suggestions(lang)
+    return count
+
+def embedding_model_id() -> str:
+    """Model and runtime that embed stored rows; part of every ingested row's hash."""
+    backend = EMBEDDING_BACKEND
+    if backend == "onnx-int8":
+        backend += f":{EMBEDDING_ONNX_QUANTIZATION}"
+    return f"{EMBEDDING_MODEL_NAME}@{backend}"
+
+def _kb_snapshot_meta() -> Dict[str, str]:
+    # Vectors from another embedding model must never be searched
+    return {"embedding_model": EMBEDDING_MODEL_NAME}
+
+def load_kb_snapshot(lang: str) -> int:
+    """Map the on-disk snapshot of one language table (no Supabase call); returns its rows."""
+    lang = "ar" if lang == "ar" else "en"
+    index = local_indexes[lang]
+    if not KB_SNAPSHOT_DIR:
+        return len(index)
+    start = time.perf_counter()
+    if index.open_shared(KB_SNAPSHOT_DIR, meta=_kb_snapshot_meta()):
+        print(
+            f"Local vector index for {index.table_name} mapped from KB snapshot {index.shared_version} "
+            f"with {len(index)} rows in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        sync_table_suggestions(lang)
+    return len(index)
+
+def save_kb_snapshot(lang: str) -> None:
+    """Persist one language's index as a new snapshot version if its rows changed."""
+    index = local_indexes["ar" if lang == "ar" else "en"]
+    # An empty table is not snapshotted, so an outage never serves from nothing
+    if not KB_SNAPSHOT_DIR or not len(index):
+        return
+    try:
+        version = index.save_snapshot(KB_SNAPSHOT_DIR, meta=_kb_snapshot_meta())
+    except Exception as e:
+        print(f"Saving KB snapshot for {index.table_name} failed: {e}")
+        return
+    if version:
+        print(f"KB snapshot {version} of {index.table_name} saved with {len(index)} rows")
+
+def sync_table_suggestions(lang: str) -> None:
+    """Index the questions of one language table, as mirrored by its local index."""
+    lang = "ar" if lang == "ar" else "en"
+    index = local_indexes[lang]
+    questions = []
+    for doc in index.documents():
+        question = question_from_document(doc)
+        if question:
+            questions.append((lang, faq_store.english_id(faq_id_from_document(doc), lang), question))
+    changed, removed = suggest_index.sync(index.table_name, questions)
+    if changed or removed:
+        print(f"Suggest index: {changed} questions indexed, {removed} removed from {index.table_name}")
+
+def sync_faq_suggestions() -> None:
+    """Index the EN and AR questions held by the FAQ store."""
+    changed, removed = suggest_index.sync(FAQ_TABLE_NAME, faq_store.questions())
+    if changed or removed:
+        print(f"Suggest index: {changed} questions indexed, {removed} removed from {FAQ_TABLE_NAME}")
+
+def on_table_write(lang: str) -> None:
+    """Keep derived state in step after rows are written to a language table."""
+    refresh_local_index(lang, force=True)
+    cache_lang = "ar" if lang == "ar" else "en"
+    response_cache.invalidate(cache_lang)
+    semantic_cache.invalidate(cache_lang)
+
+async def arefresh_local_indexes() -> None:
+    """Reload both local indexes without blocking the event loop."""
+    await asyncio.gather(
+        asyncio.to_thread(refresh_local_index, "en"),
+        asyncio.to_thread(refresh_local_index, "ar"),
+    )
+
+async def refresh_local_indexes_periodically() -> None:
+    """Background task keeping the local indexes in step with Supabase."""
+    while True:
+        await asyncio.sleep(VECTOR_INDEX_REFRESH_SECONDS)
+        await arefresh_local_indexes()
+
+async def asimilarity_search(query: str, lang: str, k: int = 1) -> List[Tuple[Document, float]]:
+    """Embed the query and search the local index, or the match RPC if it is not loaded."""
+    vector = await aembed_query(query)
+    index = local_indexes["ar" if lang == "ar" else "en"]
+    if VECTOR_INDEX_MODE == "local" and index.ready:
+        with span("vector_search_local"):
+            return index.search(vector, k)
+
+    if VECTOR_INDEX_MODE == "local":
+        RAG_FALLBACKS.inc(stage="vector_index_not_ready")
+    return await _arpc_search(vector, lang, k)
+
+async def asimilarity_search_many(queries: List[str], lang: str, k: int = 1) -> List[List[Tuple[Document, float]]]:
+    """asimilarity_search for a group of same-language queries: one model call, one matrix product."""
+    embedding_service = await registry.aget("embeddings")
+    with span("embed"):
+        vectors = await embedding_service.aembed_documents(queries)
+    index = local_indexes["ar" if lang == "ar" else "en"]
+    if VECTOR_INDEX_MODE == "local" and index.ready:
+        with span("vector_search_local"):
+            return index.search_many(vectors, k)
+
+    if VECTOR_INDEX_MODE == "local":
+        RAG_FALLBACKS.inc(stage="vector_index_not_ready")
+    # The match RPC takes a single embedding
+    return list(await asyncio.gather(*(_arpc_search(vector, lang, k) for vector in vectors)))
+
+async def _arpc_search(vector: List[float], lang: str, k: int) -> List[Tuple[Document, float]]:
+    index = local_indexes["ar" if lang == "ar" else "en"]
+    if index.ready and kb_remote_breaker.is_open:
+        return _snapshot_search(index, vector, k)
+    try:
+        client = await get_async_supabase()
+        with span("vector_search_rpc"):
+            res = await asyncio.wait_for(
+                client
+                .rpc(get_match_rpc_for_language(lang), {"query_embedding": vector})
+                .limit(k)
+                .execute(),
+                # Only give up on a slow RPC when there is a snapshot to answer from
+                KB_REMOTE_TIMEOUT if index.ready else None,
+            )
+    except Exception as e:
+        if not index.ready:
+            raise
+        kb_remote_breaker.record_failure()
+        log.warning(f"Match RPC failed, searching the KB snapshot instead: {e!r}")
+        return _snapshot_search(index, vector, k)
+    kb_remote_breaker.record_success()
+    return [
+        (
+            Document(page_content=row.get("content", ""), metadata=row.get("metadata") or {}),
+            row.get("similarity", 0.0),
+        )
+        for row in res.data or []
+    ]
+
+def _snapshot_search(index: LocalVectorIndex, vector: List[float], k: int) -> List[Tuple[Document, float]]:
+    RAG_FALLBACKS.inc(stage="kb_snapshot")
+    with span("vector_search_local"):
+        return index.search(vector, k)
+
 # -------------------------------
 # Arabic language utilities
 # -------------------------------
 
+# Arabic block, supplements and presentation forms (copy-pasted text uses the latter)
+_ARABIC_CHAR_RE = re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]")
+# Words (letter runs) per script; words rather than letters so one long Latin
+# brand name does not outweigh a short Arabic question around it
+_ARABIC_WORD_RE = re.compile(r"[\u0621-\u064A\u066E-\u06D3\u06FA-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+")
+_LATIN_WORD_RE = re.compile(r"[A-Za-z\u00C0-\u024F]+")
+
+
 def is_arabic_text(text: str) -> bool:
     """Detect presence of Arabic letters."""
-    return bool(re.search(r"[\u0600-\u06FF]", text or ""))
+    return bool(_ARABIC_CHAR_RE.search(text or ""))
+
+
+@lru_cache(maxsize=4096)
+def _detect_mixed_script(text: str) -> str:
+    """langdetect for mixed Arabic/Latin input only; cached since it is slow."""
+    try:
+        lang = detect(text)
+    except Exception:
+        return "ar"  # keep the Arabic route when undecidable
+    return "ar" if lang and lang.startswith("ar") else "en"
 
 
 def detect_lang(text: str) -> str:
-    """Detect language - if ANY Arabic character exists, treat as Arabic."""
-    # IMPORTANT: If even a single Arabic character is present, use Arabic route
-    if is_arabic_text(text or ""):
-        return "ar"
+    """
+    EN/AR routing from the script of the letters; no model call for single-script text.
 
-    # Otherwise, try langdetect for other cases
-    try:
-        lang = detect(text or "")
-        if lang and lang.startswith("ar"):
-            return "ar"
+    Arabic-only or Arabic-majority text (counted in words) routes to Arabic,
+    so Latin brand names such as "Tijarah360" in an Arabic question do not
+    change the route;
+    text without Arabic letters routes to English, and only English-majority
+    mixed text goes to the (cached) langdetect model.
+    """
+    if not is_arabic_text(text):
         return "en"
-    except Exception:
-        return "en"  # Default to English if no Arabic detected
+    arabic = len(_ARABIC_WORD_RE.findall(text))
+    latin = len(_LATIN_WORD_RE.findall(text))
+    if arabic >= latin:
+        return "ar"
+    return _detect_mixed_script(" ".join(text.split()))
 
 
 def normalize_arabic(text: str) -> str:
@@ -135,136 +547,128 @@ def normalize_arabic(text: str) -> str:
     return normalized.strip()
 
 
-def translate_to_arabic(text: str) -> str:
-    """Translate given text to Arabic using Google Cloud Translation v2."""
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lowercased, Arabic-normalized, punctuation stripped."""
+    text = (query or "").lower()
+    if is_arabic_text(text):
+        # Strip tashkeel before the punctuation pass so words are not split on marks
+        text = normalize_arabic(text)
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+async def atranslate_to_arabic(text: str) -> str:
+    """Translate given text to Arabic using Google Cloud Translation v2 (cached)."""
     if not text:
         return text
-    if not GOOGLE_TRANSLATE_API_KEY:
-        print("Google Translate API key not configured")
-        return text
+    translated = await translator.atranslate_many(get_http_client(), [text], target="ar")
+    return translated[0]
+
+
+async def atranslate_many_to_arabic(texts: List[str]) -> List[str]:
+    """Translate many texts in batched API calls; used by ingestion."""
+    return await translator.atranslate_many(get_http_client(), texts, target="ar")
+
+
+def translate_many_to_arabic(texts: List[str]) -> List[str]:
+    """Blocking variant of atranslate_many_to_arabic."""
+    return _run_blocking(atranslate_many_to_arabic(texts))
+
+
+def load_faq_answers() -> int:
+    """Refresh stored bilingual answers from the faqs table (files stay as fallback)."""
+    count = 0
     try:
-        endpoint = "https://translation.googleapis.com/language/translate/v2"
-        params = {"key": GOOGLE_TRANSLATE_API_KEY}
-        form = {"q": text, "target": "ar", "format": "text"}
-        resp = requests.post(endpoint, params=params, data=form, timeout=15)
-        if not resp.ok:
-            resp = requests.post(endpoint, params=params, json=form, timeout=15)
-        resp.raise_for_status()
-        payload = resp.json() or {}
-        translated = (
-            payload.get("data", {})
-            .get("translations", [{}])[0]
-            .get("translatedText")
-        )
-        return translated or text
-    except requests.exceptions.HTTPError as e:
-        if "403" in str(e):
-            print(f"Google Translate API key may be invalid or disabled: {e}")
-        else:
-            print(f"Translate-to-Arabic HTTP error: {e}")
-        return text
+        count = faq_store.load_table(get_supabase(), FAQ_TABLE_NAME)
+        if count:
+            print(f"Loaded {count} bilingual FAQ answers from {FAQ_TABLE_NAME}")
     except Exception as e:
-        print(f"Translate-to-Arabic failed: {e}")
-        return text
+        print(f"Loading FAQ answers from {FAQ_TABLE_NAME} failed: {e}")
+    if not count:
+        print(f"Using {len(faq_store)} bilingual FAQ answers from {faq_store.source}")
+    sync_faq_suggestions()
+    return len(faq_store)
 
 
-def ensure_arabic_output(text: str) -> str:
-    """If configured, translate output to Arabic. Otherwise return as-is."""
+def output_language(query_lang: str) -> str:
+    """Language the answer should be returned in."""
+    return "ar" if FORCE_ARABIC_OUTPUT else query_lang
+
+
+def warm_translation_cache() -> int:
+    """Load persisted translations into memory; returns the entry count."""
+    count = translator.cache.load()
+    print(f"Translation cache warmed with {count} entries")
+    return count
+
+
+def _needs_translation(text: str) -> bool:
+    """Return True when forced Arabic output is on and the text is not Arabic yet."""
     if not FORCE_ARABIC_OUTPUT:
+        return False
+    # langdetect never labels text without Arabic script as Arabic, so the
+    # script check alone decides
+    return not is_arabic_text(text)
+
+
+async def aensure_arabic_output(text: str) -> str:
+    """If configured, translate output to Arabic. Otherwise return as-is."""
+    if not _needs_translation(text):
         return text
-    if is_arabic_text(text):
+    with span("translate"):
+        return await atranslate_to_arabic(text)
+
+
+async def astored_answer(faq_id: Optional[int], lang: str) -> Optional[str]:
+    """Stored answer of a FAQ; without a confirmed Arabic one, its English answer translated."""
+    answer = faq_store.answer_for(faq_id, lang)
+    if answer is None and lang == "ar":
+        english = faq_store.answer_for(faq_id, "en")
+        if english:
+            with span("translate"):
+                answer = await atranslate_to_arabic(english)
+    return answer
+
+
+def translate_to_arabic(text: str) -> str:
+    """Blocking variant of atranslate_to_arabic."""
+    return _run_blocking(atranslate_to_arabic(text))
+
+
+def ensure_arabic_output(text: str) -> str:
+    """Blocking variant of aensure_arabic_output."""
+    if not _needs_translation(text):
         return text
-    try:
-        lang = detect(text)
-        if lang and lang.startswith("ar"):
-            return text
-    except Exception:
-        pass
     return translate_to_arabic(text)
 
 # -------------------------------
 # Small talk responses
 # -------------------------------
-SMALL_TALK = {
-    "hi": "Hello! How can I assist you with Tijarah360 today?",
-    "hello": "Hi there! How can I help you with Tijarah360?",
-    "how are you": "I'm just a bot, but I'm functioning perfectly! How about you?",
-    "what's up": "I'm here to help you with Tijarah360. How can I assist?",
-    "hey": "Hey! How can I assist you today?",
-    "good morning": "Good morning! How can I help you with Tijarah360 today?",
-    "good afternoon": "Good afternoon! How can I assist you with Tijarah360?",
-    "good evening": "Good evening! How can I help you with Tijarah360?",
-    "bye": "Goodbye! Feel free to return if you need help with Tijarah360.",
-    "goodbye": "Goodbye! Have a great day!",
-    "thanks": "You're welcome! Is there anything else I can help you with regarding Tijarah360?",
-    "thank you": "You're welcome! Is there anything else I can help you with regarding Tijarah360?",
-    "ok": "Great! How can I assist you with Tijarah360?",
-    "okay": "Great! How can I assist you with Tijarah360?",
-    "yes": "Great! What would you like to know about Tijarah360?",
-    "no": "No problem! Let me know if you need help with Tijarah360 later.",
-    "maybe": "Take your time! I'm here when you need help with Tijarah360.",
-    "sure": "Perfect! How can I help you with Tijarah360?",
-    "alright": "Alright! What can I help you with regarding Tijarah360?"
-}
+# Greetings, small talk and count questions, compiled from INTENTS_PATH
+try:
+    intent_router = IntentRouter.from_file(INTENTS_PATH, normalize_query)
+except Exception as e:
+    print(f"Loading intents from {INTENTS_PATH} failed: {e}")
+    intent_router = IntentRouter([], normalize_query)
 
-SIMPLE_GREETINGS = [
-    "hi", "hello", "hey", "good morning", "good afternoon", "good evening",
-    "how are you", "what's up", "bye", "goodbye", "thanks", "thank you",
-    "ok", "okay", "yes", "no", "maybe", "sure", "alright"
-]
-
-VERY_SHORT_GREETINGS = [
-    "hi", "hello", "hey", "bye", "ok", "okay", "yes", "no", "maybe", "sure", "alright"
-]
-
-def is_simple_greeting(query: str) -> bool:
-    query_lower = query.strip().lower()
-    query_clean = query_lower.replace('?', '').replace('!', '').replace('.', '').strip()
-    if query_clean in SMALL_TALK:
-        return True
-    words = query_clean.split()
-    if len(words) <= 2:
-        if all(word in VERY_SHORT_GREETINGS for word in words):
-            return True
-        if len(query_clean) <= 10:
-            return True
-    if query_clean in SIMPLE_GREETINGS:
-        return True
-    greeting_patterns = ['good morning', 'good afternoon', 'good evening', 'how are you', 'what\'s up', 'thank you']
-    for pattern in greeting_patterns:
-        if pattern == query_clean:
-            return True
-    if query_clean in ['how r u', 'how are u', 'how r you', 'how are you']:
-        return True
-    return False
+# Typeahead over every FAQ question (see /suggest); re-synced whenever the FAQ
+# store or a local index reloads
+suggest_index = SuggestIndex(normalize_query)
+sync_faq_suggestions()
 
 # -------------------------------
 # Functions
 # -------------------------------
 
 def load_sheet_to_supabase(csv_path: str, language: str = "en") -> SupabaseVectorStore:
-    loader = CSVLoader(file_path=csv_path, source_column="Question", encoding="utf-8")
-    documents = loader.load()
-
-    # Get appropriate table and RPC based on language
-    if language == "ar":
-        table_name = ARABIC_SUPABASE_TABLE_NAME
-        match_rpc = ARABIC_SUPABASE_MATCH_RPC
-        vectorstore_to_return = vectorstore_arabic
-    else:
-        table_name = SUPABASE_TABLE_NAME
-        match_rpc = SUPABASE_MATCH_RPC
-        vectorstore_to_return = vectorstore_english
-
-    SupabaseVectorStore.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        client=supabase,
-        table_name=table_name,
-        query_name=match_rpc,
-        chunk_size=500,
-    )
-    return vectorstore_to_return
+    """Sync a FAQ CSV into the language's table (incremental, see ingestion.py)."""
+    from ingestion import sync_csv  # ingestion imports this module
+
+    print(sync_csv(csv_path, language))
+    return get_vectorstore_for_language(language)
 
 def add_texts_to_supabase(texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None:
     # Separate texts by language
@@ -285,30 +689,60 @@ def add_texts_to_supabase(texts: List[str], metadatas: Optional[List[Dict[str, A
 
     # Add to appropriate vectorstores
     if arabic_texts:
-        vectorstore_arabic.add_texts(texts=arabic_texts, metadatas=arabic_metadata or [])
+        get_vectorstore_for_language("ar").add_texts(texts=arabic_texts, metadatas=arabic_metadata or [])
+        on_table_write("ar")
     if english_texts:
-        vectorstore_english.add_texts(texts=english_texts, metadatas=english_metadata or [])
+        get_vectorstore_for_language("en").add_texts(texts=english_texts, metadatas=english_metadata or [])
+        on_table_write("en")
 
 def create_and_store_embedding(text: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     # Detect language and use appropriate vectorstore
     if is_arabic_text(text):
         value = normalize_arabic(text)
-        vectorstore_arabic.add_texts(texts=[value], metadatas=[metadata or {}])
+        get_vectorstore_for_language("ar").add_texts(texts=[value], metadatas=[metadata or {}])
+        on_table_write("ar")
     else:
         value = text
-        vectorstore_english.add_texts(texts=[value], metadatas=[metadata or {}])
+        get_vectorstore_for_language("en").add_texts(texts=[value], metadatas=[metadata or {}])
+        on_table_write("en")
     return {"status": "ok", "stored": 1}
 
 def get_documents_count(language: Optional[str] = None) -> int:
     """Get document count. If language is None, returns English count for backward compatibility."""
     try:
         table_name = get_table_name_for_language(language or "en")
-        resp = supabase.table(table_name).select("id", count="exact").limit(0).execute()
+        resp = get_supabase().table(table_name).select("id", count="exact").limit(0).execute()
         if hasattr(resp, "count") and isinstance(resp.count, int):
             return resp.count
         return len(resp.data or [])
     except Exception:
-        return 0
+        return _snapshot_documents_count(language)
+
+async def aget_documents_count(language: Optional[str] = None) -> int:
+    """Async variant of get_documents_count using the async Supabase client."""
+    if kb_remote_breaker.is_open:
+        return _snapshot_documents_count(language)
+    try:
+        table_name = get_table_name_for_language(language or "en")
+        client = await get_async_supabase()
+        resp = await asyncio.wait_for(
+            client.table(table_name).select("id", count="exact").limit(0).execute(), KB_REMOTE_TIMEOUT
+        )
+    except Exception as e:
+        kb_remote_breaker.record_failure()
+        log.warning(f"Document count failed, counting the KB snapshot instead: {e!r}")
+        return _snapshot_documents_count(language)
+    kb_remote_breaker.record_success()
+    if hasattr(resp, "count") and isinstance(resp.count, int):
+        return resp.count
+    return len(resp.data or [])
+
+def _snapshot_documents_count(language: Optional[str]) -> int:
+    """Rows of the local index (mapped from the KB snapshot if needed) while Supabase is unreachable."""
+    lang = "ar" if language == "ar" else "en"
+    if not local_indexes[lang].ready:
+        load_kb_snapshot(lang)
+    return len(local_indexes[lang])
 
 def get_total_documents_count() -> Dict[str, int]:
     """Get document count for both English and Arabic tables."""
@@ -319,41 +753,46 @@ def get_total_documents_count() -> Dict[str, int]:
     }
 
 def query_supabase(query: str) -> Optional[str]:
+    """Keyword lookup on the faqs full-text index; answer for the best hit, or None."""
     try:
-        # Detect language and use appropriate table
         lang = detect_lang(query)
-        table_name = get_table_name_for_language(lang)
-
-        query_processed = normalize_arabic(query) if lang == "ar" else query
-        search_results = (
-            supabase
-            .table(table_name)
-            .select("content, metadata, question, answer")
-            .ilike("content", f"%{query_processed}%")
-            .execute()
-        )
-        if getattr(search_results, "data", None) and search_results.data:
-            first = search_results.data[0]
-            return (
-                first.get("content")
-                or first.get("answer")
-                or first.get("metadata", {}).get("question", "")
-                or first.get("question")
-            )
+        resp = get_supabase().rpc(FAQ_SEARCH_RPC, {"query_text": query, "match_count": 1}).execute()
+        hits = lexical_hits_from_rows(resp.data or [])
+        if hits:
+            return hits[0].answer(output_language(lang)) or None
     except Exception as e:
         print(f"Primary fallback search failed: {e}")
     return None
 
-def debug_vector_search(query: str, k: int = 5) -> List[Dict[str, Any]]:
+async def alexical_search(query: str, k: int = 5) -> List[LexicalHit]:
+    """Full-text search over faqs via the indexed search RPC; [] while Supabase is failing."""
+    if kb_remote_breaker.is_open:
+        RAG_FALLBACKS.inc(stage="lexical_search")
+        return []
+    try:
+        client = await get_async_supabase()
+        with span("lexical_search"):
+            resp = await asyncio.wait_for(
+                client.rpc(FAQ_SEARCH_RPC, {"query_text": query, "match_count": k}).execute(),
+                KB_REMOTE_TIMEOUT,
+            )
+    except Exception as e:
+        kb_remote_breaker.record_failure()
+        log.warning(f"Lexical search failed: {e!r}")
+        RAG_FALLBACKS.inc(stage="lexical_search")
+        return []
+    kb_remote_breaker.record_success()
+    return lexical_hits_from_rows(resp.data or [])
+
+async def adebug_vector_search(query: str, k: int = 5) -> List[Dict[str, Any]]:
     try:
         # Detect language and use appropriate vectorstore
         lang = detect_lang(query)
-        vs = get_vectorstore_for_language(lang)
+        query_for_search = normalize_arabic(query) if lang == "ar" else query
 
-        docs: List[Document] = vs.similarity_search(query, k=k)
+        matches = await asimilarity_search(query_for_search, lang, k=k)
         results = []
-        for i, doc in enumerate(docs):
-            score = doc.metadata.get("score", 1.0)
+        for i, (doc, score) in enumerate(matches):
             results.append({
                 "rank": i + 1,
                 "score": score,
@@ -364,54 +803,532 @@ def debug_vector_search(query: str, k: int = 5) -> List[Dict[str, Any]]:
             })
         return results
     except Exception as e:
-        print(f"Debug vector search failed: {e}")
+        log.warning(f"Debug vector search failed: {e}")
         return []
 
-def get_rag_response(query: str, similarity_threshold: float = 0.3) -> str:
-    query_lower = query.strip().lower()
-    query_clean = query_lower.replace('?', '').replace('!', '').replace('.', '').strip()
+def debug_vector_search(query: str, k: int = 5) -> List[Dict[str, Any]]:
+    """Blocking variant of adebug_vector_search."""
+    return _run_blocking(adebug_vector_search(query, k=k))
+
+NO_ANSWER_MESSAGE = "I don't have this type of data or information. For more details, contact +966542924317."
+
+def suggest_questions(prefix: str, lang: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+    """FAQ questions completing the typed prefix, in the given or detected language."""
+    lang = lang or detect_lang(prefix)
+    with span("suggest"):
+        suggestions = suggest_index.suggest(prefix, lang=lang, limit=limit)
+    return [{"text": s.text, "faq_id": s.faq_id, "lang": s.lang} for s in suggestions]
+
+async def aroute_intent(query: str) -> Optional[str]:
+    """
+    Canned reply for greetings, small talk and count questions, or None.
 
-    if query_clean in SMALL_TALK:
-        print(f"Using small talk response for: '{query}'")
-        return SMALL_TALK[query_clean]
+    Replies are in the language the user wrote in (as before the intent
+    router), not forced to Arabic like FAQ answers.
+    """
+    with span("intent"):
+        match = intent_router.match(query)
+    if match is None:
+        return None
+    log.info(f"Matched intent '{match.intent.name}' for: '{query}'")
+    reply = match.intent.reply(match.lang)
+    if match.intent.action == "count_documents":
+        reply = reply.format(count=await aget_documents_count())
+    return reply
 
-    if is_simple_greeting(query):
-        print(f"Using greeting response for: '{query}'")
-        return "Hello! I'm here to help you with Tijarah360. How can I assist you today?"
+def _search_text(query: str, lang: str) -> str:
+    """Text that gets embedded for the query (shared by search and the semantic cache)."""
+    return normalize_arabic(query) if lang == "ar" else query
 
-    print(f"Performing vector search for: '{query}'")
+async def _asemantic_cache_key(query: str, lang: str) -> Optional[Tuple[List[float], Any]]:
+    """Query embedding and its top FAQ hit, or None when the local index cannot tell cheaply."""
+    index = local_indexes["ar" if lang == "ar" else "en"]
+    if not semantic_cache.enabled or VECTOR_INDEX_MODE != "local" or not index.ready:
+        return None
     try:
-        # Detect language and use appropriate vectorstore
+        vector = await aembed_query(_search_text(query, lang))
+    except Exception as e:
+        log.warning(f"Semantic cache skipped: {e}")
+        return None
+    hits = index.search(vector, 1)
+    return (vector, _vector_hit_key(hits[0][0], lang)) if hits else None
+
+async def alookup_semantic_cache(query: str, lang: str) -> Optional[str]:
+    """Stored answer for a paraphrase of an answered query with the same top FAQ hit, or None."""
+    key = await _asemantic_cache_key(query, lang)
+    if key is None:
+        return None
+    vector, top_hit = key
+    with span("semantic_cache"):
+        hit = semantic_cache.get(vector, lang, tag=top_hit)
+    if hit is None:
+        return None
+    log.info(f"Semantic cache hit ({hit.score:.3f}) for '{query}' ~ '{hit.key}'")
+    return hit.response
+
+async def astore_response(cache_key: str, query: str, response: str, lang: str, semantic: bool = True) -> None:
+    """Cache a final answer under its exact key and (unless semantic=False) its query embedding."""
+    await response_cache.aset(cache_key, response, lang)
+    if semantic:
+        # The embedding is already cached by the lookup or the vector search
+        key = await _asemantic_cache_key(query, lang)
+        if key is not None:
+            semantic_cache.set(key[0], cache_key, response, lang, tag=key[1])
+
+def _vector_hit_key(doc: Document, lang: str) -> Any:
+    """Fusion key for a vector hit: its FaqStore ID, or the content for rows without one."""
+    faq_id = faq_store.english_id(faq_id_from_document(doc), lang)
+    return faq_id if faq_id is not None else f"doc:{doc.page_content}"
+
+async def arerank(query: str, matches: List[Tuple[Document, float]]) -> Tuple[List[Tuple[Document, float]], bool]:
+    """Cross-encoder order for ambiguous candidates; returns (matches, reranked)."""
+    if not RERANKER_MODEL or not is_ambiguous([score for _, score in matches], RERANK_MARGIN):
+        return matches, False
+    try:
+        reranker = await registry.aget("reranker")
+        with span("rerank"):
+            ranked = await asyncio.to_thread(reranker.rerank, query, [doc for doc, _ in matches])
+    except Exception as e:
+        log.warning(f"Reranking failed: {e}")
+        RAG_FALLBACKS.inc(stage="rerank")
+        return matches, False
+    return ranked, True
+
+async def aretrieve_faq_answer(query: str, lang: str, similarity_threshold: Optional[float] = None) -> Optional[str]:
+    """
+    Hybrid FAQ retrieval; answer for the best hit, or None.
+
+    Exact question matches and confident keyword hits are answered without
+    embedding the query (akeyword_faq_answer); otherwise see avector_faq_answer.
+    """
+    answer, lexical = await akeyword_faq_answer(query, lang)
+    if answer is not None:
+        return answer
+    return await avector_faq_answer(query, lang, lexical, similarity_threshold)
+
+async def akeyword_faq_answer(query: str, lang: str) -> Tuple[Optional[str], Optional[List[LexicalHit]]]:
+    """
+    Answer from an exact question match or a confident keyword hit (no
+    embedding), plus the keyword hits. Keyword search only runs here when the
+    query is short enough to be answered by it; otherwise the hits are None
+    and avector_faq_answer fetches them alongside the vector search.
+    """
+    out_lang = output_language(lang)
+    query_key = normalize_query(query)
+
+    with span("exact_match"):
+        exact_id = faq_store.find_by_question(query_key, normalize_query)
+    exact_answer = await astored_answer(exact_id, out_lang)
+    if exact_answer:
+        log.info(f"Exact FAQ question match: {exact_id}")
+        RAG_ANSWERS.inc(source="exact")
+        return exact_answer, []
+
+    if not HYBRID_RETRIEVAL:
+        return None, []
+    tokens = query_key.split()
+    if not tokens or len(tokens) > LEXICAL_MAX_TOKENS:
+        return None, None
+    lexical = await alexical_search(query, k=HYBRID_CANDIDATES)
+    if is_confident_lexical(tokens, lexical, LEXICAL_MAX_TOKENS, LEXICAL_DOMINANCE):
+        top = lexical[0]
+        answer = await astored_answer(top.faq_id, out_lang) or top.answer(out_lang)
+        if answer:
+            log.info(f"Confident keyword match: {top.faq_id} (rank {top.rank:.3f})")
+            RAG_ANSWERS.inc(source="lexical")
+            return answer, lexical
+    return None, lexical
+
+async def avector_faq_answer(
+    query: str, lang: str, lexical: Optional[List[LexicalHit]], similarity_threshold: Optional[float] = None
+) -> Optional[str]:
+    """
+    Answer from the vector index, or None.
+
+    The top RETRIEVAL_K vector hits at or above the similarity threshold are
+    kept (reranked when the top two are close) and fused with the keyword hits
+    for the same FAQs; if no vector hit clears the threshold there is no answer.
+    Keyword hits not fetched yet (None) are searched concurrently.
+    """
+    if similarity_threshold is None:
+        similarity_threshold = RAG_SIMILARITY_THRESHOLD
+    out_lang = output_language(lang)
+
+    log.info(f"Using {'Arabic' if lang == 'ar' else 'English'} vectorstore (table: {get_table_name_for_language(lang)})")
+
+    if lexical is None and HYBRID_RETRIEVAL:
+        matches, lexical = await asyncio.gather(
+            asimilarity_search(_search_text(query, lang), lang, k=RETRIEVAL_K),
+            alexical_search(query, k=HYBRID_CANDIDATES),
+        )
+    else:
+        matches = await asimilarity_search(_search_text(query, lang), lang, k=RETRIEVAL_K)
+    lexical = lexical or []
+    confident = [(doc, score) for doc, score in matches if score >= similarity_threshold]
+    if not confident:
+        if matches:
+            log.info(f"Best vector match {matches[0][1]:.3f} is below the {similarity_threshold} threshold")
+        RAG_FALLBACKS.inc(stage="below_threshold")
+        return None
+    confident, reranked = await arerank(query, confident)
+
+    docs_by_key = {}
+    for doc, _score in confident:
+        docs_by_key.setdefault(_vector_hit_key(doc, lang), doc)
+    # Keyword hits only reorder candidates that cleared the threshold, and a
+    # cross-encoder order (when one ran) is kept as is
+    hits_by_id = {hit.faq_id: hit for hit in lexical if hit.faq_id in docs_by_key}
+    if reranked or not hits_by_id:
+        best = next(iter(docs_by_key))
+    else:
+        best = reciprocal_rank_fusion([list(docs_by_key), list(hits_by_id)])[0][0]
+    log.info(f"Found FAQ match{' (reranked)' if reranked else ''}: {docs_by_key[best].page_content[:100]}...")
+
+    # Prefer the stored answer for the matched FAQ over runtime translation
+    response = await astored_answer(best, out_lang) if isinstance(best, int) else None
+    if response is None and best in hits_by_id:
+        response = hits_by_id[best].answer(out_lang) or None
+    if response is None:
+        response = await aensure_arabic_output(docs_by_key[best].page_content)
+    RAG_ANSWERS.inc(source="vector")
+    return response
+
+def build_llm_messages(query: str, lang: str) -> List[HumanMessage]:
+    """Prompt for the Groq fallback."""
+    system_prompt = (
+        "You are a helpful assistant. Reply concisely in Arabic."
+        if lang == "ar"
+        else "You are a helpful assistant. Reply concisely in English."
+    )
+    return [HumanMessage(content=f"{system_prompt}\n\nUser: {query}")]
+
+async def aget_rag_response(query: str, similarity_threshold: Optional[float] = None) -> str:
+    """Answer one query; vector hits below similarity_threshold (default RAG_SIMILARITY_THRESHOLD) are ignored."""
+    with span("total"):
+        response, source = await _aget_rag_response(query, similarity_threshold)
+    if source != "retrieval":
+        # Retrieval answers are counted by kind in aretrieve_faq_answer
+        RAG_ANSWERS.inc(source=source)
+    log.info(f"RAG answered from {source}: {stage_summary()}")
+    return response
+
+async def _aget_rag_response(query: str, similarity_threshold: Optional[float] = None) -> Tuple[str, str]:
+    """Answer plus the source it came from (intent, cache, semantic_cache, retrieval, llm, no_answer)."""
+    canned = await aroute_intent(query)
+    if canned is not None:
+        return canned, "intent"
+
+    # Cached answers were chosen at the default threshold; a caller's own threshold bypasses them
+    use_cache = similarity_threshold is None or similarity_threshold == RAG_SIMILARITY_THRESHOLD
+    cache_key = normalize_query(query)
+    if use_cache:
+        with span("response_cache"):
+            cached = await response_cache.aget(cache_key)
+        if cached is not None:
+            log.info(f"Using cached response for: '{query}'")
+            return cached, "cache"
+
+    # Detected once; routing, the LLM prompt and cache entries all reuse it
+    with span("detect_lang"):
         lang = detect_lang(query)
-        vs = get_vectorstore_for_language(lang)
-        print(f"Using {'Arabic' if lang == 'ar' else 'English'} vectorstore (table: {get_table_name_for_language(lang)})")
 
-        query_for_search = normalize_arabic(query) if lang == "ar" else query
-        docs = vs.similarity_search(query_for_search, k=1)
-        if docs:
-            print(f"Found FAQ match: {docs[0].page_content[:100]}...")
-            return ensure_arabic_output(docs[0].page_content)
+    log.info(f"Performing vector search for: '{query}'")
+    try:
+        response, lexical = await akeyword_faq_answer(query, lang)
+        if response is not None:
+            if use_cache:
+                await astore_response(cache_key, query, response, lang, semantic=False)
+            return response, "retrieval"
+        similar = await alookup_semantic_cache(query, lang) if use_cache else None
+        if similar is not None:
+            return similar, "semantic_cache"
+        response = await avector_faq_answer(query, lang, lexical, similarity_threshold)
+        if response is not None:
+            if use_cache:
+                await astore_response(cache_key, query, response, lang)
+            return response, "retrieval"
     except Exception as e:
-        print(f"Vector search failed: {e}")
+        log.warning(f"Vector search failed: {e}")
+        RAG_FALLBACKS.inc(stage="retrieval")
 
     try:
-        lang = detect_lang(query)
-        system_prompt = (
-            "You are a helpful assistant. Reply concisely in Arabic."
-            if lang == "ar"
-            else "You are a helpful assistant. Reply concisely in English."
-        )
-        messages = [HumanMessage(content=f"{system_prompt}\n\nUser: {query}")]
-        llm_response = llm.invoke(messages)
+        llm = await registry.aget("llm")
+        with span("llm"):
+            llm_response = await llm.ainvoke(build_llm_messages(query, lang))
+        record_llm_usage(llm_response, mode="invoke")
         if llm_response and len(str(llm_response.content).strip()) > 0:
             response_content = str(llm_response.content)
             if not response_content.startswith("ID:"):
-                print(f"Using Groq LLM response: {response_content[:100]}...")
-                return ensure_arabic_output(response_content)
+                log.info(f"Using Groq LLM response: {response_content[:100]}...")
+                response = await aensure_arabic_output(response_content)
+                if use_cache:
+                    await astore_response(cache_key, query, response, lang)
+                return response, "llm"
+    except Exception as e:
+        log.warning(f"Groq LLM failed: {e}")
+        LLM_REQUESTS.inc(mode="invoke", outcome="error")
+        RAG_FALLBACKS.inc(stage="llm")
+
+    return await aensure_arabic_output(NO_ANSWER_MESSAGE), "no_answer"
+
+async def aget_rag_responses(queries: List[str]) -> List[Dict[str, Any]]:
+    """
+    Resolve a batch of queries (bulk ticket triage); results keep the input order.
+
+    Intents, cached answers and exact question matches are settled per query.
+    The rest are grouped by language, embedded in one model call per group and
+    searched with one matrix product, and every answer that still needs
+    machine translation is translated once for the whole batch. There is no
+    LLM fallback: a query without a hit at or above RAG_SIMILARITY_THRESHOLD
+    comes back with source "no_answer" (and the best score it got).
+    """
+    results: List[Dict[str, Any]] = [
+        {"query": query, "response": None, "source": None, "score": None, "table": None, "faq_id": None}
+        for query in queries
+    ]
+    groups: Dict[str, List[int]] = {}
+    # Cache key and detected language of every query that reached retrieval
+    keys: Dict[int, Tuple[str, str]] = {}
+    # English answer (or matched row text) to show when there is no stored
+    # answer in the output language
+    untranslated: Dict[int, str] = {}
+    with span("total"):
+        for i, query in enumerate(queries):
+            canned = await aroute_intent(query)
+            if canned is not None:
+                results[i].update(response=canned, source="intent")
+                continue
+            cache_key = normalize_query(query)
+            cached = await response_cache.aget(cache_key)
+            if cached is not None:
+                results[i].update(response=cached, source="cache")
+                continue
+            with span("detect_lang"):
+                lang = detect_lang(query)
+            keys[i] = (cache_key, lang)
+            exact_id = faq_store.find_by_question(cache_key, normalize_query)
+            exact_answer = faq_store.answer_for(exact_id, output_language(lang))
+            if exact_answer is None and exact_id is not None and faq_store.answer_for(exact_id, "en"):
+                # No confirmed Arabic answer: translated with the batch below
+                results[i].update(source="exact", score=1.0, table=FAQ_TABLE_NAME, faq_id=exact_id)
+                untranslated[i] = faq_store.answer_for(exact_id, "en")
+                continue
+            if exact_answer:
+                results[i].update(response=exact_answer, source="exact", score=1.0, table=FAQ_TABLE_NAME, faq_id=exact_id)
+                continue
+            groups.setdefault(lang, []).append(i)
+
+        for lang, indices in groups.items():
+            try:
+                matches = await asimilarity_search_many([_search_text(queries[i], lang) for i in indices], lang, k=1)
+            except Exception as e:
+                log.warning(f"Batch vector search failed for {lang}: {e}")
+                RAG_FALLBACKS.inc(stage="retrieval")
+                matches = [[] for _ in indices]
+            for i, hits in zip(indices, matches):
+                if not hits:
+                    continue
+                doc, score = hits[0]
+                faq_id = faq_store.english_id(faq_id_from_document(doc), lang)
+                results[i].update(score=score, table=get_table_name_for_language(lang), faq_id=faq_id)
+                if score < RAG_SIMILARITY_THRESHOLD:
+                    # Reported with its score so callers can see how close it was
+                    continue
+                results[i]["source"] = "vector"
+                answer = faq_store.answer_for(faq_id, output_language(lang))
+                if answer is None:
+                    untranslated[i] = faq_store.answer_for(faq_id, "en") or doc.page_content
+                else:
+                    results[i]["response"] = answer
+
+        # Each distinct text is translated once, in one batched call
+        to_translate = list(dict.fromkeys(t for t in untranslated.values() if _needs_translation(t)))
+        translated: Dict[str, str] = {}
+        if to_translate:
+            with span("translate"):
+                translated = dict(zip(to_translate, await atranslate_many_to_arabic(to_translate)))
+        for i, text in untranslated.items():
+            results[i]["response"] = translated.get(text, text)
+
+        no_answer = None
+        for i, result in enumerate(results):
+            if result["response"] is None:
+                no_answer = no_answer or await aensure_arabic_output(NO_ANSWER_MESSAGE)
+                result.update(response=no_answer, source="no_answer")
+            elif i in keys:
+                cache_key, lang = keys[i]
+                await response_cache.aset(cache_key, result["response"], lang)
+            RAG_ANSWERS.inc(source=result["source"])
+    log.info(f"RAG batch of {len(queries)} answered: {stage_summary()}")
+    return results
+
+# A sentence is everything up to and including its terminator(s) and trailing space
+_SENTENCE_RE = re.compile(r"[^.!?؟\n]*[.!?؟\n]+\s*")
+
+async def atranslate_sentence(sentence: str) -> str:
+    """aensure_arabic_output for one sentence, keeping its surrounding whitespace."""
+    core = sentence.strip()
+    if not core:
+        return sentence
+    start = sentence.index(core)
+    return sentence[:start] + await aensure_arabic_output(core) + sentence[start + len(core):]
+
+def split_complete_sentences(buffer: str) -> Tuple[List[str], str]:
+    """Split streamed text into finished sentences and the unfinished remainder."""
+    sentences: List[str] = []
+    end = 0
+    for match in _SENTENCE_RE.finditer(buffer):
+        sentences.append(match.group())
+        end = match.end()
+    return sentences, buffer[end:]
+
+async def astream_rag_response(query: str) -> AsyncIterator[Dict[str, str]]:
+    """
+    Streaming variant of aget_rag_response yielding {"event", "data"} dicts.
+
+    Intent, cached and FAQ answers arrive as a single "answer" event; Groq
+    output arrives as "token" events, translated sentence by sentence when
+    Arabic output is forced.
+    """
+    canned = await aroute_intent(query)
+    if canned is not None:
+        RAG_ANSWERS.inc(source="intent")
+        yield {"event": "answer", "data": canned}
+        return
+
+    cache_key = normalize_query(query)
+    with span("response_cache"):
+        cached = await response_cache.aget(cache_key)
+    if cached is not None:
+        log.info(f"Using cached response for: '{query}'")
+        RAG_ANSWERS.inc(source="cache")
+        yield {"event": "answer", "data": cached}
+        return
+
+    with span("detect_lang"):
+        lang = detect_lang(query)
+
+    log.info(f"Performing vector search for: '{query}'")
+    try:
+        response, lexical = await akeyword_faq_answer(query, lang)
+        semantic = response is None
+        if semantic:
+            similar = await alookup_semantic_cache(query, lang)
+            if similar is not None:
+                RAG_ANSWERS.inc(source="semantic_cache")
+                yield {"event": "answer", "data": similar}
+                return
+            response = await avector_faq_answer(query, lang, lexical)
+        if response is not None:
+            await astore_response(cache_key, query, response, lang, semantic=semantic)
+            log.info(f"RAG answered from retrieval: {stage_summary()}")
+            yield {"event": "answer", "data": response}
+            return
+    except Exception as e:
+        log.warning(f"Vector search failed: {e}")
+        RAG_FALLBACKS.inc(stage="retrieval")
+
+    parts: List[str] = []
+    try:
+        buffer = ""
+        llm = await registry.aget("llm")
+        started = time.perf_counter()
+        streamed = None
+        async for chunk in llm.astream(build_llm_messages(query, lang)):
+            # Chunks add up to one message carrying the usage metadata
+            if streamed is None:
+                streamed = chunk
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+            else:
+                streamed = streamed + chunk
+            token = str(chunk.content or "")
+            if not token:
+                continue
+            if not FORCE_ARABIC_OUTPUT:
+                parts.append(token)
+                yield {"event": "token", "data": token}
+                continue
+            buffer += token
+            sentences, buffer = split_complete_sentences(buffer)
+            for sentence in sentences:
+                text = await atranslate_sentence(sentence)
+                parts.append(text)
+                yield {"event": "token", "data": text}
+        if buffer.strip():
+            text = await atranslate_sentence(buffer)
+            parts.append(text)
+            yield {"event": "token", "data": text}
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_stream")
+        record_llm_usage(streamed, mode="stream")
+        if parts:
+            log.info(f"Streamed Groq LLM response: {''.join(parts)[:100]}...")
+            RAG_ANSWERS.inc(source="llm")
+            await astore_response(cache_key, query, "".join(parts), lang)
+            log.info(f"RAG answered from llm: {stage_summary()}")
+            return
     except Exception as e:
-        print("Groq LLM failed:", e)
+        log.warning(f"Groq LLM failed: {e}")
+        LLM_REQUESTS.inc(mode="stream", outcome="error")
+        RAG_FALLBACKS.inc(stage="llm")
+        if parts:
+            return
+
+    RAG_ANSWERS.inc(source="no_answer")
+    yield {"event": "answer", "data": await aensure_arabic_output(NO_ANSWER_MESSAGE)}
+
+def get_rag_response(query: str, similarity_threshold: Optional[float] = None) -> str:
+    """Blocking variant of aget_rag_response for scripts and tests."""
+    return _run_blocking(aget_rag_response(query, similarity_threshold))
+
+# Counters owned by the services, read when /metrics is scraped
+metrics.collector(
+    "response_cache_requests_total", "Response cache lookups",
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses}, ("result",),
+)
+metrics.collector(
+    "semantic_cache_requests_total", "Semantic (paraphrase) cache lookups",
+    lambda: {("hit",): semantic_cache.hits, ("miss",): semantic_cache.misses}, ("result",),
+)
+metrics.collector(
+    "translation_cache_requests_total", "Translation cache lookups",
+    lambda: {("hit",): translator.cache_hits, ("miss",): translator.cache_misses}, ("result",),
+)
+metrics.collector(
+    "translate_api_requests_total", "Google Translate API calls",
+    lambda: {(): translator.api_requests},
+)
+metrics.collector(
+    "translate_failures_total", "Texts left untranslated, by reason",
+    lambda: {(reason,): count for reason, count in translator.failures.items()}, ("reason",),
+)
+metrics.collector(
+    "translate_breaker_open", "1 while translation is paused after failures",
+    lambda: {(): float(translator.breaker.is_open)}, metric_type="gauge",
+)
+
+def _embedding_stats() -> Dict[Tuple[str, ...], float]:
+    # Only report once the model exists; scraping must not load it
+    if not registry.is_ready("embeddings"):
+        return {}
+    service = get_embeddings()
+    return {("hit",): service.cache_hits, ("miss",): service.cache_misses}
+
+metrics.collector("embedding_cache_requests_total", "Embedding cache lookups", _embedding_stats, ("result",))
+metrics.collector(
+    "kb_remote_breaker_open", "1 while vector search is served from the KB snapshot",
+    lambda: {(): float(kb_remote_breaker.is_open)}, metric_type="gauge",
+)
+metrics.collector(
+    "vector_index_rows", "Rows in the local vector index",
+    lambda: {(lang,): len(index) for lang, index in local_indexes.items()}, ("lang",), metric_type="gauge",
+)
 
-    return ensure_arabic_output("I don't have this type of data or information. For more details, contact +966542924317.")
+# Startup work that is not a client/model but should be timed and reported
+registry.register("faq_answers", load_faq_answers)
+registry.register("translation_cache", warm_translation_cache)
+if VECTOR_INDEX_MODE == "local" or KB_SNAPSHOT_DIR:
+    registry.register("vector_index_en", lambda: refresh_local_index("en"))
+    registry.register("vector_index_ar", lambda: refresh_local_index("ar"))
 
 # -------------------------------
 # Example usage
@@ -1,13 +1,63 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import chatbot and Supabase-backed RAG logic
-from chatbot import get_chatbot_response
-from langchain_chain import get_rag_response, create_and_store_embedding, get_documents_count, debug_vector_search
+from chatbot import aget_chatbot_response, new_session_id
+from langchain_chain import (
+    aget_rag_response,
+    aget_rag_responses,
+    astream_rag_response,
+    create_and_store_embedding,
+    aget_documents_count,
+    adebug_vector_search,
+    aclose_async_clients,
+    refresh_local_indexes_periodically,
+    suggest_questions,
+    VECTOR_INDEX_MODE,
+)
+from observability import HTTP_REQUEST_SECONDS, metrics, start_trace
+from resources import registry
+
+# Components that must be up before the instance takes chat traffic
+REQUIRED_COMPONENTS = ("supabase", "embeddings", "llm")
+
+# Upper bound on queries per /rag_chat/batch request
+RAG_BATCH_MAX_QUERIES = int(os.getenv("RAG_BATCH_MAX_QUERIES", "500"))
+
+async def log_document_count():
+    # ✅ Log Supabase document count on startup
+    count = await aget_documents_count()
+    print(f"✅ Supabase has {count} documents in the vector table.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build models/clients, load caches and indexes in parallel (timed per component)
+    await asyncio.gather(registry.warm_up(), log_document_count())
+
+    # Keep the in-process vector indexes fresh in the background
+    index_refresh_task = None
+    if VECTOR_INDEX_MODE == "local":
+        index_refresh_task = asyncio.create_task(refresh_local_indexes_periodically())
+
+    yield
+
+    # Release pooled async clients on shutdown
+    if index_refresh_task is not None:
+        index_refresh_task.cancel()
+    await aclose_async_clients()
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for frontend requests
 app.add_middleware(
@@ -18,15 +68,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Log Supabase document count on startup
-@app.on_event("startup")
-def startup_event():
-    count = get_documents_count()
-    print(f"✅ Supabase has {count} documents in the vector table.")
+# Per-request trace ID (taken from X-Request-ID when the caller sends one);
+# every log line and stage span of the request carries it
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    trace_id = start_trace(request.headers.get("x-request-id"))
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        path=getattr(route, "path", "unmatched"),
+        status=str(response.status_code),
+    )
+    response.headers["X-Request-ID"] = trace_id
+    return response
 
 # Request models
 class ChatRequest(BaseModel):
     query: str
+    # /chat keeps conversation history per session; omit to start a new one
+    session_id: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=RAG_BATCH_MAX_QUERIES)
 
 class EmbeddingRequest(BaseModel):
     text: str
@@ -37,49 +103,92 @@ class EmbeddingRequest(BaseModel):
 def read_root():
     return {"message": "Tijarah360 AI Assistant is ready!"}
 
+# Readiness: which components are initialised and how long each took
+@app.get("/ready")
+def ready_endpoint():
+    components = registry.status()
+    ready = all(registry.is_ready(name) for name in REQUIRED_COMPONENTS)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "components": components},
+    )
+
+
+# Prometheus scrape target: stage latencies, cache hit rates, fallbacks, LLM usage
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 
 # Count documents in Supabase vector table
 @app.get("/count")
-def count_endpoint():
-    count = get_documents_count()
+async def count_endpoint():
+    count = await aget_documents_count()
     return {"count": count}
 
-# Simple chatbot (LLM-only)
+# Conversational chatbot over the FAQ table; send the returned session_id back
+# to continue the conversation
 @app.post("/chat")
-def chat_endpoint(req: ChatRequest):
-    reply = get_chatbot_response(req.query)
-    return {"response": reply}
+async def chat_endpoint(req: ChatRequest):
+    session_id = req.session_id or new_session_id()
+    reply = await aget_chatbot_response(req.query, session_id)
+    return {"response": reply, "session_id": session_id}
 
-# RAG-based chatbot using Supabase
+# RAG-based chatbot using Supabase; greetings and count questions are
+# answered by the intent router (intents.json) before any retrieval
 @app.post("/rag_chat")
-def rag_chat_endpoint(req: ChatRequest):
-    user_query = req.query.strip().lower()
-
-    # Special case: ask about document count
-    if user_query in [
-        "how many articles are loaded",
-        "how many documents in the database",
-        "how many entries are in the knowledge base",
-        "how many issues are loaded"
-    ]:
-        count = get_documents_count()
-        return {"response": f"There are currently {count} articles loaded into the system."}
-
-    # Default response from Supabase vector search
-    reply = get_rag_response(req.query)
+async def rag_chat_endpoint(req: ChatRequest):
+    reply = await aget_rag_response(req.query)
     return {"response": reply}
 
+# Typeahead: FAQ questions (EN + AR) completing what the user has typed so far.
+# Picking one sends an exact FAQ question, which skips vector search and the LLM.
+@app.get("/suggest")
+async def suggest_endpoint(
+    q: str = Query("", max_length=200),
+    lang: Optional[str] = Query(None, pattern="^(en|ar)$"),
+    limit: int = Query(5, ge=1, le=20),
+):
+    return {"query": q, "suggestions": suggest_questions(q, lang=lang, limit=limit)}
+
+# Bulk resolution (support tooling): one result per query, in input order, with
+# the answer source, match score and table it came from. No LLM fallback.
+@app.post("/rag_chat/batch")
+async def rag_chat_batch_endpoint(req: BatchChatRequest):
+    results = await aget_rag_responses(req.queries)
+    return {"results": results}
+
+def sse_event(event: str, text: str) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps({'text': text}, ensure_ascii=False)}\n\n"
+
+# Streaming RAG chat (Server-Sent Events): FAQ hits arrive as one "answer"
+# event, Groq output as "token" events, followed by a final "done" event
+@app.post("/rag_chat/stream")
+async def rag_chat_stream_endpoint(req: ChatRequest):
+    async def event_stream():
+        async for event in astream_rag_response(req.query):
+            yield sse_event(event["event"], event["data"])
+        yield sse_event("done", "")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # Add a new document to Supabase vector store
 @app.post("/create-embedding")
-def create_embedding_endpoint(req: EmbeddingRequest):
-    result = create_and_store_embedding(req.text, req.metadata)
+async def create_embedding_endpoint(req: EmbeddingRequest):
+    # Embedding + insert are blocking; keep them off the event loop
+    result = await run_in_threadpool(create_and_store_embedding, req.text, req.metadata)
     return {"embedding_result": result}
 
 # Debug endpoint to test vector similarity search
 @app.post("/debug-search")
-def debug_search_endpoint(req: ChatRequest):
+async def debug_search_endpoint(req: ChatRequest):
     """Debug endpoint to see what's happening with vector similarity search"""
-    results = debug_vector_search(req.query, k=5)
+    results = await adebug_vector_search(req.query, k=5)
     return {
         "query": req.query,
         "results": results,
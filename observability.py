@@ -0,0 +1,246 @@
+"""
+Request tracing, per-stage timings and Prometheus-style metrics.
+
+• ``trace_id_var`` carries a per-request trace ID (set by the HTTP
+  middleware in main.py, echoed as ``X-Request-ID``) into every log line
+• ``span("embed")`` times one pipeline stage into the
+  ``rag_stage_seconds`` histogram and the request's span summary
+• ``metrics.render()`` produces the text exposition format for /metrics;
+  counters kept on the services themselves (cache hits etc.) are read at
+  scrape time through collectors
+• logging goes through a QueueHandler, so the request path only enqueues
+  records and a background thread does the actual writes
+
+Metrics are per process; with several uvicorn workers scrape each one or
+aggregate by instance label.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Latency buckets in seconds: sub-ms cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+# stage -> accumulated seconds for the current request (see span / stage_summary)
+_spans_var: ContextVar[Optional[Dict[str, float]]] = ContextVar("spans", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def start_trace(trace_id: Optional[str] = None) -> str:
+    """Begin a request trace in the current context; returns the trace ID."""
+    trace_id = trace_id or new_trace_id()
+    trace_id_var.set(trace_id)
+    _spans_var.set({})
+    return trace_id
+
+
+def stage_summary() -> str:
+    """'stage=1.2ms ...' for the spans recorded in the current request."""
+    spans = _spans_var.get() or {}
+    return " ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in spans.items())
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(self.labelnames, k)} {v:g}" for k, v in items)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            index = bisect_left(self.buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", f"{bound:g}")])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and scrape-time collectors; renders the exposition text."""
+
+    def __init__(self):
+        self._metrics: List[object] = []
+        # name -> (type, help, fn returning {label tuple: value}, label names)
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Dict[LabelValues, float]], Tuple[str, ...]]] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+        metric_type: str = "counter",
+    ) -> None:
+        """Expose values owned elsewhere (e.g. cache hit counters) at scrape time."""
+        self._collectors[name] = (metric_type, help_text, fn, tuple(labelnames))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        for name, (metric_type, help_text, fn, labelnames) in self._collectors.items():
+            try:
+                values = fn()
+            except Exception as e:
+                log.warning("Metrics collector %s failed: %s", name, e)
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(f"{name}{_format_labels(labelnames, k)} {v:g}" for k, v in sorted(values.items()))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram("rag_stage_seconds", "Time spent in each RAG pipeline stage", ("stage",))
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_seconds", "HTTP request latency", ("method", "path", "status"))
+RAG_ANSWERS = metrics.counter("rag_answers_total", "Answers by source", ("source",))
+RAG_FALLBACKS = metrics.counter("rag_fallbacks_total", "Pipeline stages that failed or fell back", ("stage",))
+LLM_REQUESTS = metrics.counter("llm_requests_total", "Groq LLM calls", ("mode", "outcome"))
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Groq LLM token usage", ("kind",))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage (works around sync code and awaits alike)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        spans = _spans_var.get()
+        if spans is not None:
+            spans[stage] = spans.get(stage, 0.0) + elapsed
+
+
+def record_llm_usage(message, mode: str) -> None:
+    """Count tokens from a LangChain message's usage_metadata, when present."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            LLM_TOKENS.inc(usage[kind], kind=kind.replace("_tokens", ""))
+    LLM_REQUESTS.inc(mode=mode, outcome="ok")
+
+
+# -------------------------------
+# Non-blocking logging
+# -------------------------------
+class TraceIdFilter(logging.Filter):
+    """Stamp records with the trace ID; runs in the caller's context, before queueing."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+log = logging.getLogger("tijarah360")
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Route the app logger through a queue drained by a background thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(TraceIdFilter())
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(trace_id)s] %(message)s"))
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    log.addHandler(queue_handler)
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+
+
+setup_logging()
@@ -28,6 +28,13 @@ interface Translations {
 }
 
 const API_URL = process.env.NEXT_PUBLIC_BACKEND_API_URL || "http://127.0.0.1:8000/rag_chat";
+// Typeahead over the knowledge base; lives next to /rag_chat on the same backend
+const SUGGEST_URL = `${API_URL.replace(/\/rag_chat\/?$/, "")}/suggest`;
+const SUGGEST_DEBOUNCE_MS = 120;
+
+interface SuggestResponse {
+  suggestions: { text: string; faq_id: number | null; lang: Language }[];
+}
 
 
 // Translations with proper typing
@@ -126,20 +133,43 @@ export default function ChatPage() {
     }
   }, [messages, loading, isMounted]);
 
-  // Autocomplete logic
+  // Autocomplete: FAQ questions from the backend prefix index; the built-in
+  // list is only used when the backend cannot be reached
   useEffect(() => {
-    if (isMounted && input.trim() && input.length > 1) {
-      const filtered = t.autocomplete.filter(suggestion =>
-        suggestion.toLowerCase().includes(input.toLowerCase())
-      );
-      setFilteredSuggestions(filtered.slice(0, 5));
-      setShowAutocomplete(filtered.length > 0);
-    } else {
+    setActiveSuggestionIndex(-1);
+    if (!isMounted || !input.trim() || input.length <= 1) {
       setShowAutocomplete(false);
       setFilteredSuggestions([]);
+      return;
     }
-    setActiveSuggestionIndex(-1);
-  }, [input, t.autocomplete, isMounted]);
+
+    const show = (items: string[]) => {
+      setFilteredSuggestions(items.slice(0, 5));
+      setShowAutocomplete(items.length > 0);
+    };
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: input, lang: language, limit: "5" });
+        const res = await fetch(`${SUGGEST_URL}?${params}`, { signal: controller.signal });
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const data: SuggestResponse = await res.json();
+        show(data.suggestions.map((s) => s.text));
+      } catch {
+        if (controller.signal.aborted) return;
+        show(
+          t.autocomplete.filter((suggestion) =>
+            suggestion.toLowerCase().includes(input.toLowerCase())
+          )
+        );
+      }
+    }, SUGGEST_DEBOUNCE_MS);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [input, language, t.autocomplete, isMounted]);
 
   const sendMessage = async (e?: React.FormEvent) => {
     e?.preventDefault();
@@ -152,17 +182,54 @@ export default function ChatPage() {
     setShowAutocomplete(false);
 
     try {
-      const res = await fetch(API_URL, {
+      // Server-Sent Events: "answer" carries a full reply, "token" a streamed delta
+      const res = await fetch(`${API_URL}/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ query: input }),
       });
-
-      const data = await res.json();
-      setMessages((m) => [
-        ...m,
-        { role: "assistant", content: data.response || "(no response)" },
-      ]);
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let reply = "";
+      let started = false;
+
+      const showReply = (content: string) => {
+        const replaceLast = started;
+        started = true;
+        setMessages((m) =>
+          replaceLast
+            ? [...m.slice(0, -1), { role: "assistant", content }]
+            : [...m, { role: "assistant", content }]
+        );
+        setLoading(false);
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split("\n\n");
+        buffer = events.pop() ?? "";
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!event || data === undefined) continue;
+          const text: string = JSON.parse(data).text ?? "";
+          if (event === "answer") {
+            reply = text;
+            showReply(reply);
+          } else if (event === "token") {
+            reply += text;
+            showReply(reply);
+          }
+        }
+      }
+
+      if (!started) showReply("(no response)");
     } catch {
       setMessages((m) => [
         ...m,
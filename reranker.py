@@ -0,0 +1,43 @@
+"""
+Optional cross-encoder reranker for ambiguous retrievals.
+
+The bi-encoder scores a query against every row cheaply, but neighbouring
+FAQs (invoicing vs. payments, say) can end up within a hair of each other.
+A cross-encoder reads the query and each candidate together and separates
+them much better, at the price of one forward pass per candidate, so it is
+only run over the few retrieved candidates and only when their top scores
+are close (see is_ambiguous).
+
+Needs ``sentence-transformers``; the model is chosen with RERANKER_MODEL
+(e.g. cross-encoder/mmarco-mMiniLMv2-L12-H384-v1, which covers Arabic).
+"""
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+from langchain.schema import Document
+
+
+def is_ambiguous(scores: Sequence[float], margin: float) -> bool:
+    """True when the best two candidates score within ``margin`` of each other."""
+    return len(scores) > 1 and scores[0] - scores[1] < margin
+
+
+class CrossEncoderReranker:
+    """Scores (query, candidate) pairs with a sentence-transformers CrossEncoder."""
+
+    def __init__(self, model_name: str, max_length: int = 256):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length)
+        self.calls = 0
+
+    def rerank(self, query: str, documents: Sequence[Document]) -> List[Tuple[Document, float]]:
+        """Documents ordered by cross-encoder score (logits, not cosine), best first."""
+        if not documents:
+            return []
+        scores = self.model.predict([(query, doc.page_content) for doc in documents])
+        self.calls += 1
+        return sorted(zip(documents, (float(s) for s in scores)), key=lambda pair: pair[1], reverse=True)
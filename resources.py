@@ -0,0 +1,111 @@
+"""
+Lifecycle-managed registry for expensive backend resources.
+
+Models and API clients are registered with a factory instead of being built at
+import time. Each one is created on first use (thread-safe), and the FastAPI
+lifespan hook warms them all up in parallel. The registry records how long
+each component took and powers the /ready endpoint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass
+class Resource:
+    name: str
+    factory: Callable[[], Any]
+    warm: bool = True
+    instance: Any = None
+    ready: bool = False
+    error: Optional[str] = None
+    init_seconds: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ResourceRegistry:
+    """Name -> lazily created resource."""
+
+    def __init__(self):
+        self._resources: Dict[str, Resource] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], warm: bool = True) -> None:
+        """Register a factory; ``warm=False`` keeps it out of startup warm-up."""
+        self._resources[name] = Resource(name=name, factory=factory, warm=warm)
+
+    def get(self, name: str) -> Any:
+        """Return the resource, creating it on first use."""
+        resource = self._resources[name]
+        if resource.ready:
+            return resource.instance
+        with resource.lock:
+            if not resource.ready:
+                start = time.perf_counter()
+                try:
+                    resource.instance = resource.factory()
+                except Exception as e:
+                    resource.error = str(e)
+                    raise
+                finally:
+                    resource.init_seconds = time.perf_counter() - start
+                resource.error = None
+                resource.ready = True
+        return resource.instance
+
+    async def aget(self, name: str) -> Any:
+        """Async get(); a first-time initialisation runs in a worker thread."""
+        resource = self._resources[name]
+        if resource.ready:
+            return resource.instance
+        return await asyncio.to_thread(self.get, name)
+
+    def is_ready(self, name: str) -> bool:
+        resource = self._resources.get(name)
+        return bool(resource and resource.ready)
+
+    def reset(self, name: str) -> None:
+        """Forget an instance so the next get() builds a fresh one."""
+        resource = self._resources[name]
+        with resource.lock:
+            resource.instance = None
+            resource.ready = False
+
+    async def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Initialise resources in parallel worker threads; failures are recorded, not raised."""
+        targets: List[str] = list(names) if names is not None else [
+            r.name for r in self._resources.values() if r.warm
+        ]
+
+        async def warm(name: str) -> None:
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception as e:
+                print(f"❌ {name} failed to initialise: {e}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(warm(name) for name in targets))
+        total = time.perf_counter() - start
+        for name in targets:
+            resource = self._resources[name]
+            state = "ready" if resource.ready else "failed"
+            print(f"⏱️ {name}: {state} in {resource.init_seconds or 0:.2f}s")
+        print(f"⏱️ Warm-up finished in {total:.2f}s")
+        return self.status()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            r.name: {
+                "ready": r.ready,
+                "init_seconds": round(r.init_seconds, 3) if r.init_seconds is not None else None,
+                "error": r.error,
+            }
+            for r in self._resources.values()
+        }
+
+
+registry = ResourceRegistry()
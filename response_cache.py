@@ -0,0 +1,281 @@
+"""
+Response cache placed in front of the RAG pipeline.
+
+Entries are keyed by the normalised query and evicted by LRU + TTL. Every
+entry remembers which language table answered it and that table's
+generation; a write to the table bumps the generation so older entries stop
+matching. An optional shared backend (Redis) lets several workers share hits
+and invalidations.
+
+SemanticCache sits behind it for paraphrases: it keeps the embedding of
+each answered query and returns the stored response for a new query in the
+same language whose cosine similarity clears a threshold. It is per worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+# Request-path messages go through the app's queued logger (see observability.py)
+log = logging.getLogger("tijarah360")
+
+
+class CacheBackend(Protocol):
+    """Minimal key-value interface a shared backend must provide."""
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    def incr(self, key: str) -> int: ...
+
+
+class RedisCacheBackend:
+    """Shared backend on Redis; requires the optional ``redis`` package."""
+
+    def __init__(self, url: str, socket_timeout: float = 0.05):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RESPONSE_CACHE_URL is set but the 'redis' package is not installed") from exc
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=socket_timeout, decode_responses=True
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self._client.set(key, value, ex=max(1, int(ttl)))
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+
+class ResponseCache:
+    """LRU + TTL cache of final responses with per-language invalidation."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        backend: Optional[CacheBackend] = None,
+        namespace: str = "rag:",
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str, int, str]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _generation(self, lang: str) -> int:
+        if self.backend is not None:
+            try:
+                shared = self.backend.get(f"{self.namespace}gen:{lang}")
+                if shared is not None:
+                    self._generations[lang] = int(shared)
+            except Exception as e:
+                log.warning(f"Response cache backend unavailable: {e}")
+        return self._generations.get(lang, 0)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response for the normalised key, or None."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] <= now:
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+        if entry is None and self.backend is not None:
+            try:
+                raw = self.backend.get(self.namespace + key)
+            except Exception as e:
+                log.warning(f"Response cache backend unavailable: {e}")
+                raw = None
+            if raw:
+                payload = json.loads(raw)
+                entry = (now + self.ttl_seconds, payload["lang"], payload["gen"], payload["response"])
+                self._store_local(key, entry)
+
+        if entry is not None and entry[2] == self._generation(entry[1]):
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, response: str, lang: str) -> None:
+        """Cache a response that was produced from the given language table."""
+        if not self.enabled:
+            return
+        gen = self._generation(lang)
+        self._store_local(key, (time.time() + self.ttl_seconds, lang, gen, response))
+        if self.backend is not None:
+            try:
+                payload = json.dumps({"lang": lang, "gen": gen, "response": response}, ensure_ascii=False)
+                self.backend.set(self.namespace + key, payload, self.ttl_seconds)
+            except Exception as e:
+                log.warning(f"Response cache backend unavailable: {e}")
+
+    def _store_local(self, key: str, entry: Tuple[float, str, int, str]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, lang: str) -> None:
+        """Drop every entry answered from the given language table."""
+        with self._lock:
+            self._generations[lang] = self._generations.get(lang, 0) + 1
+            for key in [k for k, v in self._entries.items() if v[1] == lang]:
+                del self._entries[key]
+        if self.backend is not None:
+            try:
+                self._generations[lang] = self.backend.incr(f"{self.namespace}gen:{lang}")
+            except Exception as e:
+                log.warning(f"Response cache backend unavailable: {e}")
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async get; backend round trips run in a worker thread."""
+        if self.backend is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, response: str, lang: str) -> None:
+        """Async set; backend round trips run in a worker thread."""
+        if self.backend is None:
+            self.set(key, response, lang)
+        else:
+            await asyncio.to_thread(self.set, key, response, lang)
+
+
+@dataclass(frozen=True)
+class SemanticHit:
+    response: str
+    # Normalised query of the cached entry and its similarity to the new query
+    key: str
+    score: float
+
+
+class _SemanticEntries:
+    """Fixed-size embedding matrix for one language; slots are reused LRU-first."""
+
+    def __init__(self, capacity: int, dim: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires = np.zeros(capacity, dtype=np.float64)
+        self.responses: list = [None] * capacity
+        self.keys: list = [None] * capacity
+        self.tags: list = [None] * capacity
+        self.slots: "OrderedDict[str, int]" = OrderedDict()
+
+    def slot_for(self, key: str) -> int:
+        if key in self.slots:
+            self.slots.move_to_end(key)
+            return self.slots[key]
+        if len(self.slots) < len(self.expires):
+            slot = len(self.slots)
+        else:
+            _, slot = self.slots.popitem(last=False)
+        self.slots[key] = slot
+        return slot
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of final responses keyed by query embedding."""
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.93, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._langs: Dict[str, _SemanticEntries] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32).ravel()
+        return array / max(float(np.linalg.norm(array)), 1e-12)
+
+    def get(self, vector: Sequence[float], lang: str, tag: Hashable = None) -> Optional[SemanticHit]:
+        """
+        Best fresh entry in ``lang`` at or above the threshold, or None.
+
+        With a ``tag`` (e.g. the query's top FAQ hit) only entries stored with
+        the same tag can match, so close embeddings of queries that mean
+        different things (create vs. delete an order) do not share answers
+        when they retrieve different FAQs.
+        """
+        if not self.enabled:
+            return None
+        query = self._unit(vector)
+        with self._lock:
+            entries = self._langs.get(lang)
+            hit = None
+            if entries is not None and entries.vectors.shape[1] == query.shape[0]:
+                scores = entries.vectors @ query
+                scores[entries.expires <= time.time()] = -1.0
+                if tag is not None:
+                    scores[[t != tag for t in entries.tags]] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = entries.keys[best]
+                    entries.slots.move_to_end(key)
+                    hit = SemanticHit(entries.responses[best], key, float(scores[best]))
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return hit
+
+    def set(self, vector: Sequence[float], key: str, response: str, lang: str, tag: Hashable = None) -> None:
+        """Remember the response for the query embedding (one entry per key)."""
+        if not self.enabled:
+            return
+        unit = self._unit(vector)
+        with self._lock:
+            entries = self._langs.get(lang)
+            if entries is None or entries.vectors.shape[1] != unit.shape[0]:
+                entries = self._langs[lang] = _SemanticEntries(self.max_entries, unit.shape[0])
+            slot = entries.slot_for(key)
+            entries.vectors[slot] = unit
+            entries.expires[slot] = time.time() + self.ttl_seconds
+            entries.responses[slot] = response
+            entries.keys[slot] = key
+            entries.tags[slot] = tag
+
+    def invalidate(self, lang: str) -> None:
+        """Drop every entry for the language (its table changed)."""
+        with self._lock:
+            self._langs.pop(lang, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries.slots) for entries in self._langs.values())
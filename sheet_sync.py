@@ -0,0 +1,182 @@
+"""
+Incremental Google Sheets sync.
+
+Keeps a local snapshot per sheet tab and language (SHEET_SYNC_DIR, JSON):
+the spreadsheet's Drive modifiedTime at the last sync, the embedding model
+and a row hash (content + model) per FAQ row. A sync then:
+
+1. asks Drive for the modifiedTime (metadata only) and stops there when it
+   matches the snapshot, so an unchanged sheet is never downloaded
+2. otherwise reads the tab's values in one request and diffs the rows
+   against the snapshot hashes
+3. hands only added / changed rows and removed FAQ IDs to
+   ingestion.sync_changed_rows, so only those are embedded
+
+Without a usable snapshot (first run, full=True, or a different embedding
+model) the rows are diffed against the table itself with
+ingestion.sync_rows. Rows are written under the sheet's source name
+(sheet:<sheet id>/<tab>), so that diff only ever deletes rows the sheet
+wrote, never the CSV rows sharing the table. To stay inside the Sheets /
+Drive quotas, checks closer together than SHEET_SYNC_MIN_INTERVAL seconds
+make no API call at all, and rate-limited calls are retried with backoff by
+the "sheets" HTTP policy (http_pool.py).
+
+Usage:
+    python sheet_sync.py --lang en
+    python sheet_sync.py --lang en --full --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ingestion import (
+    FaqRow,
+    SyncResult,
+    row_hash,
+    rows_from_sheet_records,
+    sync_changed_rows,
+    sync_rows,
+)
+from langchain_chain import embedding_model_id, get_table_name_for_language
+from sheets_service import SHEET_ID, SHEET_TAB, fetch_sheet_records, get_sheet_modified_time
+
+SHEET_SYNC_DIR = Path(os.getenv("SHEET_SYNC_DIR", str(Path(__file__).resolve().parent / ".cache" / "sheet_sync")))
+SHEET_SYNC_MIN_INTERVAL = float(os.getenv("SHEET_SYNC_MIN_INTERVAL", "60"))
+
+
+@dataclass
+class SheetSnapshot:
+    modified_time: Optional[str] = None
+    # FAQ ID -> row_hash of the row as last synced (content + embedding model)
+    row_hashes: Dict[str, str] = field(default_factory=dict)
+    checked_at: float = 0.0
+    # embedding_model_id() the rows were embedded with
+    embedding_model: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["SheetSnapshot"]:
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable sheet snapshot {path}: {e}")
+            return None
+        return cls(
+            modified_time=data.get("modified_time"),
+            row_hashes=dict(data.get("row_hashes") or {}),
+            checked_at=float(data.get("checked_at") or 0.0),
+            embedding_model=data.get("embedding_model"),
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(asdict(self), fh, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+@dataclass
+class RowDiff:
+    changed: List[FaqRow]
+    removed: List[str]
+    unchanged: int
+    hashes: Dict[str, str]
+
+
+def snapshot_path(sheet_id: str, tab: str, language: str) -> Path:
+    return SHEET_SYNC_DIR / (re.sub(r"[^\w-]+", "_", f"{sheet_id}_{tab}_{language}") + ".json")
+
+
+def sheet_source_name(sheet_id: str, tab: str) -> str:
+    return f"sheet:{sheet_id}/{tab}"
+
+
+def diff_rows(rows: List[FaqRow], previous: Dict[str, str]) -> RowDiff:
+    """Rows that are new or changed since ``previous`` and the IDs that disappeared."""
+    # Last row wins if the sheet repeats an ID, as in ingestion.sync_rows
+    by_id = {row.faq_id: row for row in rows}
+    hashes = {faq_id: row_hash(row.content()) for faq_id, row in by_id.items()}
+    changed = [by_id[faq_id] for faq_id, digest in hashes.items() if previous.get(faq_id) != digest]
+    removed = [faq_id for faq_id in previous if faq_id not in hashes]
+    return RowDiff(changed=changed, removed=removed, unchanged=len(hashes) - len(changed), hashes=hashes)
+
+
+def sync_sheet(
+    language: str = "en",
+    dry_run: bool = False,
+    full: bool = False,
+    sheet_id: str = SHEET_ID,
+    tab: str = SHEET_TAB,
+) -> SyncResult:
+    """Sync one sheet tab into a language table, touching only rows that changed."""
+    table_name = get_table_name_for_language(language)
+    source_name = sheet_source_name(sheet_id, tab)
+    path = snapshot_path(sheet_id, tab, language)
+    snapshot = None if full else SheetSnapshot.load(path)
+    if snapshot is not None and snapshot.embedding_model != embedding_model_id():
+        print(f"Embedding model changed since the last sheet sync ({snapshot.embedding_model}); diffing against the table")
+        snapshot = None
+    now = time.time()
+
+    if snapshot is not None and now - snapshot.checked_at < SHEET_SYNC_MIN_INTERVAL:
+        print(f"Sheet checked {now - snapshot.checked_at:.0f}s ago (SHEET_SYNC_MIN_INTERVAL={SHEET_SYNC_MIN_INTERVAL:.0f}s); skipping")
+        return SyncResult(table=table_name, unchanged=len(snapshot.row_hashes), dry_run=dry_run)
+
+    modified_time = None
+    try:
+        modified_time = get_sheet_modified_time(sheet_id)
+    except Exception as e:
+        print(f"⚠️ Could not read the sheet's modifiedTime, downloading it: {e}")
+    if snapshot is not None and modified_time and modified_time == snapshot.modified_time:
+        print(f"Sheet unchanged since {modified_time}; nothing downloaded")
+        if not dry_run:
+            snapshot.checked_at = now
+            snapshot.save(path)
+        return SyncResult(table=table_name, unchanged=len(snapshot.row_hashes), dry_run=dry_run)
+
+    rows = rows_from_sheet_records(fetch_sheet_records(sheet_id, tab))
+    if not rows:
+        # Never treat an empty read as "delete everything"
+        print("⚠️ Sheet returned no rows; skipping sync")
+        return SyncResult(table=table_name, dry_run=dry_run)
+
+    if snapshot is None:
+        result = sync_rows(rows, language=language, source_name=source_name, dry_run=dry_run)
+        hashes = diff_rows(rows, {}).hashes
+    else:
+        diff = diff_rows(rows, snapshot.row_hashes)
+        result = sync_changed_rows(
+            diff.changed, diff.removed, language=language, source_name=source_name, dry_run=dry_run
+        )
+        result.unchanged = diff.unchanged
+        hashes = diff.hashes
+
+    if not dry_run:
+        SheetSnapshot(
+            modified_time=modified_time, row_hashes=hashes, checked_at=now, embedding_model=embedding_model_id()
+        ).save(path)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally sync the Google Sheet into Supabase.")
+    parser.add_argument("--lang", default="en", choices=["en", "ar"], help="Target table (default: en)")
+    parser.add_argument("--full", action="store_true", help="Ignore the snapshot and diff against the table")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args(argv)
+    print(f"✅ {sync_sheet(args.lang, dry_run=args.dry_run, full=args.full)}")
+
+
+if __name__ == "__main__":
+    main()
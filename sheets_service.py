@@ -3,8 +3,9 @@
 Google Sheets helper for the AI-chatbot app.
 
 • Looks for a service-account key via env-var SERVICE_ACCOUNT_JSON
-• Falls back to <project_root>/credentials/service_account.json
+• Authorises on first use, not at import time
 • Provides get_sheet_data() -> list[dict]
+• fetch_sheet_records() / get_sheet_modified_time() for incremental sync
 """
 
 from __future__ import annotations
@@ -14,65 +15,92 @@ from pathlib import Path
 from typing import Any, List
 
 import gspread
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
 
-# ────────────────────────────────────────────────────────────────────────────
-# 1.  Resolve the service-account JSON location (env only)
-# ────────────────────────────────────────────────────────────────────────────
-env_path = os.getenv("SERVICE_ACCOUNT_JSON")
-if not env_path:
-    raise RuntimeError(
-        "SERVICE_ACCOUNT_JSON is not set. Set it to the absolute path of your Google service account JSON file."
-    )
-
-SERVICE_ACCOUNT_JSON = Path(env_path)
-if not SERVICE_ACCOUNT_JSON.exists():
-    raise FileNotFoundError(
-        f"Service-account file not found at:\n  {SERVICE_ACCOUNT_JSON}\n"
-    )
+import http_pool
+from resources import registry
 
 # ────────────────────────────────────────────────────────────────────────────
-# 2.  Authorise gspread
+# 1.  Authorise gspread lazily (first use, or startup warm-up)
 # ────────────────────────────────────────────────────────────────────────────
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets.readonly",
     "https://www.googleapis.com/auth/drive.readonly",
 ]
 
-creds: Credentials = Credentials.from_service_account_file(
-    SERVICE_ACCOUNT_JSON, scopes=SCOPES
-)
-client = gspread.authorize(creds)
+
+def _create_client() -> gspread.Client:
+    # Resolve the service-account JSON location (env only)
+    env_path = os.getenv("SERVICE_ACCOUNT_JSON")
+    if not env_path:
+        raise RuntimeError(
+            "SERVICE_ACCOUNT_JSON is not set. Set it to the absolute path of your Google service account JSON file."
+        )
+
+    service_account_json = Path(env_path)
+    if not service_account_json.exists():
+        raise FileNotFoundError(
+            f"Service-account file not found at:\n  {service_account_json}\n"
+        )
+
+    creds: Credentials = Credentials.from_service_account_file(
+        service_account_json, scopes=SCOPES
+    )
+    # Keep-alive pool + retry/backoff tuned by the "sheets" upstream policy
+    session = http_pool.requests_session("sheets", AuthorizedSession(creds))
+    return gspread.authorize(creds, session=session)
+
+
+# Not needed to serve chat requests, so it is kept out of startup warm-up
+registry.register("sheets", _create_client, warm=False)
+
+
+def get_client() -> gspread.Client:
+    return registry.get("sheets")
+
 
 # ────────────────────────────────────────────────────────────────────────────
-# 3.  Sheet metadata
+# 2.  Sheet metadata
 # ────────────────────────────────────────────────────────────────────────────
 SHEET_ID = "1IE6Ic3g6lTScdD65ZLq8aNDiB0w0ktr-9vl16TtChbM"
 SHEET_TAB = "Issues and video_links"  # adjust if your tab name differs
 
 # ────────────────────────────────────────────────────────────────────────────
-# 4.  Public helper
+# 3.  Public helpers
 # ────────────────────────────────────────────────────────────────────────────
+def get_sheet_modified_time(sheet_id: str = SHEET_ID) -> str:
+    """Drive modifiedTime of the spreadsheet (metadata only, no cell data)."""
+    return get_client().get_file_drive_metadata(sheet_id)["modifiedTime"]
+
+
+def fetch_sheet_records(sheet_id: str = SHEET_ID, tab: str = SHEET_TAB) -> List[dict[str, Any]]:
+    """
+    Rows of one tab as dictionaries, read in a single values request.
+    Completely empty rows are skipped; API errors propagate.
+    """
+    raw = get_client().http_client.values_get(sheet_id, f"'{tab}'").get("values", [])
+    if not raw:
+        return []
+    headers, rows = raw[0], raw[1:]
+
+    data = []
+    for row in rows:
+        if any(cell.strip() for cell in row):  # skip completely empty rows
+            row_dict = {headers[i]: row[i] if i < len(row) else "" for i in range(len(headers))}
+            data.append(row_dict)
+    return data
+
+
 def get_sheet_data() -> List[dict[str, Any]]:
     """
     Return all rows from the sheet as list of dictionaries.
     Includes all rows, even if there are blanks in between.
+    Returns [] on errors (use fetch_sheet_records to see them).
     """
     try:
-        sheet = client.open_by_key(SHEET_ID)
-        ws = sheet.worksheet(SHEET_TAB)
-        print(f"✅ Connected → {sheet.title} / {SHEET_TAB} (rows: {ws.row_count})")
-
-        raw = ws.get_all_values()
-        headers = raw[0]
-        rows = raw[1:]
-
-        data = []
-        for row in rows:
-            if any(cell.strip() for cell in row):  # skip completely empty rows
-                row_dict = {headers[i]: row[i] if i < len(row) else "" for i in range(len(headers))}
-                data.append(row_dict)
-
+        data = fetch_sheet_records()
+        print(f"✅ Read {len(data)} rows from {SHEET_TAB}")
         return data
     except Exception as exc:
         print(f"❌ Error reading Google Sheet: {exc}")
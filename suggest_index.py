@@ -0,0 +1,150 @@
+"""
+Typeahead over FAQ questions for the /suggest endpoint.
+
+Every word of an indexed question adds its prefixes (up to MAX_PREFIX
+characters) to an inverted index per language, so a partial query is
+answered by intersecting one posting set per query word: each query word
+must start some word of the question, in any order. Questions that start
+with the query rank first, then shorter questions.
+
+Entries are grouped by source (the faqs table, each language table) and a
+source is synced by diffing, so a re-sync only touches the questions that
+were added, changed or removed. The same question coming from two sources
+is suggested once.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+MAX_PREFIX = 12
+
+# (source, lang, faq_id or the question itself when the row has no ID)
+EntryKey = Tuple[str, str, Union[int, str]]
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    text: str
+    lang: str
+    # Same type as the FaqStore keys, so it can be passed to answer_for
+    faq_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class _Entry:
+    text: str
+    faq_id: Optional[int]
+    # Normalised question and its words
+    key: str
+    words: Tuple[str, ...]
+
+
+class SuggestIndex:
+    """Word-prefix index over questions in both languages."""
+
+    def __init__(self, normalizer: Callable[[str], str], max_prefix: int = MAX_PREFIX):
+        self.normalizer = normalizer
+        self.max_prefix = max_prefix
+        self._entries: Dict[EntryKey, _Entry] = {}
+        self._postings: Dict[str, Dict[str, Set[EntryKey]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _prefixes(self, words: Iterable[str]) -> Set[str]:
+        return {word[:n] for word in words for n in range(1, min(len(word), self.max_prefix) + 1)}
+
+    def _add(self, entry_key: EntryKey, entry: _Entry) -> None:
+        postings = self._postings.setdefault(entry_key[1], {})
+        for prefix in self._prefixes(entry.words):
+            postings.setdefault(prefix, set()).add(entry_key)
+        self._entries[entry_key] = entry
+
+    def _remove(self, entry_key: EntryKey) -> None:
+        entry = self._entries.pop(entry_key)
+        postings = self._postings[entry_key[1]]
+        for prefix in self._prefixes(entry.words):
+            keys = postings.get(prefix)
+            if keys is not None:
+                keys.discard(entry_key)
+                if not keys:
+                    del postings[prefix]
+
+    def sync(self, source: str, questions: Iterable[Tuple[str, Optional[int], str]]) -> Tuple[int, int]:
+        """
+        Make ``source`` hold exactly the given (lang, faq_id, question) entries.
+
+        Returns (added or changed, removed).
+        """
+        wanted: Dict[EntryKey, Tuple[Optional[int], str]] = {}
+        for lang, faq_id, question in questions:
+            if question and question.strip():
+                question = question.strip()
+                wanted[(source, lang, question if faq_id is None else faq_id)] = (faq_id, question)
+
+        with self._lock:
+            current = [k for k in self._entries if k[0] == source]
+            removed = 0
+            for entry_key in current:
+                if entry_key not in wanted:
+                    self._remove(entry_key)
+                    removed += 1
+            changed = 0
+            for entry_key, (faq_id, question) in wanted.items():
+                existing = self._entries.get(entry_key)
+                if existing is not None and existing.text == question and existing.faq_id == faq_id:
+                    continue
+                key = self.normalizer(question)
+                if not key:
+                    continue
+                if existing is not None:
+                    self._remove(entry_key)
+                self._add(entry_key, _Entry(text=question, faq_id=faq_id, key=key, words=tuple(key.split())))
+                changed += 1
+        return changed, removed
+
+    def suggest(self, query: str, lang: Optional[str] = None, limit: int = 5) -> List[Suggestion]:
+        """Questions matching the typed prefix, best first."""
+        key = self.normalizer(query or "")
+        tokens = key.split()
+        if not tokens or limit <= 0:
+            return []
+
+        with self._lock:
+            langs = [lang] if lang else list(self._postings)
+            candidates: List[EntryKey] = []
+            for candidate_lang in langs:
+                postings = self._postings.get(candidate_lang, {})
+                sets = [postings.get(token[:self.max_prefix]) for token in tokens]
+                if any(s is None for s in sets):
+                    continue
+                sets.sort(key=len)
+                matched = set(sets[0]).intersection(*sets[1:])
+                long_tokens = [t for t in tokens if len(t) > self.max_prefix]
+                if long_tokens:
+                    # Prefixes are capped, so check long words against the entry itself
+                    matched = {
+                        k for k in matched
+                        if all(any(w.startswith(t) for w in self._entries[k].words) for t in long_tokens)
+                    }
+                candidates.extend(matched)
+
+            ranked = sorted(
+                candidates,
+                key=lambda k: (not self._entries[k].key.startswith(key), len(self._entries[k].key), k[0], k[1], str(k[2])),
+            )
+            results: List[Suggestion] = []
+            seen: Set[Tuple[str, str]] = set()
+            for entry_key in ranked:
+                entry = self._entries[entry_key]
+                if (entry_key[1], entry.key) in seen:
+                    continue
+                seen.add((entry_key[1], entry.key))
+                results.append(Suggestion(text=entry.text, lang=entry_key[1], faq_id=entry.faq_id))
+                if len(results) >= limit:
+                    break
+            return results
@@ -31,6 +31,40 @@ create index if not exists faqs_fts_idx on public.faqs using gin (
   to_tsvector('simple', coalesce(question_en,'') || ' ' || coalesce(answer_en,'') || ' ' || coalesce(question_ar,'') || ' ' || coalesce(answer_ar,''))
 );
 
+-- Keyword search over faqs that is answered from faqs_fts_idx: the tsvector
+-- expression below must stay identical to the index expression. Every query
+-- term is prefix-matched ("invoice" finds "invoices"); question matches rank
+-- above answer matches.
+create or replace function public.search_faqs(query_text text, match_count int default 5)
+returns table (
+  id integer,
+  question_en text,
+  answer_en text,
+  question_ar text,
+  answer_ar text,
+  rank real
+)
+language sql stable
+as $$
+  with q as (
+    select to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' & ')) as query
+    from unnest(tsvector_to_array(to_tsvector('simple', coalesce(query_text, '')))) as lexeme
+  )
+  select f.id, f.question_en, f.answer_en, f.question_ar, f.answer_ar,
+         ts_rank(
+           setweight(to_tsvector('simple', coalesce(f.question_en,'') || ' ' || coalesce(f.question_ar,'')), 'A') ||
+           setweight(to_tsvector('simple', coalesce(f.answer_en,'') || ' ' || coalesce(f.answer_ar,'')), 'B'),
+           q.query
+         ) as rank
+  from public.faqs f, q
+  where q.query is not null
+    and to_tsvector('simple', coalesce(f.question_en,'') || ' ' || coalesce(f.answer_en,'') || ' ' || coalesce(f.question_ar,'') || ' ' || coalesce(f.answer_ar,'')) @@ q.query
+  order by rank desc
+  limit match_count;
+$$;
+
+grant execute on function public.search_faqs(text, int) to anon, authenticated, service_role;
+
 -- Helpful btree indexes
 create index if not exists faqs_tags_idx on public.faqs using gin (tags);
 
@@ -60,5 +94,24 @@ to service_role
 using (true)
 with check (true);
 
+-- Bulk reset for the vector tables (used by `clear_supabase.py --truncate`).
+-- One request per table instead of one DELETE per row; only the known vector
+-- tables can be truncated, and only by the service role. The names below are
+-- the defaults: add yours if SUPABASE_TABLE_NAME / ARABIC_SUPABASE_TABLE_NAME
+-- are changed (clear_supabase.py falls back to chunked deletes otherwise).
+create or replace function public.truncate_vector_table(target_table text)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if target_table not in ('documents', 'arabic_documents') then
+    raise exception 'truncate_vector_table: % is not a vector table', target_table;
+  end if;
+  execute format('truncate table public.%I', target_table);
+end;
+$$;
 
-
+revoke all on function public.truncate_vector_table(text) from public, anon, authenticated;
+grant execute on function public.truncate_vector_table(text) to service_role;
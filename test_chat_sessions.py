@@ -0,0 +1,51 @@
+"""Tests for per-session /chat memory (chatbot.SessionMemory)."""
+
+import pytest
+
+import chatbot
+from chatbot import SessionMemory
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chatbot.time, "time", lambda: now[0])
+    return now
+
+
+def test_history_is_windowed(clock):
+    memory = SessionMemory(max_turns=2, max_sessions=10, ttl_seconds=60)
+    for i in range(3):
+        memory.append("s", f"q{i}", f"a{i}")
+    assert memory.history("s") == [("q1", "a1"), ("q2", "a2")]
+    assert memory.history("unknown") == []
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    memory = SessionMemory(max_turns=5, max_sessions=2, ttl_seconds=60)
+    memory.append("a", "q", "a")
+    memory.append("b", "q", "b")
+    memory.history("a")
+    memory.append("c", "q", "c")
+    assert len(memory) == 2
+    assert memory.history("b") == []
+    assert memory.history("a") == [("q", "a")]
+
+
+def test_idle_sessions_expire(clock):
+    memory = SessionMemory(max_turns=5, max_sessions=10, ttl_seconds=60)
+    memory.append("old", "q", "a")
+    clock[0] += 30
+    memory.append("fresh", "q", "a")
+    clock[0] += 30
+    assert memory.history("old") == []
+    assert memory.history("fresh") == [("q", "a")]
+    assert len(memory) == 1
+
+
+def test_reading_history_keeps_a_session_alive(clock):
+    memory = SessionMemory(max_turns=5, max_sessions=10, ttl_seconds=60)
+    memory.append("s", "q", "a")
+    for _ in range(3):
+        clock[0] += 45
+        assert memory.history("s") == [("q", "a")]
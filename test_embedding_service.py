@@ -0,0 +1,65 @@
+"""Tests for the cached, micro-batched embedding front end (embedding_service.py)."""
+
+import asyncio
+
+import pytest
+
+from embedding_service import EmbeddingService
+
+
+class FakeModel:
+    """Embeds a text as [len(text), 1]; records every embed_documents call."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [[len(text), 1] for text in texts]
+
+
+def _gather(service, *texts):
+    async def run():
+        return await asyncio.gather(*(service.aembed_query(text) for text in texts), return_exceptions=True)
+
+    return asyncio.run(run())
+
+
+def test_concurrent_queries_share_one_model_call():
+    model = FakeModel()
+    service = EmbeddingService(model, batch_window_ms=50)
+    vectors = _gather(service, "a", "bb", "a", "ccc")
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+    # Repeated texts are encoded once
+    assert model.calls == [["a", "bb", "ccc"]]
+    assert service.batches == 1
+
+
+def test_full_batch_flushes_before_the_window():
+    model = FakeModel()
+    service = EmbeddingService(model, batch_window_ms=10_000, max_batch_size=2)
+    assert _gather(service, "a", "bb") == [[1.0, 1.0], [2.0, 1.0]]
+    assert model.calls == [["a", "bb"]]
+
+
+def test_cached_query_skips_the_model():
+    model = FakeModel()
+    service = EmbeddingService(model)
+    _gather(service, "hello")
+    assert _gather(service, "hello") == [[5.0, 1.0]]
+    assert service.embed_query("hello") == [5.0, 1.0]
+    assert len(model.calls) == 1
+    assert service.cache_hits == 2
+
+
+def test_model_error_reaches_every_waiter():
+    error = RuntimeError("model unavailable")
+    service = EmbeddingService(FakeModel(error=error), batch_window_ms=50)
+    results = _gather(service, "a", "b", "c")
+    assert results == [error, error, error]
+    # Nothing was cached, so the next call tries the model again
+    with pytest.raises(RuntimeError):
+        service.embed_query("a")
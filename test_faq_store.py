@@ -0,0 +1,73 @@
+"""Tests for pairing English and Arabic FAQ records (faq_store.py)."""
+
+import json
+from pathlib import Path
+
+from langchain.schema import Document
+
+from faq_store import faq_id_from_document, pair_arabic_records, pairing_conflict
+from ingestion import rows_from_csv
+
+QUESTIONS_EN = {
+    1: "How do I reset my password?",
+    2: "How do I connect a Bluetooth printer?",
+    3: "What is the ZATCA phase 2 deadline?",
+}
+
+
+def _record(record_id, en_id, question_ar, answer_ar="جواب"):
+    return {"id": record_id, "en_id": en_id, "question_ar": question_ar, "answer_ar": answer_ar}
+
+
+def test_pairs_by_en_id_not_by_record_id():
+    paired = pair_arabic_records(QUESTIONS_EN, [
+        _record(1, 2, "كيف أوصل طابعة Bluetooth؟", "جواب الطابعة"),
+        _record(2, 1, "كيف أعيد تعيين كلمة المرور؟", "جواب كلمة المرور"),
+    ])
+    assert paired[1]["answer_ar"] == "جواب كلمة المرور"
+    assert paired[2]["answer_ar"] == "جواب الطابعة"
+
+
+def test_skips_records_that_do_not_check_out(capsys):
+    paired = pair_arabic_records(QUESTIONS_EN, [
+        _record(1, 1, "كيف أعيد تعيين كلمة المرور؟"),
+        # Arabic-only entry
+        _record(2, None, "سؤال عربي فقط"),
+        _record(3, 99, "سؤال"),
+        _record(4, 1, "نسخة ثانية"),
+        # Mentions ZATCA, which the English question does not
+        _record(5, 2, "ما هو موعد ZATCA؟"),
+        {"id": 6, "question_ar": "بدون ربط"},
+    ])
+    assert list(paired) == [1]
+    out = capsys.readouterr().out
+    assert "4 Arabic FAQ records left unpaired" in out
+    for problem in ("3: unknown en_id 99", "4: en_id 1 already paired", "5 -> 2: ZATCA", "6: no en_id"):
+        assert problem in out
+
+
+def test_pairing_conflict():
+    assert pairing_conflict(QUESTIONS_EN[3], "ما هو موعد المرحلة 2 من zatca؟") is None
+    assert pairing_conflict(QUESTIONS_EN[3], "ما هو موعد المرحلة 3؟") == "3 not in the English question"
+
+
+def test_shipped_files_pair_cleanly(capsys):
+    root = Path(__file__).resolve().parent
+    questions_en = {int(row.faq_id): row.question for row in rows_from_csv(str(root / "faq_data.csv"))}
+    records = json.loads((root / "faq_data_ar.json").read_text(encoding="utf-8"))
+    paired = pair_arabic_records(questions_en, records)
+    assert capsys.readouterr().out == ""
+    assert len(paired) == sum(r["en_id"] is not None for r in records)
+
+
+def test_faq_id_from_document():
+    def doc(content, **metadata):
+        return Document(page_content=content, metadata=metadata)
+
+    assert faq_id_from_document(doc("ID: 12\nQuestion: q")) == 12
+    assert faq_id_from_document(doc("\ufeffID: 12\r\nQuestion: q")) == 12
+    assert faq_id_from_document(doc("ID: x", faq_id="7")) == 7
+    # Hash keys of sheet rows without an ID column are not FAQ IDs
+    assert faq_id_from_document(doc("ID: 26387bb013f7bace\nQuestion: q")) is None
+    assert faq_id_from_document(doc("ID: 4f00c2\nQuestion: q")) is None
+    assert faq_id_from_document(doc("ID: sheet:3a9e\nQuestion: q", faq_id="sheet:3a9e")) is None
@@ -0,0 +1,128 @@
+"""Tests for the retry transports (http_pool.py) over httpx.MockTransport; nothing leaves the process."""
+
+import asyncio
+
+import httpx
+import pytest
+
+import http_pool
+from http_pool import AsyncRetryTransport, RetryTransport, UpstreamPolicy
+
+POLICY = UpstreamPolicy("test", retries=2, backoff=0.1)
+
+
+class Upstream:
+    """Replays canned outcomes (a status code or an exception class) and records every attempt."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.attempts = []
+
+    def __call__(self, request):
+        self.attempts.append(request.method)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, type):
+            raise outcome("upstream failed", request=request)
+        if isinstance(outcome, tuple):
+            status, headers = outcome
+            return httpx.Response(status, headers=headers)
+        return httpx.Response(outcome)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays, recorded instead of slept."""
+    delays = []
+
+    async def asleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(http_pool.asyncio, "sleep", asleep)
+    monkeypatch.setattr(http_pool.time, "sleep", delays.append)
+    return delays
+
+
+def _send(upstream, method="GET", policy=POLICY):
+    """One request through AsyncRetryTransport with the upstream behind its pool."""
+
+    async def run():
+        transport = AsyncRetryTransport(policy)
+        transport._loop = asyncio.get_running_loop()
+        transport._transport = httpx.MockTransport(upstream)
+        transport._semaphore = asyncio.Semaphore(policy.max_connections)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.request(method, "https://upstream.test/")
+
+    return asyncio.run(run())
+
+
+def test_server_errors_are_retried(sleeps):
+    upstream = Upstream(503, 502, 200)
+    assert _send(upstream).status_code == 200
+    assert len(upstream.attempts) == 3
+    assert len(sleeps) == 2
+
+
+def test_last_server_error_is_returned_after_the_retries(sleeps):
+    upstream = Upstream(503, 503, 503)
+    assert _send(upstream).status_code == 503
+    assert len(upstream.attempts) == 3
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404, 500])
+def test_other_statuses_are_not_retried(sleeps, status):
+    upstream = Upstream(status)
+    assert _send(upstream).status_code == status
+    assert len(upstream.attempts) == 1
+    assert sleeps == []
+
+
+def test_retryable_status_is_not_retried_for_unsafe_methods(sleeps):
+    upstream = Upstream(503)
+    assert _send(upstream, method="POST").status_code == 503
+    assert upstream.attempts == ["POST"]
+
+
+def test_retry_after_sets_the_delay(sleeps):
+    upstream = Upstream((429, {"Retry-After": "3"}), (429, {"Retry-After": "120"}), 200)
+    assert _send(upstream).status_code == 200
+    assert sleeps == [3.0, http_pool.MAX_RETRY_AFTER]
+
+
+def test_connect_errors_are_retried_for_any_method(sleeps):
+    upstream = Upstream(httpx.ConnectError, httpx.ConnectTimeout, 200)
+    assert _send(upstream, method="POST").status_code == 200
+    assert upstream.attempts == ["POST"] * 3
+
+
+def test_connect_errors_raise_after_the_retries(sleeps):
+    upstream = Upstream(httpx.ConnectError, httpx.ConnectError, httpx.ConnectError)
+    with pytest.raises(httpx.ConnectError):
+        _send(upstream)
+    assert len(upstream.attempts) == 3
+
+
+def test_read_errors_are_retried_only_for_safe_methods(sleeps):
+    upstream = Upstream(httpx.ReadError, 200)
+    assert _send(upstream).status_code == 200
+    assert len(upstream.attempts) == 2
+
+    upstream = Upstream(httpx.ReadError)
+    with pytest.raises(httpx.ReadError):
+        _send(upstream, method="POST")
+    assert len(upstream.attempts) == 1
+
+
+def test_blocking_transport_follows_the_same_policy(sleeps):
+    transport = RetryTransport(POLICY)
+    upstream = Upstream(httpx.ConnectError, 504, 200)
+    transport._transport = httpx.MockTransport(upstream)
+    with httpx.Client(transport=transport) as client:
+        assert client.get("https://upstream.test/").status_code == 200
+    assert len(upstream.attempts) == 3
+
+    upstream = Upstream(404)
+    transport._transport = httpx.MockTransport(upstream)
+    with httpx.Client(transport=transport) as client:
+        assert client.get("https://upstream.test/").status_code == 404
+    assert len(upstream.attempts) == 1
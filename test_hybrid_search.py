@@ -0,0 +1,46 @@
+"""Tests for the hybrid retrieval helpers (hybrid_search.py)."""
+
+import pytest
+
+from hybrid_search import RRF_K, LexicalHit, is_confident_lexical, lexical_hits_from_rows, reciprocal_rank_fusion
+
+
+def test_rrf_scores():
+    fused = dict(reciprocal_rank_fusion([[1, 2], [2, 3]]))
+    assert fused[2] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1))
+    assert fused[1] == pytest.approx(1 / (RRF_K + 1))
+    assert fused[3] == pytest.approx(1 / (RRF_K + 2))
+
+
+def test_rrf_rewards_agreement():
+    # 2 is second in both lists and beats each list's own winner
+    ranked = [key for key, _ in reciprocal_rank_fusion([[1, 2, 3], [4, 2, 5]])]
+    assert ranked[0] == 2
+    assert set(ranked) == {1, 2, 3, 4, 5}
+
+
+def test_rrf_empty():
+    assert reciprocal_rank_fusion([]) == []
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_lexical_hits_from_rows():
+    hits = lexical_hits_from_rows([{"id": "7", "rank": "0.5", "answer_en": "Yes", "answer_ar": "نعم"}, {"id": 8}])
+    assert [(h.faq_id, h.rank) for h in hits] == [(7, 0.5), (8, 0.0)]
+    assert hits[0].answer("ar") == "نعم"
+    assert hits[0].answer("en") == "Yes"
+    assert hits[1].answer("en") == ""
+
+
+@pytest.mark.parametrize("tokens, ranks, expected", [
+    (["refund"], [0.4], True),
+    (["refund", "policy"], [0.4, 0.2], True),
+    (["refund", "policy"], [0.4, 0.3], False),
+    (["how", "do", "i", "get", "a", "refund"], [0.9], False),
+    ([], [0.9], False),
+    (["refund"], [], False),
+    (["refund"], [0.1, 0.0], True),
+])
+def test_is_confident_lexical(tokens, ranks, expected):
+    hits = [LexicalHit(faq_id=i, rank=rank) for i, rank in enumerate(ranks)]
+    assert is_confident_lexical(tokens, hits) is expected
@@ -0,0 +1,164 @@
+"""Tests for incremental ingestion (ingestion.py) against an in-memory table."""
+
+import pytest
+from langchain.schema import Document
+
+import ingestion
+from faq_store import faq_id_from_document
+from ingestion import FaqRow, csv_source_name, row_id_for, rows_from_sheet_records, sync_changed_rows, sync_rows
+
+TABLE = "documents"
+
+
+class FakeQuery:
+    def __init__(self, table):
+        self.table = table
+        self.action = "select"
+        self.payload = None
+        self.start = self.end = None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    def upsert(self, rows):
+        self.action, self.payload = "upsert", rows
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def in_(self, column, ids):
+        self.payload = set(ids)
+        return self
+
+    def execute(self):
+        rows = self.table.rows
+        if self.action == "upsert":
+            for row in self.payload:
+                rows[row["id"]] = {k: v for k, v in row.items() if k != "embedding"}
+            return type("Response", (), {"data": self.payload})
+        if self.action == "delete":
+            deleted = [rows.pop(i) for i in list(rows) if i in self.payload]
+            return type("Response", (), {"data": deleted})
+        ordered = [rows[i] for i in sorted(rows)]
+        return type("Response", (), {"data": ordered[self.start:self.end + 1]})
+
+
+class FakeTable:
+    def __init__(self):
+        self.rows = {}
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {}
+
+    def table(self, name):
+        return FakeQuery(self.tables.setdefault(name, FakeTable()))
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    client = FakeSupabase()
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(ingestion, "get_supabase", lambda: client)
+    monkeypatch.setattr(ingestion, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(ingestion, "get_table_name_for_language", lambda language: TABLE)
+    monkeypatch.setattr(ingestion, "on_table_write", lambda language: None)
+    client.embeddings = embeddings
+    return client
+
+
+def _rows(*specs):
+    return [FaqRow(faq_id=faq_id, question=f"q{faq_id}", answer=answer) for faq_id, answer in specs]
+
+
+def _stored(client):
+    return {row["metadata"].get("faq_id"): row["metadata"].get("source_name") for row in client.tables[TABLE].rows.values()}
+
+
+def test_second_sync_is_a_no_op(supabase):
+    rows = _rows(("1", "a"), ("2", "b"))
+    assert sync_rows(rows, source_name="csv:faq_data.csv").upserted == 2
+    result = sync_rows(rows, source_name="csv:faq_data.csv")
+    assert (result.upserted, result.deleted, result.unchanged) == (0, 0, 2)
+    assert len(supabase.embeddings.calls) == 1
+
+
+def test_only_rows_of_the_same_source_are_deleted(supabase):
+    sync_rows(_rows(("1", "a"), ("2", "b")), source_name="csv:faq_data.csv")
+    sync_rows(_rows(("s1", "c")), source_name="sheet:abc/Sheet1")
+    # Added through /create-embedding: no FAQ ID
+    supabase.tables[TABLE].rows["orphan-row"] = {"id": "orphan-row", "content": "free text", "metadata": {}}
+
+    result = sync_rows(_rows(("1", "a")), source_name="csv:faq_data.csv")
+    assert result.deleted == 1
+    assert _stored(supabase) == {"1": "csv:faq_data.csv", "s1": "sheet:abc/Sheet1", None: None}
+
+    result = sync_rows(_rows(("s2", "d")), source_name="sheet:abc/Sheet1", dry_run=True)
+    assert (result.upserted, result.deleted) == (1, 1)
+
+
+def test_switching_embedding_model_reembeds_every_row(supabase, monkeypatch):
+    rows = _rows(("1", "a"), ("2", "b"))
+    sync_rows(rows, source_name="csv:faq_data.csv")
+    monkeypatch.setattr(ingestion, "embedding_model_id", lambda: "other-model@onnx-int8:avx2")
+    result = sync_rows(rows, source_name="csv:faq_data.csv")
+    assert (result.upserted, result.unchanged) == (2, 0)
+    assert len(supabase.embeddings.calls) == 2
+
+
+def test_sync_without_source_deletes_nothing(supabase):
+    sync_rows(_rows(("1", "a"), ("2", "b")), source_name="csv:faq_data.csv")
+    assert sync_rows(_rows(("3", "c"))).deleted == 0
+    assert set(_stored(supabase)) == {"1", "2", "3"}
+
+
+def test_legacy_rows_are_replaced_but_not_deleted(supabase):
+    legacy = supabase.tables.setdefault(TABLE, FakeTable()).rows
+    for faq_id in ("1", "2"):
+        legacy[f"legacy-{faq_id}"] = {"id": f"legacy-{faq_id}", "content": f"ID: {faq_id}\nQuestion: q", "metadata": {}}
+
+    result = sync_rows(_rows(("1", "a")), source_name="csv:faq_data.csv")
+    assert (result.upserted, result.deleted) == (1, 1)
+    assert row_id_for(TABLE, "1") in legacy
+    assert "legacy-2" in legacy
+
+
+def test_changed_rows_record_their_source(supabase):
+    sync_changed_rows(_rows(("s1", "a")), [], source_name="sheet:abc/Sheet1")
+    assert _stored(supabase) == {"s1": "sheet:abc/Sheet1"}
+
+
+def test_csv_source_name():
+    assert csv_source_name("/data/faq_data.csv") == "csv:faq_data.csv"
+
+
+def test_sheet_rows_without_id_never_parse_as_faq_ids():
+    rows = rows_from_sheet_records([
+        {"ID": "12", "Question": "Numbered", "Answer": "a"},
+        {"Question": "How do I print a receipt?", "Answer": "b"},
+        {"Question": "   ", "Answer": "skipped"},
+    ])
+    assert len(rows) == 2
+    assert rows[0].faq_id == "12"
+    assert rows[1].faq_id.startswith("sheet:")
+    documents = [Document(page_content=row.content(), metadata={"faq_id": row.faq_id}) for row in rows]
+    assert [faq_id_from_document(doc) for doc in documents] == [12, None]
@@ -0,0 +1,63 @@
+"""Tests for the compiled intent router (intent_router.py)."""
+
+import pytest
+
+from intent_router import INTENTS_PATH, IntentRouter
+from langchain_chain import normalize_query
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter.from_file(INTENTS_PATH, normalize_query)
+
+
+@pytest.mark.parametrize("query, name, lang", [
+    ("Hi", "hi", "en"),
+    ("hello!", "hello", "en"),
+    ("  How are   U? ", "how_are_you", "en"),
+    ("مرحبا", "hello", "ar"),
+    ("كم عدد المقالات؟", "count_documents", "ar"),
+    ("How many articles are loaded?", "count_documents", "en"),
+])
+def test_matches_whole_query(router, query, name, lang):
+    match = router.match(query)
+    assert match is not None
+    assert (match.intent.name, match.lang) == (name, lang)
+
+
+@pytest.mark.parametrize("query", ["hiring process", "hi, how do I create an invoice", "", "how to reset password"])
+def test_ignores_partial_matches(router, query):
+    assert router.match(query) is None
+
+
+def test_count_intent_has_action_and_template(router):
+    intent = router.match("how many articles are loaded").intent
+    assert intent.action == "count_documents"
+    assert "{count}" in intent.reply("en")
+    assert "{count}" in intent.reply("ar")
+
+
+def test_reply_falls_back_to_english():
+    router = IntentRouter(
+        [{"name": "bye", "phrases": {"en": ["bye"]}, "reply": {"en": "Goodbye!"}}],
+        normalize_query,
+    )
+    assert router.match("bye").intent.reply("ar") == "Goodbye!"
+
+
+def test_first_intent_wins_and_regex_groups_are_safe():
+    router = IntentRouter(
+        [
+            {"name": "thanks", "regex": {"en": ["thanks? (a lot|so much)"]}, "reply": {"en": "You're welcome!"}},
+            {"name": "thanks_again", "phrases": {"en": ["thanks a lot"]}, "reply": {"en": "Again!"}},
+        ],
+        normalize_query,
+    )
+    assert router.match("Thanks a lot!").intent.name == "thanks"
+    assert router.match("thank so much").intent.name == "thanks"
+
+
+def test_empty_router():
+    router = IntentRouter([], normalize_query)
+    assert len(router) == 0
+    assert router.match("hi") is None
@@ -0,0 +1,291 @@
+"""Tests for the retrieval pipeline in langchain_chain.py; searches are stubbed, nothing hits the network."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from langchain.schema import AIMessage, Document
+
+import langchain_chain
+from faq_store import question_from_document
+from ingestion import rows_from_csv
+from langchain_chain import faq_store, normalize_arabic
+from suggest_index import SuggestIndex
+
+ROOT = Path(__file__).resolve().parent
+
+
+def _table_documents(csv_name, lang):
+    """Vector-table documents as ingestion.py writes them."""
+    documents = {}
+    for row in rows_from_csv(str(ROOT / csv_name)):
+        content = normalize_arabic(row.content()) if lang == "ar" else row.content()
+        documents[int(row.faq_id)] = Document(page_content=content, metadata={"source": row.question, "faq_id": row.faq_id})
+    return documents
+
+
+ARABIC_DOCUMENTS = _table_documents("result.csv", "ar")
+ENGLISH_DOCUMENTS = _table_documents("faq_data.csv", "en")
+
+
+@pytest.fixture
+def vector_hits(monkeypatch):
+    """
+    Query -> (document, score) pairs the vector search returns; queries
+    not listed get no hits. Keyword search finds nothing and the caches
+    start empty.
+    """
+    hits = {}
+
+    def lookup(text, k):
+        return hits.get(langchain_chain.normalize_query(text), [])[:k]
+
+    async def asimilarity_search(query, lang, k=1):
+        return lookup(query, k)
+
+    async def asimilarity_search_many(queries, lang, k=1):
+        return [lookup(query, k) for query in queries]
+
+    async def alexical_search(query, k=5):
+        return []
+
+    monkeypatch.setattr(langchain_chain, "asimilarity_search", asimilarity_search)
+    monkeypatch.setattr(langchain_chain, "asimilarity_search_many", asimilarity_search_many)
+    monkeypatch.setattr(langchain_chain, "alexical_search", alexical_search)
+    monkeypatch.setattr(langchain_chain, "response_cache", langchain_chain.ResponseCache())
+    monkeypatch.setattr(langchain_chain, "semantic_cache", langchain_chain.SemanticCache())
+    return hits
+
+
+def _hit(hits, query, *matches):
+    hits[langchain_chain.normalize_query(query)] = list(matches)
+    return query
+
+
+@pytest.fixture
+def resources(monkeypatch):
+    """Name -> instance the registry hands out; names not listed are not configured."""
+    instances = {}
+
+    async def aget(name):
+        if name not in instances:
+            raise RuntimeError(f"{name} is not configured")
+        return instances[name]
+
+    monkeypatch.setattr(langchain_chain.registry, "aget", aget)
+    return instances
+
+
+@pytest.fixture
+def english_output(monkeypatch, resources):
+    """English answers as stored, and no LLM behind the fallback."""
+    monkeypatch.setattr(langchain_chain, "FORCE_ARABIC_OUTPUT", False)
+
+
+def _vector_answer(query, lang):
+    return asyncio.run(langchain_chain.avector_faq_answer(query, lang, lexical=[]))
+
+
+@pytest.fixture
+def langdetect_calls(monkeypatch):
+    """Texts handed to langdetect; it answers "en"."""
+    calls = []
+    monkeypatch.setattr(langchain_chain, "detect", lambda text: calls.append(text) or "en")
+    langchain_chain._detect_mixed_script.cache_clear()
+    yield calls
+    langchain_chain._detect_mixed_script.cache_clear()
+
+
+@pytest.mark.parametrize("text, lang", [
+    ("كيف أقوم بإنشاء أمر شراء؟", "ar"),
+    ("How to reset password", "en"),
+    ("Qu'est-ce que Tijarah360 ?", "en"),
+    ("", "en"),
+    ("   ", "en"),
+    ("12345 ?!", "en"),
+    # Arabic-majority text keeps the Arabic route despite a Latin brand name
+    ("ما هو Tijarah360 ؟", "ar"),
+    ("هل يدعم Tijarah360 ZATCA", "ar"),
+])
+def test_detect_lang_by_script(langdetect_calls, text, lang):
+    assert langchain_chain.detect_lang(text) == lang
+    assert langdetect_calls == []
+
+
+def test_detect_lang_asks_langdetect_for_english_majority_mixed_text(langdetect_calls):
+    text = "How do I  print the فاتورة receipt"
+    assert langchain_chain.detect_lang(text) == "en"
+    assert langchain_chain.detect_lang(text) == "en"
+    # Whitespace is collapsed and the answer cached
+    assert langdetect_calls == ["How do I print the فاتورة receipt"]
+
+
+def test_detect_lang_keeps_arabic_when_langdetect_fails(langdetect_calls, monkeypatch):
+    def fail(text):
+        raise Exception("No features in text.")
+
+    monkeypatch.setattr(langchain_chain, "detect", fail)
+    assert langchain_chain.detect_lang("reset the password ل") == "ar"
+
+
+def test_arabic_hit_is_answered_with_its_paired_faq(vector_hits):
+    # Arabic record 88 is the translation of English FAQ 89
+    query = _hit(vector_hits, "هل يمكن إدخال البيانات بلوحة مفاتيح عربية؟", (ARABIC_DOCUMENTS[88], 0.95))
+    assert faq_store.english_id(88, "ar") == 89
+    answer = _vector_answer(query, "ar")
+    assert answer == faq_store.answer_for(89, "ar")
+    assert answer != faq_store.answer_for(88, "ar")
+    assert "العربية" in answer
+
+    [result] = asyncio.run(langchain_chain.aget_rag_responses([query]))
+    assert (result["faq_id"], result["response"]) == (89, answer)
+
+
+def test_arabic_only_hit_is_answered_from_its_own_row(vector_hits):
+    # Arabic record 103 has no English counterpart
+    query = _hit(vector_hits, "هل يمكنني إعادة طباعة أوامر المطبخ؟", (ARABIC_DOCUMENTS[103], 0.95))
+    assert faq_store.english_id(103, "ar") is None
+    answer = _vector_answer(query, "ar")
+    assert normalize_arabic("يمكن إعادة طباعة أي أمر مطبخ") in answer
+    assert faq_store.answer_for(103, "ar") not in answer
+
+
+def test_arabic_suggestions_carry_english_ids(monkeypatch):
+    index = langchain_chain.LocalVectorIndex("arabic_documents")
+    index._swap(index._matrix, [ARABIC_DOCUMENTS[88], ARABIC_DOCUMENTS[103]])
+    monkeypatch.setitem(langchain_chain.local_indexes, "ar", index)
+    monkeypatch.setattr(langchain_chain, "suggest_index", SuggestIndex(langchain_chain.normalize_query))
+    langchain_chain.sync_table_suggestions("ar")
+    ids = {s.text: s.faq_id for s in langchain_chain.suggest_index.suggest("هل", lang="ar")}
+    assert ids == {
+        question_from_document(ARABIC_DOCUMENTS[88]): 89,
+        question_from_document(ARABIC_DOCUMENTS[103]): None,
+    }
+
+
+def test_custom_threshold_bypasses_the_response_cache(vector_hits, english_output):
+    query = _hit(vector_hits, "is the platform compliant with zatca rules", (ENGLISH_DOCUMENTS[2], 0.6))
+    answer = asyncio.run(langchain_chain.aget_rag_response(query))
+    assert answer == faq_store.answer_for(2, "en")
+
+    # The cached answer came from a 0.6 hit, which a 0.8 threshold rejects
+    strict = asyncio.run(langchain_chain.aget_rag_response(query, similarity_threshold=0.8))
+    assert strict == langchain_chain.NO_ANSWER_MESSAGE
+    assert asyncio.run(langchain_chain.aget_rag_response(query)) == answer
+
+
+def test_batch_answers_match_single_answers(vector_hits, english_output, monkeypatch):
+    queries = [
+        "hello",
+        "What is Tijarah360?",
+        _hit(vector_hits, "is the platform compliant with zatca rules", (ENGLISH_DOCUMENTS[2], 0.6)),
+        _hit(vector_hits, "qr invoice maybe", (ENGLISH_DOCUMENTS[3], 0.3)),
+        _hit(vector_hits, "هل يمكن إدخال البيانات بلوحة مفاتيح عربية؟", (ARABIC_DOCUMENTS[88], 0.95)),
+        _hit(vector_hits, "هل يمكنني إعادة طباعة أوامر المطبخ؟", (ARABIC_DOCUMENTS[103], 0.95)),
+        "something the knowledge base has never heard of",
+    ]
+    batch = asyncio.run(langchain_chain.aget_rag_responses(queries))
+
+    single = []
+    for query in queries:
+        # Each query starts from empty caches, as the batch did
+        monkeypatch.setattr(langchain_chain, "response_cache", langchain_chain.ResponseCache())
+        monkeypatch.setattr(langchain_chain, "semantic_cache", langchain_chain.SemanticCache())
+        single.append(asyncio.run(langchain_chain.aget_rag_response(query)))
+
+    assert [result["response"] for result in batch] == single
+    assert [result["source"] for result in batch] == [
+        "intent", "exact", "vector", "no_answer", "exact", "vector", "no_answer",
+    ]
+
+
+# -------------------------------
+# Similarity threshold and reranking
+# -------------------------------
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content="From the LLM")
+
+
+class FakeReranker:
+    """Puts the candidates in reverse order."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def rerank(self, query, documents):
+        self.calls.append(query)
+        if self.error is not None:
+            raise self.error
+        return [(doc, float(rank)) for rank, doc in enumerate(documents)][::-1]
+
+
+def _fallbacks(stage):
+    return langchain_chain.RAG_FALLBACKS._values.get((stage,), 0)
+
+
+def test_hits_below_the_threshold_are_dropped(vector_hits, english_output):
+    query = _hit(vector_hits, "zatca or qr", (ENGLISH_DOCUMENTS[3], 0.5), (ENGLISH_DOCUMENTS[2], 0.4))
+    assert _vector_answer(query, "en") == faq_store.answer_for(3, "en")
+
+    before = _fallbacks("below_threshold")
+    assert asyncio.run(langchain_chain.avector_faq_answer(query, "en", [], similarity_threshold=0.6)) is None
+    assert _fallbacks("below_threshold") == before + 1
+
+
+def test_below_threshold_falls_back_to_the_llm(vector_hits, english_output, resources):
+    resources["llm"] = llm = FakeLLM()
+    query = _hit(vector_hits, "qr invoice maybe", (ENGLISH_DOCUMENTS[3], 0.3))
+    assert asyncio.run(langchain_chain.aget_rag_response(query)) == "From the LLM"
+    assert len(llm.prompts) == 1
+
+
+def test_below_threshold_without_llm_has_no_answer(vector_hits, english_output):
+    query = _hit(vector_hits, "qr invoice maybe", (ENGLISH_DOCUMENTS[3], 0.3))
+    assert asyncio.run(langchain_chain.aget_rag_response(query)) == langchain_chain.NO_ANSWER_MESSAGE
+
+
+@pytest.fixture
+def reranker(monkeypatch, resources):
+    monkeypatch.setattr(langchain_chain, "RERANKER_MODEL", "fake-cross-encoder")
+    monkeypatch.setattr(langchain_chain, "RERANK_MARGIN", 0.05)
+    resources["reranker"] = FakeReranker()
+    return resources["reranker"]
+
+
+def test_close_top_scores_are_reranked(vector_hits, english_output, reranker):
+    query = _hit(vector_hits, "zatca or qr", (ENGLISH_DOCUMENTS[3], 0.80), (ENGLISH_DOCUMENTS[2], 0.78))
+    assert _vector_answer(query, "en") == faq_store.answer_for(2, "en")
+    assert reranker.calls == [query]
+
+
+def test_clear_winner_is_not_reranked(vector_hits, english_output, reranker):
+    query = _hit(vector_hits, "zatca or qr", (ENGLISH_DOCUMENTS[3], 0.80), (ENGLISH_DOCUMENTS[2], 0.70))
+    assert _vector_answer(query, "en") == faq_store.answer_for(3, "en")
+    assert reranker.calls == []
+
+
+def test_only_hits_above_the_threshold_are_reranked(vector_hits, english_output, reranker):
+    # Close scores, but the runner-up is below the threshold
+    query = _hit(vector_hits, "zatca or qr", (ENGLISH_DOCUMENTS[3], 0.47), (ENGLISH_DOCUMENTS[2], 0.44))
+    assert _vector_answer(query, "en") == faq_store.answer_for(3, "en")
+    assert reranker.calls == []
+
+
+def test_failed_rerank_keeps_the_vector_order(vector_hits, english_output, reranker):
+    reranker.error = RuntimeError("model unavailable")
+    query = _hit(vector_hits, "zatca or qr", (ENGLISH_DOCUMENTS[3], 0.80), (ENGLISH_DOCUMENTS[2], 0.78))
+    assert _vector_answer(query, "en") == faq_store.answer_for(3, "en")
+    assert len(reranker.calls) == 1
+
+
+def test_no_rerank_without_a_model(vector_hits, english_output, reranker, monkeypatch):
+    monkeypatch.setattr(langchain_chain, "RERANKER_MODEL", None)
+    query = _hit(vector_hits, "zatca or qr", (ENGLISH_DOCUMENTS[3], 0.80), (ENGLISH_DOCUMENTS[2], 0.78))
+    assert _vector_answer(query, "en") == faq_store.answer_for(3, "en")
+    assert reranker.calls == []
@@ -0,0 +1,16 @@
+"""Tests for the reranking gate (reranker.py); the cross-encoder itself is not loaded."""
+
+import pytest
+
+from reranker import is_ambiguous
+
+
+@pytest.mark.parametrize("scores, ambiguous", [
+    ([0.80, 0.78], True),
+    ([0.80, 0.75], False),
+    ([0.80, 0.70, 0.69], False),
+    ([0.80], False),
+    ([], False),
+])
+def test_is_ambiguous(scores, ambiguous):
+    assert is_ambiguous(scores, margin=0.05) is ambiguous
@@ -0,0 +1,147 @@
+"""Tests for the response and semantic caches (response_cache.py)."""
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, SemanticCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+class DictBackend:
+    """In-memory stand-in for RedisCacheBackend."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl):
+        self.values[key] = value
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key) or 0) + 1)
+        return int(self.values[key])
+
+
+# -------------------------------
+# ResponseCache
+# -------------------------------
+def test_response_cache_hit_and_miss(clock):
+    cache = ResponseCache()
+    assert cache.get("refund policy") is None
+    cache.set("refund policy", "30 days", "en")
+    assert cache.get("refund policy") == "30 days"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_response_cache_ttl(clock):
+    cache = ResponseCache(ttl_seconds=10)
+    cache.set("q", "answer", "en")
+    clock.now += 9
+    assert cache.get("q") == "answer"
+    clock.now += 1
+    assert cache.get("q") is None
+
+
+def test_response_cache_lru_eviction(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "1", "en")
+    cache.set("b", "2", "en")
+    cache.get("a")
+    cache.set("c", "3", "en")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_response_cache_invalidate_is_per_language(clock):
+    cache = ResponseCache()
+    cache.set("q", "answer", "en")
+    cache.set("س", "جواب", "ar")
+    cache.invalidate("en")
+    assert cache.get("q") is None
+    assert cache.get("س") == "جواب"
+    # New entries belong to the new generation
+    cache.set("q", "new answer", "en")
+    assert cache.get("q") == "new answer"
+
+
+def test_response_cache_shared_generation(clock):
+    backend = DictBackend()
+    writer = ResponseCache(backend=backend)
+    reader = ResponseCache(backend=backend)
+    writer.set("q", "answer", "en")
+    assert reader.get("q") == "answer"
+
+    # Another worker's invalidation makes our local copy stale
+    writer.invalidate("en")
+    assert reader.get("q") is None
+
+
+def test_response_cache_disabled():
+    cache = ResponseCache(max_entries=0)
+    cache.set("q", "answer", "en")
+    assert cache.get("q") is None
+
+
+# -------------------------------
+# SemanticCache
+# -------------------------------
+def test_semantic_cache_threshold(clock):
+    cache = SemanticCache(threshold=0.95)
+    cache.set([1.0, 0.0], "create order", "Use the Orders page.", "en")
+    hit = cache.get([0.99, 0.05], "en")
+    assert hit is not None
+    assert hit.key == "create order"
+    assert hit.response == "Use the Orders page."
+    assert cache.get([0.7, 0.7], "en") is None
+    assert cache.get([1.0, 0.0], "ar") is None
+
+
+def test_semantic_cache_ttl(clock):
+    cache = SemanticCache(ttl_seconds=10)
+    cache.set([1.0, 0.0], "q", "answer", "en")
+    clock.now += 10
+    assert cache.get([1.0, 0.0], "en") is None
+
+
+def test_semantic_cache_tag_guard(clock):
+    cache = SemanticCache(threshold=0.9)
+    cache.set([1.0, 0.0], "create order", "create answer", "en", tag=("en", 1))
+    assert cache.get([1.0, 0.01], "en", tag=("en", 2)) is None
+    assert cache.get([1.0, 0.01], "en", tag=("en", 1)).response == "create answer"
+
+
+def test_semantic_cache_reuses_slots_lru_first(clock):
+    cache = SemanticCache(max_entries=2, threshold=0.99)
+    cache.set([1.0, 0.0, 0.0], "a", "A", "en")
+    cache.set([0.0, 1.0, 0.0], "b", "B", "en")
+    cache.get([1.0, 0.0, 0.0], "en")
+    cache.set([0.0, 0.0, 1.0], "c", "C", "en")
+    assert len(cache) == 2
+    assert cache.get([0.0, 1.0, 0.0], "en") is None
+    assert cache.get([1.0, 0.0, 0.0], "en").response == "A"
+
+
+def test_semantic_cache_invalidate(clock):
+    cache = SemanticCache()
+    cache.set([1.0, 0.0], "q", "answer", "en")
+    cache.set([1.0, 0.0], "q", "جواب", "ar")
+    cache.invalidate("en")
+    assert cache.get([1.0, 0.0], "en") is None
+    assert cache.get([1.0, 0.0], "ar").response == "جواب"
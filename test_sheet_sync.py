@@ -0,0 +1,89 @@
+"""Tests for the incremental sheet diff (sheet_sync.py)."""
+
+import pytest
+
+import sheet_sync
+from ingestion import FaqRow, SyncResult, row_hash
+from sheet_sync import SheetSnapshot, diff_rows
+
+
+def _rows(*specs):
+    return [FaqRow(faq_id=faq_id, question=f"q{faq_id}", answer=answer) for faq_id, answer in specs]
+
+
+def test_first_sync_treats_every_row_as_changed():
+    diff = diff_rows(_rows(("1", "a"), ("2", "b")), {})
+    assert [row.faq_id for row in diff.changed] == ["1", "2"]
+    assert diff.removed == []
+    assert diff.unchanged == 0
+    assert set(diff.hashes) == {"1", "2"}
+
+
+def test_unchanged_rows_are_skipped():
+    rows = _rows(("1", "a"), ("2", "b"))
+    diff = diff_rows(rows, diff_rows(rows, {}).hashes)
+    assert diff.changed == []
+    assert diff.removed == []
+    assert diff.unchanged == 2
+
+
+def test_changed_added_and_removed_rows():
+    previous = diff_rows(_rows(("1", "a"), ("2", "b"), ("3", "c")), {}).hashes
+    diff = diff_rows(_rows(("1", "a"), ("2", "b2"), ("4", "d")), previous)
+    assert sorted(row.faq_id for row in diff.changed) == ["2", "4"]
+    assert diff.removed == ["3"]
+    assert diff.unchanged == 1
+    assert diff.hashes["2"] == row_hash(_rows(("2", "b2"))[0].content())
+
+
+def test_repeated_id_keeps_last_row():
+    diff = diff_rows(_rows(("1", "old"), ("1", "new")), {})
+    assert len(diff.changed) == 1
+    assert diff.changed[0].answer == "new"
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "sheet.json"
+    assert SheetSnapshot.load(path) is None
+    SheetSnapshot(modified_time="2024-01-01T00:00:00Z", row_hashes={"1": "x"}, checked_at=5.0).save(path)
+    assert SheetSnapshot.load(path) == SheetSnapshot("2024-01-01T00:00:00Z", {"1": "x"}, 5.0)
+
+    path.write_text("not json", encoding="utf-8")
+    assert SheetSnapshot.load(path) is None
+
+
+@pytest.fixture
+def sheet(monkeypatch, tmp_path):
+    """Stub the Sheets API and record the ingestion calls sync_sheet makes."""
+    calls = []
+    monkeypatch.setattr(sheet_sync, "SHEET_SYNC_DIR", tmp_path)
+    monkeypatch.setattr(sheet_sync, "get_table_name_for_language", lambda language: "documents")
+    monkeypatch.setattr(sheet_sync, "get_sheet_modified_time", lambda sheet_id: "2024-01-01T00:00:00Z")
+    monkeypatch.setattr(sheet_sync, "fetch_sheet_records", lambda sheet_id, tab: [{"ID": "1", "Question": "q", "Answer": "a"}])
+    monkeypatch.setattr(sheet_sync, "sync_rows", lambda rows, **kwargs: calls.append(("sync_rows", kwargs)) or SyncResult("documents"))
+    monkeypatch.setattr(
+        sheet_sync, "sync_changed_rows",
+        lambda changed, removed, **kwargs: calls.append(("sync_changed_rows", kwargs)) or SyncResult("documents"),
+    )
+    return calls
+
+
+def test_syncs_are_scoped_to_the_sheet_source(sheet, monkeypatch):
+    sheet_sync.sync_sheet("en", sheet_id="abc", tab="FAQ")
+    monkeypatch.setattr(sheet_sync, "get_sheet_modified_time", lambda sheet_id: "2024-02-01T00:00:00Z")
+    monkeypatch.setattr(sheet_sync, "SHEET_SYNC_MIN_INTERVAL", 0)
+    sheet_sync.sync_sheet("en", sheet_id="abc", tab="FAQ")
+    # The first sync diffs against the table, so its deletes must stay within the sheet's rows
+    assert [(name, kwargs["source_name"]) for name, kwargs in sheet] == [
+        ("sync_rows", "sheet:abc/FAQ"),
+        ("sync_changed_rows", "sheet:abc/FAQ"),
+    ]
+
+
+def test_new_embedding_model_diffs_against_the_table(sheet, monkeypatch):
+    sheet_sync.sync_sheet("en", sheet_id="abc", tab="FAQ")
+    monkeypatch.setattr(sheet_sync, "SHEET_SYNC_MIN_INTERVAL", 0)
+    # Same sheet; only the embedding model changed
+    monkeypatch.setattr(sheet_sync, "embedding_model_id", lambda: "other-model@torch")
+    sheet_sync.sync_sheet("en", sheet_id="abc", tab="FAQ")
+    assert [name for name, _ in sheet] == ["sync_rows", "sync_rows"]
@@ -0,0 +1,73 @@
+"""Tests for the typeahead prefix index (suggest_index.py)."""
+
+import pytest
+
+from faq_store import FaqStore
+from langchain_chain import normalize_query
+from suggest_index import SuggestIndex
+
+
+@pytest.fixture
+def index():
+    index = SuggestIndex(normalize_query)
+    index.sync("faqs", [
+        ("en", 1, "How do I create a purchase order?"),
+        ("en", 2, "How do I create an invoice?"),
+        ("en", 3, "Create a discount"),
+        ("ar", 1, "كيف أقوم بإنشاء أمر شراء؟"),
+    ])
+    return index
+
+
+def _texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+def test_prefix_of_any_word_in_any_order(index):
+    assert _texts(index.suggest("purch ord", lang="en")) == ["How do I create a purchase order?"]
+    assert _texts(index.suggest("order purch", lang="en")) == ["How do I create a purchase order?"]
+    assert index.suggest("refund", lang="en") == []
+
+
+def test_questions_starting_with_the_query_rank_first(index):
+    assert _texts(index.suggest("creat", lang="en"))[0] == "Create a discount"
+
+
+def test_language_filter(index):
+    assert [s.lang for s in index.suggest("أمر")] == ["ar"]
+    assert index.suggest("أمر", lang="en") == []
+
+
+def test_faq_id_keeps_the_store_key_type(capsys):
+    # As sync_faq_suggestions does it, from the shipped FAQ files
+    store = FaqStore()
+    store.load_files()
+    index = SuggestIndex(normalize_query)
+    index.sync("faqs", store.questions())
+    capsys.readouterr()
+
+    for lang in ("en", "ar"):
+        suggestion = index.suggest("tijarah360", lang=lang)[0]
+        assert isinstance(suggestion.faq_id, int)
+        assert store.answer_for(suggestion.faq_id, lang)
+
+
+def test_rows_without_id_are_suggested_without_one():
+    index = SuggestIndex(normalize_query)
+    index.sync("documents_en", [("en", None, "How do I print a receipt?")])
+    assert [(s.text, s.faq_id) for s in index.suggest("receipt")] == [("How do I print a receipt?", None)]
+
+
+def test_resync_only_touches_the_diff(index):
+    changed, removed = index.sync("faqs", [
+        ("en", 1, "How do I create a purchase order?"),
+        ("en", 2, "How do I issue an invoice?"),
+    ])
+    assert (changed, removed) == (1, 2)
+    assert _texts(index.suggest("issue")) == ["How do I issue an invoice?"]
+    assert index.suggest("discount") == []
+
+
+def test_same_question_from_two_sources_is_suggested_once(index):
+    index.sync("documents_en", [("en", 3, "Create a discount")])
+    assert _texts(index.suggest("discount")) == ["Create a discount"]
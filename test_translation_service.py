@@ -0,0 +1,137 @@
+"""Tests for the translation circuit breaker and error handling (translation_service.py)."""
+
+import asyncio
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+import translation_service
+from translation_service import CircuitBreaker, TranslationCache, TranslationService, _is_fatal, _retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(translation_service.time, "time", lambda: now[0])
+    return now
+
+
+# -------------------------------
+# CircuitBreaker
+# -------------------------------
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    clock[0] += 60
+    assert not breaker.is_open
+
+
+def test_breaker_success_resets_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_fatal_failure_opens_at_once(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown_seconds=300)
+    breaker.record_failure(fatal=True)
+    assert breaker.is_open
+    assert breaker.open_until == 1300
+
+
+def test_pause_does_not_shorten_an_open_breaker(clock):
+    breaker = CircuitBreaker(cooldown_seconds=300)
+    breaker.pause(5)
+    assert breaker.is_open
+    assert breaker.failures == 0
+    clock[0] += 5
+    assert not breaker.is_open
+    breaker.record_failure(fatal=True)
+    breaker.pause(5)
+    assert breaker.open_until == clock[0] + 300
+
+
+# -------------------------------
+# Error classification
+# -------------------------------
+@pytest.mark.parametrize("status, body, fatal", [
+    (403, "API key not valid", True),
+    (403, "Daily Limit Exceeded: quota", True),
+    (429, "Quota exceeded for quota metric 'requests per minute'", False),
+    (500, "backend error", False),
+    (503, "", False),
+])
+def test_is_fatal(status, body, fatal):
+    assert _is_fatal(httpx.Response(status, text=body)) is fatal
+
+
+def test_retry_after(clock):
+    assert _retry_after(httpx.Response(429, headers={"Retry-After": "7"})) == 7
+    assert _retry_after(httpx.Response(429)) is None
+    assert _retry_after(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+    date = formatdate(clock[0] + 30, usegmt=True)
+    assert _retry_after(httpx.Response(429, headers={"Retry-After": date})) == pytest.approx(30)
+
+
+# -------------------------------
+# TranslationService
+# -------------------------------
+def _service():
+    return TranslationService("key", TranslationCache(), CircuitBreaker(failure_threshold=3, cooldown_seconds=300))
+
+
+def _translate(responses, service=None):
+    """Translate "hello" once against canned responses; returns (result, service)."""
+    service = service or _service()
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: responses.pop(0))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await service.atranslate_many(client, ["hello"])
+
+    return asyncio.run(run()), service
+
+
+def test_success_is_translated_and_cached():
+    ok = httpx.Response(200, json={"data": {"translations": [{"translatedText": "مرحبا"}]}})
+    result, service = _translate([ok])
+    assert result == ["مرحبا"]
+    assert service.cache.get("hello", "ar") == "مرحبا"
+
+
+def test_rate_limit_pauses_only_for_retry_after(clock):
+    result, service = _translate([httpx.Response(429, headers={"Retry-After": "20"}, text="quota")])
+    assert result == ["hello"]
+    assert service.breaker.open_until == clock[0] + 20
+    assert service.breaker.failures == 0
+    assert service.failures == {"http_429": 1}
+    clock[0] += 20
+    assert not service.breaker.is_open
+
+
+def test_rate_limit_without_retry_after_keeps_the_breaker_closed(clock):
+    service = _service()
+    for _ in range(5):
+        _translate([httpx.Response(429)], service)
+    assert not service.breaker.is_open
+    assert service.api_requests == 5
+
+
+def test_forbidden_opens_the_breaker_for_the_cooldown(clock):
+    result, service = _translate([httpx.Response(403, text="API key not valid")])
+    assert result == ["hello"]
+    assert service.breaker.open_until == clock[0] + 300
+    assert service.failures == {"http_403": 1}
+
+
+def test_server_errors_count_towards_the_threshold(clock):
+    _, service = _translate([httpx.Response(500)])
+    assert service.breaker.failures == 1
+    assert not service.breaker.is_open
@@ -0,0 +1,90 @@
+"""Tests for the in-process NumPy vector index (vector_index.py)."""
+
+import numpy as np
+import pytest
+
+from vector_index import LocalVectorIndex
+
+
+def _row(faq_id, vector):
+    return {
+        "content": f"ID: {faq_id}\nQuestion: q{faq_id}\nAnswer: a{faq_id}",
+        "metadata": {"faq_id": faq_id},
+        "embedding": vector,
+    }
+
+
+@pytest.fixture
+def index():
+    index = LocalVectorIndex("documents")
+    index.build([
+        _row(1, [1.0, 0.0, 0.0]),
+        _row(2, [0.0, 1.0, 0.0]),
+        # PostgREST returns pgvector columns as strings
+        _row(3, "[0.6, 0.8, 0.0]"),
+        _row(4, None),
+    ])
+    return index
+
+
+def _ids(hits):
+    return [doc.metadata["faq_id"] for doc, _ in hits]
+
+
+def test_build_skips_rows_without_embedding(index):
+    assert index.ready
+    assert len(index) == 3
+
+
+def test_search_ranks_by_cosine_similarity(index):
+    hits = index.search([2.0, 0.1, 0.0], k=2)
+    assert _ids(hits) == [1, 3]
+    assert hits[0][1] == pytest.approx(2.0 / np.linalg.norm([2.0, 0.1]), abs=1e-6)
+    assert hits[0][1] >= hits[1][1]
+
+
+def test_search_edge_cases(index):
+    assert len(index.search([0.0, 1.0, 0.0], k=10)) == 3
+    assert index.search([0.0, 0.0, 0.0], k=1) == []
+    assert index.search([1.0, 0.0, 0.0], k=0) == []
+    assert LocalVectorIndex("empty").search([1.0, 0.0, 0.0]) == []
+
+
+def test_search_many_matches_search(index):
+    queries = [[1.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.5, 1.0, 0.0]]
+    results = index.search_many(queries, k=2)
+    assert len(results) == 3
+    assert results[1] == []
+    for query, hits in zip(queries, results):
+        single = index.search(query, k=2)
+        assert _ids(hits) == _ids(single)
+        assert [s for _, s in hits] == pytest.approx([s for _, s in single])
+
+
+def test_search_many_without_documents():
+    assert LocalVectorIndex("empty").search_many([[1.0, 0.0]], k=1) == [[]]
+    assert LocalVectorIndex("empty").search_many([], k=1) == []
+
+
+def test_save_snapshot_skips_unchanged_rows(index, tmp_path):
+    directory = str(tmp_path)
+    first = index.save_snapshot(directory, meta={"table": "documents"})
+    assert first is not None
+    assert index.save_snapshot(directory, meta={"table": "documents"}) is None
+
+    # New meta or new rows make a new version
+    assert index.save_snapshot(directory, meta={"table": "other"}) not in (None, first)
+    index.build([_row(1, [1.0, 0.0, 0.0])])
+    assert index.save_snapshot(directory, meta={"table": "other"}) is not None
+
+
+def test_snapshot_round_trip(index, tmp_path):
+    version = index.save_snapshot(str(tmp_path), meta={"table": "documents"})
+    assert [p.name for p in tmp_path.glob("*.npy")] == [f"documents.{version}.npy"]
+
+    restored = LocalVectorIndex("documents")
+    assert not restored.open_shared(str(tmp_path), meta={"table": "other"})
+    assert restored.open_shared(str(tmp_path), meta={"table": "documents"})
+    assert restored.shared_version == version
+    assert len(restored) == 3
+    assert _ids(restored.search([0.6, 0.8, 0.0], k=1)) == [3]
@@ -0,0 +1,38 @@
+"""Tests for the embedding backend check (verify_embedding_backend.py)."""
+
+from verify_embedding_backend import build_index, top1
+
+CORPUS = [
+    {"content": "ID: 1\nQuestion: refund", "metadata": {"faq_id": "1"}},
+    {"content": "ID: 2\nQuestion: invoice", "metadata": {"faq_id": "2"}},
+]
+
+
+class FakeModel:
+    """Embeds by keyword; ``skew`` stands in for quantization error."""
+
+    def __init__(self, skew=0.0):
+        self.skew = skew
+        self.documents_embedded = 0
+
+    def _vector(self, text):
+        return [1.0 if "refund" in text else self.skew, 1.0 if "invoice" in text else self.skew]
+
+    def embed_documents(self, texts):
+        self.documents_embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def test_candidate_queries_search_the_float_corpus():
+    reference, candidate = FakeModel(), FakeModel(skew=0.2)
+    index = build_index(reference, CORPUS, "en")
+    assert reference.documents_embedded == 2
+
+    ids, latencies = top1(candidate, index, ["refund please", "invoice copy", "hello"], "en")
+    assert ids[:2] == ["1", "2"]
+    assert len(latencies) == 3
+    # Only query vectors come from the candidate, as in production
+    assert candidate.documents_embedded == 0
@@ -0,0 +1,225 @@
+"""
+Google Cloud Translation v2 client with caching and failure protection.
+
+• Persistent cache keyed by sha256(target + source text), stored as an
+  append-only JSONL file and loaded at startup
+• Circuit breaker: a 403 (bad key or exhausted quota) opens the breaker for a
+  cooldown, so a dead key costs nothing instead of one round trip per
+  request; a 429 rate limit only pauses calls for its Retry-After
+• Batching: many texts go out as repeated ``q`` values in one API call
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+# Request-path messages go through the app's queued logger (see observability.py)
+log = logging.getLogger("tijarah360")
+
+GOOGLE_TRANSLATE_ENDPOINT = os.getenv(
+    "GOOGLE_TRANSLATE_ENDPOINT", "https://translation.googleapis.com/language/translate/v2"
+)
+# The v2 API accepts at most 128 text segments per request
+MAX_SEGMENTS_PER_REQUEST = 128
+
+
+def cache_key(text: str, target: str) -> str:
+    return hashlib.sha256(f"{target}\0{text}".encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Text-hash -> translation map persisted to a local JSONL file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> int:
+        """Warm the in-memory map from disk; returns the number of entries."""
+        if not self.path or not self.path.exists():
+            return 0
+        entries: Dict[str, str] = {}
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                    entries[record["k"]] = record["v"]
+                except (ValueError, KeyError):
+                    continue  # tolerate a torn final line
+        with self._lock:
+            self._entries.update(entries)
+        return len(entries)
+
+    def get(self, text: str, target: str) -> Optional[str]:
+        return self._entries.get(cache_key(text, target))
+
+    def put_many(self, pairs: Dict[str, str], target: str) -> None:
+        records = {cache_key(src, target): dst for src, dst in pairs.items()}
+        with self._lock:
+            records = {k: v for k, v in records.items() if self._entries.get(k) != v}
+            if not records:
+                return
+            self._entries.update(records)
+            if self.path:
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with self.path.open("a", encoding="utf-8") as fh:
+                        for k, v in records.items():
+                            fh.write(json.dumps({"k": k, "v": v}, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    log.warning(f"Translation cache write failed: {e}")
+
+
+class CircuitBreaker:
+    """Opens after repeated failures (or at once for fatal ones) for a cooldown."""
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 300):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return time.time() < self.open_until
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self, fatal: bool = False) -> None:
+        self.failures += 1
+        if fatal or self.failures >= self.failure_threshold:
+            self.open_until = time.time() + self.cooldown_seconds
+            self.failures = 0
+
+    def pause(self, seconds: float) -> None:
+        """Stay open for ``seconds`` (e.g. a rate limit's Retry-After) without counting a failure."""
+        self.open_until = max(self.open_until, time.time() + seconds)
+
+
+def _is_fatal(response: httpx.Response) -> bool:
+    """403 (bad/disabled key, exhausted quota) will not recover on retry; 429 is a temporary rate limit."""
+    return response.status_code == 403
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), if any."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TranslationService:
+    """Cached, batched, breaker-protected translator."""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        cache: TranslationCache,
+        breaker: Optional[CircuitBreaker] = None,
+        endpoint: str = GOOGLE_TRANSLATE_ENDPOINT,
+    ):
+        self.api_key = api_key
+        self.cache = cache
+        self.breaker = breaker or CircuitBreaker()
+        self.endpoint = endpoint
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.api_requests = 0
+        # reason ("no_key", "breaker_open", "http_403", "error", ...) -> texts left untranslated
+        self.failures: Dict[str, int] = {}
+
+    def _record_failure(self, reason: str, count: int) -> None:
+        self.failures[reason] = self.failures.get(reason, 0) + count
+
+    async def atranslate_many(self, client: httpx.AsyncClient, texts: List[str], target: str = "ar") -> List[str]:
+        """Translate texts in as few API calls as possible; failures return the source text."""
+        results: List[Optional[str]] = [self.cache.get(t, target) if t else t for t in texts]
+        missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+        self.cache_hits += sum(1 for t, r in zip(texts, results) if t and r is not None)
+        self.cache_misses += len(missing)
+        if not missing:
+            return results  # type: ignore[return-value]
+
+        translated: Dict[str, str] = {}
+        if not self.api_key:
+            log.warning("Google Translate API key not configured")
+            self._record_failure("no_key", len(missing))
+        elif self.breaker.is_open:
+            # negative-cached: the key is known to be dead or out of quota
+            self._record_failure("breaker_open", len(missing))
+        else:
+            for start in range(0, len(missing), MAX_SEGMENTS_PER_REQUEST):
+                chunk = missing[start:start + MAX_SEGMENTS_PER_REQUEST]
+                chunk_result = await self._request(client, chunk, target)
+                if chunk_result is None:
+                    break
+                translated.update(chunk_result)
+            if translated:
+                self.cache.put_many(translated, target)
+
+        return [r if r is not None else translated.get(t, t) for t, r in zip(texts, results)]
+
+    async def _request(self, client: httpx.AsyncClient, chunk: List[str], target: str) -> Optional[Dict[str, str]]:
+        # Repeated "q" fields translate the whole chunk in one request
+        form = {"q": chunk, "target": target, "format": "text"}
+        self.api_requests += 1
+        try:
+            resp = await client.post(self.endpoint, params={"key": self.api_key}, data=form)
+            if not resp.is_success:
+                self._record_failure(f"http_{resp.status_code}", len(chunk))
+                if resp.status_code == 429:
+                    # Already retried by the "translate" HTTP policy; skip calls
+                    # until the limit clears, not for the whole cooldown
+                    retry_after = _retry_after(resp)
+                    if retry_after:
+                        self.breaker.pause(retry_after)
+                    log.warning(f"Google Translate rate limited (HTTP 429); retry after {retry_after or 0:.0f}s")
+                    return None
+                self.breaker.record_failure(fatal=_is_fatal(resp))
+                if resp.status_code == 403:
+                    log.warning(f"Google Translate API key may be invalid or disabled (HTTP 403); pausing for {self.breaker.cooldown_seconds:.0f}s")
+                else:
+                    log.warning(f"Translate-to-Arabic HTTP error: {resp.status_code} {resp.text[:200]}")
+                return None
+            payload = resp.json() or {}
+            translations = payload.get("data", {}).get("translations", [])
+            self.breaker.record_success()
+            return {
+                src: (item.get("translatedText") or src)
+                for src, item in zip(chunk, translations)
+            }
+        except Exception as e:
+            self.breaker.record_failure()
+            self._record_failure("error", len(chunk))
+            log.warning(f"Translate-to-Arabic failed: {e}")
+            return None
+
+
+def default_cache_path() -> str:
+    return os.getenv(
+        "TRANSLATION_CACHE_PATH",
+        str(Path(__file__).resolve().parent / ".cache" / "translations.jsonl"),
+    )
@@ -0,0 +1,303 @@
+"""
+In-process vector index for the FAQ tables.
+
+The knowledge base is small (a few hundred rows per language), so the whole
+table fits in a single NumPy matrix of L2-normalised embeddings. A top-k query
+is one matrix-vector product instead of a round trip to the match RPC.
+
+With a shared directory (ideally on tmpfs, e.g. /dev/shm) the matrix is
+written once as a .npy snapshot and every uvicorn worker maps it read-only,
+so N workers hold one copy of the embeddings instead of N. The same format
+doubles as the persistent knowledge-base snapshot (save_snapshot) that keeps
+retrieval working while Supabase is slow or down.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+PAGE_SIZE = 1000
+
+
+def _parse_embedding(value: Any) -> Optional[List[float]]:
+    """pgvector columns come back from PostgREST as '[0.1,0.2,...]' strings."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return list(value)
+
+
+def _document_records(documents: Sequence[Document]) -> List[Dict[str, Any]]:
+    return [{"content": d.page_content, "metadata": d.metadata} for d in documents]
+
+
+def snapshot_digest(matrix: np.ndarray, records: Sequence[Dict[str, Any]]) -> str:
+    """Fingerprint of a snapshot's embeddings and documents."""
+    digest = hashlib.sha1(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+    digest.update(json.dumps(records, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    """Cosine-similarity index over one Supabase vector table."""
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.loaded_at: Optional[float] = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._documents: List[Document] = []
+        self._lock = threading.Lock()
+        # Version of the shared snapshot currently mapped (None = private copy)
+        self.shared_version: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def documents(self) -> List[Document]:
+        """The documents currently loaded (a snapshot; the list is never mutated)."""
+        with self._lock:
+            return self._documents
+
+    def fetch_rows(self, client) -> List[dict]:
+        """Page through the whole table with the sync Supabase client."""
+        rows: List[dict] = []
+        start = 0
+        while True:
+            resp = (
+                client.table(self.table_name)
+                .select("id, content, metadata, embedding")
+                .order("id")
+                .range(start, start + PAGE_SIZE - 1)
+                .execute()
+            )
+            page = resp.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            start += PAGE_SIZE
+
+    def build(self, rows: Sequence[dict]) -> int:
+        """Replace the index contents with the given table rows."""
+        documents: List[Document] = []
+        vectors: List[List[float]] = []
+        for row in rows:
+            vector = _parse_embedding(row.get("embedding"))
+            if not vector:
+                continue
+            documents.append(
+                Document(page_content=row.get("content", ""), metadata=row.get("metadata") or {})
+            )
+            vectors.append(vector)
+
+        matrix = np.asarray(vectors, dtype=np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+        if len(matrix):
+            matrix = _normalize_rows(matrix)
+
+        self._swap(matrix, documents)
+        return len(documents)
+
+    def _swap(self, matrix: np.ndarray, documents: List[Document], shared_version: Optional[str] = None) -> None:
+        # Swap atomically so concurrent searches never see a half-built index
+        with self._lock:
+            self._matrix = matrix
+            self._documents = documents
+            self.shared_version = shared_version
+            self.loaded_at = time.time()
+
+    def load(self, client) -> int:
+        """Fetch the table and rebuild the index; returns the row count."""
+        return self.build(self.fetch_rows(client))
+
+    # -------------------------------
+    # Shared, memory-mapped snapshot
+    # -------------------------------
+    def _manifest_path(self, directory: str) -> Path:
+        return Path(directory) / f"{self.table_name}.json"
+
+    @contextmanager
+    def _file_lock(self, directory: str) -> Iterator[None]:
+        """Cross-process lock so only one worker rebuilds the snapshot."""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        with open(Path(directory) / f"{self.table_name}.lock", "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _read_manifest(self, directory: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(directory), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_shared(self, directory: str, meta: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Write the current matrix + documents as a new snapshot version.
+
+        The matrix goes to ``<table>.<version>.npy``; the manifest
+        ``<table>.json`` (documents, matrix file name, row count, digest and
+        ``meta``) is replaced atomically last, so readers always see a
+        matching pair. Older matrix files are unlinked; workers that still map
+        them keep a valid mapping.
+        """
+        with self._lock:
+            matrix, documents = self._matrix, self._documents
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        records = _document_records(documents)
+        directory_path = Path(directory)
+        directory_path.mkdir(parents=True, exist_ok=True)
+        version = f"{time.time_ns()}"
+        matrix_file = f"{self.table_name}.{version}.npy"
+        np.save(directory_path / matrix_file, matrix)
+
+        manifest = self._manifest_path(directory)
+        tmp = manifest.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({
+                "version": version,
+                "matrix_file": matrix_file,
+                "rows": len(records),
+                "digest": snapshot_digest(matrix, records),
+                "meta": meta or {},
+                "documents": records,
+            }, fh, ensure_ascii=False)
+        os.replace(tmp, manifest)
+
+        for old in directory_path.glob(f"{self.table_name}.*.npy"):
+            if old.name != matrix_file:
+                old.unlink(missing_ok=True)
+        return version
+
+    def open_shared(
+        self, directory: str, max_age: Optional[float] = None, meta: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Map the latest snapshot read-only; False if missing, older than
+        max_age seconds, or written with different ``meta`` values.
+        """
+        manifest = self._manifest_path(directory)
+        try:
+            if max_age is not None and time.time() - manifest.stat().st_mtime > max_age:
+                return False
+        except FileNotFoundError:
+            return False
+        data = self._read_manifest(directory)
+        if data is None:
+            return False
+        if meta and any((data.get("meta") or {}).get(key) != value for key, value in meta.items()):
+            return False
+        try:
+            if data["version"] == self.shared_version:
+                return True
+            matrix = np.load(Path(directory) / data["matrix_file"], mmap_mode="r")
+        except (FileNotFoundError, KeyError, ValueError):
+            return False
+        documents = [
+            Document(page_content=d.get("content", ""), metadata=d.get("metadata") or {})
+            for d in data["documents"]
+        ]
+        self._swap(matrix, documents, shared_version=data["version"])
+        return True
+
+    def load_shared(self, client, directory: str, max_age: float, force: bool = False) -> int:
+        """
+        Map a fresh shared snapshot, rebuilding it from Supabase when needed.
+
+        The first worker to find the snapshot stale (or ``force=True`` after a
+        write) rebuilds it under a file lock; the others wait on the lock and
+        then just map the new file.
+        """
+        if not force and self.open_shared(directory, max_age):
+            return len(self)
+        with self._file_lock(directory):
+            if force or not self.open_shared(directory, max_age):
+                self.load(client)
+                self.save_shared(directory)
+                self.open_shared(directory)
+        return len(self)
+
+    # -------------------------------
+    # Persistent knowledge-base snapshot
+    # -------------------------------
+    def save_snapshot(self, directory: str, meta: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Persist the index as a new snapshot version for degraded serving.
+
+        Skipped (returns None) when the newest version already holds the same
+        rows and meta, so periodic refreshes of an unchanged table do not
+        rewrite it.
+        """
+        with self._lock:
+            matrix, documents = self._matrix, self._documents
+        digest = snapshot_digest(matrix, _document_records(documents))
+        with self._file_lock(directory):
+            current = self._read_manifest(directory)
+            if current and current.get("digest") == digest and current.get("meta") == (meta or {}):
+                return None
+            return self.save_shared(directory, meta=meta)
+
+    def search(self, vector: Sequence[float], k: int = 1) -> List[Tuple[Document, float]]:
+        """Return the top-k documents and their cosine similarity."""
+        with self._lock:
+            matrix, documents = self._matrix, self._documents
+        if not documents or k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = matrix @ (query / norm)
+
+        k = min(k, len(documents))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(documents[i], float(scores[i])) for i in top]
+
+    def search_many(self, vectors: Sequence[Sequence[float]], k: int = 1) -> List[List[Tuple[Document, float]]]:
+        """search() for a batch of queries with one matrix product."""
+        with self._lock:
+            matrix, documents = self._matrix, self._documents
+        if not len(vectors):
+            return []
+        if not documents or k <= 0:
+            return [[] for _ in vectors]
+
+        queries = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = matrix @ (queries / np.where(norms == 0, 1.0, norms)).T
+
+        k = min(k, len(documents))
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for column in range(scores.shape[1]):
+            if norms[column, 0] == 0:
+                results.append([])
+                continue
+            ranked = top[:, column][np.argsort(-scores[top[:, column], column])]
+            results.append([(documents[i], float(scores[i, column])) for i in ranked])
+        return results
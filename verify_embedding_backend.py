@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Check that an embedding backend retrieves the same top-1 FAQ as the float model.
+
+Embeds the EN (faq_data.csv) and AR (result.csv) FAQ rows once with the float
+(torch) model, as the vectors stored in Supabase were, then ranks the EN/AR
+query sets embedded by each backend against that same index and reports top-1
+agreement, known-answer accuracy and per-query latency. Exits non-zero when
+agreement drops below --min-agreement.
+
+Usage:
+    python verify_embedding_backend.py --backend onnx-int8
+    python verify_embedding_backend.py --backend onnx --min-agreement 0.98
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from embedding_backends import EMBEDDING_BACKENDS, QUANTIZATION_CONFIGS, create_base_embeddings
+from ingestion import rows_from_csv
+from langchain_chain import EMBEDDING_MODEL_NAME, normalize_arabic
+from vector_index import LocalVectorIndex
+
+# Queries without a known FAQ: UI suggestions (page.tsx) and routing test queries
+EXTRA_QUERIES = {
+    "en": [
+        "Is your POS system cloud-based",
+        "Can I grow my business using your solutions",
+        "Can I print receipts and manage inventory",
+        "Does your POS support sales reports",
+        "How can I manage my inventory",
+        "What payment methods do you support",
+        "How to create a purchase order?",
+        "What is the refund policy?",
+        "How to reset password",
+    ],
+    "ar": [
+        "هل نظام نقاط البيع الخاص بك قائم على السحابة",
+        "هل يمكنني تنمية أعمالي باستخدام حلولكم",
+        "هل يمكنني طباعة الإيصالات وإدارة المخزون",
+        "هل يدعم نظام نقاط البيع تقارير المبيعات",
+        "كيف أقوم بإنشاء أمر شراء؟",
+        "ما هي سياسة الاسترداد؟",
+        "كيفية إعادة تعيين كلمة المرور",
+        "هل يمكنني إصدار فواتير",
+    ],
+}
+
+
+def build_test_set(lang: str, csv_path: str) -> Tuple[List[dict], List[Tuple[str, str]]]:
+    """Index rows plus (query, expected FAQ ID or '') pairs for one language."""
+    rows = rows_from_csv(csv_path)
+    corpus = []
+    queries: List[Tuple[str, str]] = []
+    for row in rows:
+        content = normalize_arabic(row.content()) if lang == "ar" else row.content()
+        corpus.append({"content": content, "metadata": {"faq_id": row.faq_id}})
+        # The question itself, and a lower-cased, punctuation-free variant
+        queries.append((row.question, row.faq_id))
+        queries.append((re.sub(r"[^\w\s]", "", row.question).lower(), row.faq_id))
+    queries.extend((q, "") for q in EXTRA_QUERIES[lang])
+    return corpus, queries
+
+
+def build_index(reference, corpus: List[dict], lang: str) -> LocalVectorIndex:
+    """Index of the corpus embedded by the float model, like the stored table rows."""
+    vectors = reference.embed_documents([row["content"] for row in corpus])
+    index = LocalVectorIndex(f"verify-{lang}")
+    index.build([dict(row, embedding=vector) for row, vector in zip(corpus, vectors)])
+    return index
+
+
+def top1(model, index: LocalVectorIndex, queries: List[str], lang: str) -> Tuple[List[str], List[float]]:
+    """Top-1 FAQ ID per query embedded by ``model`` and per-query latency in milliseconds."""
+    results, latencies = [], []
+    for query in queries:
+        query = normalize_arabic(query) if lang == "ar" else query
+        start = time.perf_counter()
+        vector = model.embed_query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits = index.search(vector, k=1)
+        results.append(str(hits[0][0].metadata.get("faq_id")) if hits else "")
+    return results, latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="onnx-int8", choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--quantization", default="avx2", choices=QUANTIZATION_CONFIGS)
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--en-csv", default="faq_data.csv")
+    parser.add_argument("--ar-csv", default="result.csv")
+    parser.add_argument("--min-agreement", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"Reference: torch | Candidate: {args.backend} | Model: {args.model}")
+    reference = create_base_embeddings(args.model, "torch")
+    candidate = create_base_embeddings(args.model, args.backend, args.quantization)
+
+    worst = 1.0
+    for lang, csv_path in (("en", args.en_csv), ("ar", args.ar_csv)):
+        corpus, test_set = build_test_set(lang, csv_path)
+        queries = [q for q, _ in test_set]
+        # Production searches candidate query vectors against the float
+        # vectors already stored, so both backends query the same index
+        index = build_index(reference, corpus, lang)
+        ref_ids, ref_ms = top1(reference, index, queries, lang)
+        cand_ids, cand_ms = top1(candidate, index, queries, lang)
+
+        agreement = sum(r == c for r, c in zip(ref_ids, cand_ids)) / len(queries)
+        labelled = [(expected, r, c) for (_, expected), r, c in zip(test_set, ref_ids, cand_ids) if expected]
+        ref_acc = sum(expected == r for expected, r, _ in labelled) / len(labelled)
+        cand_acc = sum(expected == c for expected, _, c in labelled) / len(labelled)
+        worst = min(worst, agreement)
+
+        print(f"\n[{lang.upper()}] {len(queries)} queries over {len(corpus)} FAQs")
+        print(f"  top-1 agreement:     {agreement:.2%}")
+        print(f"  known-answer top-1:  torch {ref_acc:.2%} | {args.backend} {cand_acc:.2%}")
+        print(f"  query latency (p50): torch {statistics.median(ref_ms):.1f} ms | {args.backend} {statistics.median(cand_ms):.1f} ms")
+        mismatches: Dict[str, Tuple[str, str]] = {
+            q: (r, c) for q, r, c in zip(queries, ref_ids, cand_ids) if r != c
+        }
+        for query, (r, c) in list(mismatches.items())[:10]:
+            print(f"  ✗ {query[:60]!r}: torch → {r}, {args.backend} → {c}")
+
+    if worst < args.min_agreement:
+        print(f"\n❌ Agreement {worst:.2%} is below the required {args.min_agreement:.2%}")
+        return 1
+    print(f"\n✅ {args.backend} matches the float model (min agreement {worst:.2%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())